@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Inference backends for the benchmark runner.
+
+Each backend loads one model and turns prompt text into a generation
+record: output text, prompt/new token counts and the per-token timing
+from scripts/inference_timing.py (latency, TTFT, prefill and decode
+tok/s). Heavy imports (torch, transformers, peft, llama_cpp) happen in
+load() so the runner can start with only the backend it needs installed.
+"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from inference_timing import TokenTimer, timed_llama_call
+
+
+def load_causal_lm(model_path):
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    return AutoModelForCausalLM.from_pretrained(
+        model_path,
+        torch_dtype=torch.bfloat16,
+        device_map="auto"
+    )
+
+
+class HFBackend:
+    """
+    HF transformers model, optionally with the prefix cache / constrained
+    decoder / speculative decoding from scripts/.
+
+    With prompt_lookup, n-grams from the prompt are proposed and
+    verified (FunctionGemma echoes the notification into its call). With
+    draft_model, a draft that shares the tokenizer proposes tokens
+    directly; one with another vocabulary (FunctionGemma for a Qwen3
+    target) answers in draft_format and its parsed answer is re-rendered
+    in the target format and proposed through the target tokenizer, the
+    whole answer at once (draft_tokens only caps the other proposers).
+    """
+
+    name = "hf"
+
+    def __init__(self, fmt, model_path, adapter=None, max_new_tokens=150,
+                 prefix_cache=False, constrained=False, draft_model=None, draft_adapter=None,
+                 draft_format=None, draft_tokens=8, prompt_lookup=False, lookup_ngram=3, **_):
+        self.fmt = fmt
+        self.model_path = model_path
+        self.adapter = adapter
+        self.max_new_tokens = max_new_tokens
+        self.use_prefix_cache = prefix_cache
+        self.use_constrained = constrained
+        self.draft_model_path = draft_model
+        self.draft_adapter = draft_adapter
+        self.draft_fmt = draft_format
+        self.draft_tokens = draft_tokens
+        self.prompt_lookup = prompt_lookup
+        self.lookup_ngram = lookup_ngram
+        if (draft_model or prompt_lookup) and constrained:
+            raise ValueError("Speculative decoding and constrained decoding are separate decoding modes")
+        if draft_model and prompt_lookup:
+            raise ValueError("Use either a draft model or prompt lookup")
+
+        self.model = None
+        self.tokenizer = None
+        self.prefix_cache = None
+        self.trie = None
+        self.proposer = None
+        self.draft_mode = None
+
+    def load_model(self):
+        return load_causal_lm(self.model_path)
+
+    def load_draft(self):
+        from transformers import AutoTokenizer
+        from constrained_decoding import TokenTrie, constrained_generate, functiongemma_candidates, json_candidates
+        from speculative import AnswerBridgeProposer, DraftModelProposer
+
+        draft_tokenizer = AutoTokenizer.from_pretrained(self.draft_adapter or self.draft_model_path)
+        draft = load_causal_lm(self.draft_model_path)
+        if self.draft_adapter:
+            from peft import PeftModel
+            draft = PeftModel.from_pretrained(draft, self.draft_adapter)
+        draft.eval()
+
+        if draft_tokenizer.get_vocab() == self.tokenizer.get_vocab():
+            self.draft_mode = "draft-model"
+            return DraftModelProposer(draft)
+
+        # Different vocabulary and output format: the draft classifies with
+        # its own prompt (trie-constrained, two forward passes) and the
+        # answer is carried over as text
+        if self.draft_fmt is None:
+            raise ValueError("A draft with a different tokenizer needs draft_format")
+        draft_fmt = self.draft_fmt
+        candidates = json_candidates if draft_fmt.answer_style == "json" else functiongemma_candidates
+        trie = TokenTrie.from_strings(draft_tokenizer, candidates(draft_fmt.priorities))
+
+        def answer(notif):
+            prompt = draft_fmt.build(notif, draft_tokenizer)
+            ids = draft_tokenizer(prompt, return_tensors="pt")["input_ids"].to(draft.device)
+            answer_ids, _ = constrained_generate(draft, ids, trie)
+            folder, priority = draft_fmt.parse(draft_tokenizer.decode(answer_ids))
+            return self.fmt.answer(folder, priority) if folder is not None else None
+
+        self.draft_mode = "answer-bridge"
+        return AnswerBridgeProposer(answer, self.tokenizer)
+
+    def load(self):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.adapter or self.model_path)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        self.model = self.load_model()
+        self.model.eval()
+
+        self.stop_ids = [self.tokenizer.eos_token_id]
+        for token in self.fmt.stop_tokens:
+            token_id = self.tokenizer.convert_tokens_to_ids(token)
+            if token_id is not None and token_id != self.tokenizer.unk_token_id:
+                self.stop_ids.append(token_id)
+
+        if self.use_prefix_cache:
+            from prefix_cache import SystemPromptCache
+
+            prefix_text = self.fmt.system_prefix()
+            if prefix_text is None:
+                raise ValueError(f"Format {self.fmt.name} has no fixed system prefix to cache")
+            self.prefix_cache = SystemPromptCache(self.model, self.tokenizer, prefix_text)
+
+        if self.use_constrained:
+            from constrained_decoding import TokenTrie, functiongemma_candidates, json_candidates
+
+            candidates = json_candidates if self.fmt.answer_style == "json" else functiongemma_candidates
+            self.trie = TokenTrie.from_strings(self.tokenizer, candidates(self.fmt.priorities))
+
+        if self.draft_model_path:
+            self.proposer = self.load_draft()
+        elif self.prompt_lookup:
+            from speculative import PromptLookupProposer
+
+            self.draft_mode = "prompt-lookup"
+            self.proposer = PromptLookupProposer(self.lookup_ngram)
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "model": str(self.model_path),
+            "adapter": str(self.adapter) if self.adapter else None,
+            "device": str(self.model.device) if self.model is not None else None,
+            "dtype": "bfloat16",
+            "max_new_tokens": self.max_new_tokens,
+            "prefix_cache": self.use_prefix_cache,
+            "constrained": self.use_constrained,
+            "draft": {
+                "mode": self.draft_mode,
+                "model": str(self.draft_model_path),
+                "adapter": str(self.draft_adapter) if self.draft_adapter else None,
+                "format": self.draft_fmt.name if self.draft_fmt else None,
+                "draft_tokens": self.max_new_tokens if self.draft_mode == "answer-bridge" else self.draft_tokens,
+            } if self.draft_model_path else None,
+            "prompt_lookup": {
+                "max_ngram": self.lookup_ngram,
+                "draft_tokens": self.draft_tokens,
+            } if self.prompt_lookup else None,
+        }
+
+    def build_prompt(self, notif):
+        if self.proposer is not None:
+            self.proposer.prepare(notif)
+        return self.fmt.build(notif, self.tokenizer)
+
+    def generate(self, prompt):
+        import torch
+        from constrained_decoding import constrained_generate
+
+        timer = TokenTimer()
+
+        if self.prefix_cache is not None:
+            input_ids, past_key_values = self.prefix_cache.checkout(prompt)
+        else:
+            input_ids = self.tokenizer(prompt, return_tensors="pt")["input_ids"].to(self.model.device)
+            past_key_values = None
+        cached_tokens = past_key_values.get_seq_length() if past_key_values is not None else 0
+
+        spec = None
+        if self.trie is not None:
+            answer_ids, _ = constrained_generate(self.model, input_ids, self.trie, past_key_values, streamer=timer)
+        elif self.proposer is not None:
+            from speculative import speculative_generate
+
+            # A bridged answer is verified in one forward, however long it is
+            k = self.max_new_tokens if self.draft_mode == "answer-bridge" else self.draft_tokens
+            answer_ids, spec = speculative_generate(
+                self.model, input_ids, self.proposer, self.max_new_tokens, self.stop_ids,
+                k=k, past_key_values=past_key_values, streamer=timer
+            )
+        else:
+            kwargs = {"past_key_values": past_key_values} if past_key_values is not None else {}
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    input_ids=input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    max_new_tokens=self.max_new_tokens,
+                    do_sample=False,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    eos_token_id=self.stop_ids,
+                    streamer=timer,
+                    **kwargs
+                )
+            answer_ids = outputs[0][input_ids.shape[1]:].tolist()
+
+        timing = timer.record(prefill_tokens=input_ids.shape[1] - cached_tokens)
+        text = self.tokenizer.decode(answer_ids, skip_special_tokens=self.fmt.answer_style == "json")
+
+        generation = {
+            "text": text,
+            "prompt_tokens": input_ids.shape[1],
+            **timing,
+            "new_tokens": len(answer_ids),
+        }
+        if spec is not None:
+            generation.update({f"spec_{key}": value for key, value in spec.items()})
+        return generation
+
+
+class PeftBackend(HFBackend):
+    """HF base model with a LoRA adapter applied (fine-tuned FunctionGemma / Qwen3)."""
+
+    name = "hf-peft"
+
+    def __init__(self, fmt, model_path, adapter=None, **kwargs):
+        if not adapter:
+            raise ValueError("hf-peft backend needs --adapter")
+        super().__init__(fmt, model_path, adapter=adapter, **kwargs)
+
+    def load_model(self):
+        from peft import PeftModel
+
+        base_model = super().load_model()
+        return PeftModel.from_pretrained(base_model, self.adapter)
+
+
+class LlamaCppBackend:
+    """GGUF model through llama-cpp-python on CPU (the phone-equivalent path)."""
+
+    name = "llama-cpp"
+
+    def __init__(self, fmt, model_path, max_new_tokens=150, n_threads=8, n_ctx=2048, tokenizer=None, **_):
+        self.fmt = fmt
+        self.model_path = model_path
+        self.max_new_tokens = max_new_tokens
+        self.n_threads = n_threads
+        self.n_ctx = n_ctx
+        # HF tokenizer directory, only used to render chat-template formats (functiongemma-tools*)
+        self.tokenizer_path = tokenizer
+        self.tokenizer = None
+        self.llm = None
+
+    def load(self):
+        try:
+            from llama_cpp import Llama
+        except ImportError:
+            print("Error: llama-cpp-python not installed")
+            print("Install with: pip install llama-cpp-python")
+            sys.exit(1)
+
+        self.llm = Llama(
+            model_path=str(self.model_path),
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            n_gpu_layers=0,  # CPU only
+            verbose=False
+        )
+
+        if self.tokenizer_path:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_path)
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "model": str(self.model_path),
+            "tokenizer": self.tokenizer_path,
+            "model_size_mb": Path(self.model_path).stat().st_size / 1024 / 1024,
+            "n_threads": self.n_threads,
+            "n_ctx": self.n_ctx,
+            "max_new_tokens": self.max_new_tokens,
+            # llama-cpp-python keeps the KV cache of the longest matching prompt prefix
+            "prefix_cache": "automatic",
+        }
+
+    def build_prompt(self, notif):
+        return self.fmt.build(notif, self.tokenizer)
+
+    def generate(self, prompt):
+        text, finish_reason, timing = timed_llama_call(
+            self.llm,
+            prompt,
+            max_tokens=self.max_new_tokens,
+            temperature=0.0,
+            stop=self.fmt.stop,
+        )
+
+        # llama-cpp strips the stop string; the function call parser needs its end marker
+        if self.fmt.answer_style == "function_call" and finish_reason == "stop":
+            text += self.fmt.stop[0]
+
+        return {"text": text, **timing}
+
+
+BACKENDS = {backend.name: backend for backend in [HFBackend, PeftBackend, LlamaCppBackend]}
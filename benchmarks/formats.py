@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Prompt formats for the benchmark runner.
+
+A format turns a notification into prompt text and parses the model's
+answer back into (folder, priority). Each one matches a prompt that an
+existing benchmark or the Android app already uses, so results stay
+comparable with the older per-folder test scripts.
+"""
+
+import json
+import re
+
+FOLDERS = ["Work", "Personal", "Promotions", "Alerts"]
+
+
+def user_message(notif):
+    return f"""App: {notif['app_display_name']}
+Title: {notif['title']}
+Body: {notif['body']}"""
+
+
+def parse_json_answer(text):
+    """Extract folder and priority from a JSON answer."""
+    try:
+        start = text.find("{")
+        end = text.rfind("}") + 1
+        if start >= 0 and end > start:
+            data = json.loads(text[start:end])
+            return data.get("folder"), data.get("priority")
+    except Exception:
+        pass
+    return None, None
+
+
+def parse_function_call(text):
+    """Extract folder and priority from a FunctionGemma function call."""
+    start = text.find("<start_function_call>")
+    end = text.find("<end_function_call>")
+    if start < 0 or end < 0:
+        return None, None
+
+    call_text = text[start:end]
+    folder_match = re.search(r'folder:<escape>([^<]+)<escape>', call_text)
+    priority_match = re.search(r'priority:<escape>(\d+)<escape>', call_text)
+    folder = folder_match.group(1) if folder_match else None
+    priority = int(priority_match.group(1)) if priority_match else None
+    return folder, priority
+
+
+def example_from_messages(record):
+    """Convert a functiongemma_*.jsonl record to the notification/classification layout."""
+    user_content = record["messages"][0]["content"]
+    app_line, rest = user_content.split("\nTitle: ", 1)
+    title, body = rest.split("\nBody: ", 1)
+    folder, priority = parse_function_call(record["messages"][1]["content"])
+
+    return {
+        "notification": {
+            "app_display_name": app_line[len("App: "):],
+            "title": title,
+            "body": body,
+        },
+        "classification": {"folder": folder, "priority": priority},
+    }
+
+
+class QwenJsonFormat:
+    """Benchmark 001 prompt: Qwen3 chat template, JSON answer, 5-level priority."""
+
+    name = "qwen-json"
+    answer_style = "json"
+    priorities = [1, 2, 3, 4, 5]
+    stop = ["<|im_end|>"]
+    stop_tokens = []
+    system_prompt = """You classify notifications into folders.
+
+Folders:
+[Work]: Professional messages from work apps like Slack, Jira, Teams, work email, Feishu, DingTalk
+[Personal]: Messages from friends and family via WhatsApp, WeChat, Telegram, Douyin, RedNote
+[Promotions]: Marketing, deals, spam, promotional content from shopping and service apps
+[Alerts]: Banking, security, system notifications, delivery updates, transactional messages
+
+Output JSON only: {"folder": "...", "priority": 1-5}
+Priority: 1=ignore, 2=low, 3=normal, 4=important, 5=urgent
+/no_think"""
+
+    def system_prefix(self):
+        return f"<|im_start|>system\n{self.system_prompt}<|im_end|>\n"
+
+    def build(self, notif, tokenizer=None):
+        # Same text as apply_chat_template(..., enable_thinking=False)
+        return (
+            self.system_prefix()
+            + f"<|im_start|>user\n{user_message(notif)}<|im_end|>\n"
+            + "<|im_start|>assistant\n<think>\n\n</think>\n\n"
+        )
+
+    def parse(self, text):
+        return parse_json_answer(text)
+
+    def answer(self, folder, priority):
+        """The reference answer text, as the model is trained to produce it."""
+        return json.dumps({"folder": folder, "priority": priority}) + self.stop[0]
+
+
+class QwenNotifFormat(QwenJsonFormat):
+    """Production prompt from the Android PromptBuilder, 3-level priority."""
+
+    name = "qwen-notif"
+    priorities = [1, 2, 3]
+    system_prompt = """You are a notification classifier. Classify the notification into a folder and priority level.
+
+Folders:
+- Work: Job-related notifications (emails from colleagues, calendar invites, project updates, work apps like Slack, Jira)
+- Personal: Family, friends, personal accounts, social media, messaging from personal contacts
+- Promotions: Marketing, sales, deals, newsletters, advertisements, discount offers
+- Alerts: System alerts, security, deliveries, bills, account notifications, reminders
+
+Priority levels:
+- 1 (Low): Can ignore or check later (promotions, social media, newsletters)
+- 2 (Medium): Worth checking today (regular emails, app updates, deliveries)
+- 3 (High): Requires immediate attention (urgent messages, security alerts, time-sensitive)
+
+Respond with ONLY a JSON object: {"folder": "<folder>", "priority": <1-3>}
+/no_think"""
+
+    def build(self, notif, tokenizer=None):
+        # PromptBuilder.buildPrompt(): system + "\n" + user message; trimIndent()
+        # drops the trailing newline after "assistant"
+        return (
+            self.system_prefix()
+            + f"<|im_start|>user\n{user_message(notif)}<|im_end|>\n"
+            + "<|im_start|>assistant"
+        )
+
+
+class FunctionGemmaManualFormat:
+    """Benchmark 002 prompt: hand-written FunctionGemma declaration, 5-level priority."""
+
+    name = "functiongemma-manual"
+    answer_style = "function_call"
+    priorities = [1, 2, 3, 4, 5]
+    stop = ["<end_function_call>"]
+    stop_tokens = ["<end_function_call>"]
+
+    def declaration(self):
+        def esc(s):
+            return f"<escape>{s}<escape>"
+
+        folders_desc = "Work: professional messages from Slack, Jira, Teams, email, Feishu, DingTalk. Personal: friends and family via WhatsApp, WeChat, Telegram, Douyin, RedNote. Promotions: marketing, deals, spam, shopping. Alerts: banking, security, system notifications, delivery updates"
+        return (
+            "declaration:classify_notification{"
+            f"description:{esc('Classify notification into folder and priority. ' + folders_desc)},"
+            "parameters:{"
+            "properties:{"
+            "folder:{"
+            f"description:{esc('One of: Work, Personal, Promotions, Alerts')},"
+            f"enum:[{esc('Work')},{esc('Personal')},{esc('Promotions')},{esc('Alerts')}],"
+            f"type:{esc('STRING')}"
+            "},"
+            "priority:{"
+            f"description:{esc('Priority 1-5. 1=ignore, 2=low, 3=normal, 4=important, 5=urgent')},"
+            f"enum:[{esc('1')},{esc('2')},{esc('3')},{esc('4')},{esc('5')}],"
+            f"type:{esc('STRING')}"
+            "}"
+            "},"
+            f"required:[{esc('folder')},{esc('priority')}],"
+            f"type:{esc('OBJECT')}"
+            "}"
+            "}"
+        )
+
+    def system_prefix(self):
+        return (
+            "<start_of_turn>developer\n"
+            "You are a model that can do function calling with the following functions"
+            f"<start_function_declaration>{self.declaration()}<end_function_declaration>\n"
+            "<end_of_turn>\n"
+        )
+
+    def build(self, notif, tokenizer=None):
+        return (
+            self.system_prefix()
+            + f"<start_of_turn>user\n{user_message(notif)}\n<end_of_turn>\n"
+            + "<start_of_turn>model\n"
+        )
+
+    def parse(self, text):
+        return parse_function_call(text)
+
+    def answer(self, folder, priority):
+        """The answer without the echoed app_name/title/body (the compact target)."""
+        return (
+            "<start_function_call>call:classify_notification{"
+            f"folder:<escape>{folder}<escape>,priority:<escape>{priority}<escape>"
+            "}<end_function_call>"
+        )
+
+
+def classify_notification(app_name: str, title: str, body: str, folder: str = None, priority: int = None):
+    """
+    Classify a notification into a folder and priority level.
+
+    Args:
+        app_name: The name of the app that sent the notification
+        title: The notification title
+        body: The notification body/content
+        folder: One of: Work, Personal, Promotions, Alerts
+        priority: Priority level from 1 (ignore) to 5 (urgent)
+
+    Returns:
+        A dictionary with folder and priority
+    """
+    return {"folder": folder, "priority": priority}
+
+
+class FunctionGemmaToolsFormat(FunctionGemmaManualFormat):
+    """Benchmark 005 prompt: official chat template with tools (fine-tuned adapters)."""
+
+    name = "functiongemma-tools"
+
+    def system_prefix(self):
+        return None
+
+    def build(self, notif, tokenizer=None):
+        if tokenizer is None:
+            raise ValueError(f"{self.name} renders through an HF chat template and needs an HF backend")
+        return tokenizer.apply_chat_template(
+            [{"role": "user", "content": user_message(notif)}],
+            tools=self.tools(),
+            tokenize=False,
+            add_generation_prompt=True
+        )
+
+    def tools(self):
+        return [classify_notification]
+
+
+class FunctionGemmaTools3LevelFormat(FunctionGemmaToolsFormat):
+    """Official chat template with the 3-level tool (finetune_functiongemma_3level.py adapters, full or compact)."""
+
+    name = "functiongemma-tools-3level"
+    priorities = [1, 2, 3]
+
+    def tools(self):
+        from transformers.utils import get_json_schema
+        schema = get_json_schema(classify_notification)
+        schema["function"]["parameters"]["properties"]["priority"]["description"] = \
+            "Priority level from 1 (low) to 3 (high)"
+        return [schema]
+
+
+FORMATS = {
+    fmt.name: fmt
+    for fmt in [QwenJsonFormat, QwenNotifFormat, FunctionGemmaManualFormat, FunctionGemmaToolsFormat,
+                FunctionGemmaTools3LevelFormat]
+}
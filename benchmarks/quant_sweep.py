@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Quantization sweep: accuracy vs decode speed vs size for each GGUF quant type.
+
+Builds every quant with the cached merge/convert pipeline
+(scripts/merge_and_convert.py), then runs the held-out 3-level test
+slice through each one with benchmarks/run.py on the llama-cpp backend.
+Each quant runs in its own process, one at a time, so peak RSS is per
+model and runs do not compete for cores.
+
+Writes benchmarks/<name>/ with results.json, README.md (table) and
+pareto.png (needs matplotlib; the table marks the frontier either way).
+Per-quant run results are kept in runs/ keyed by the GGUF's sha256, so
+re-running the sweep only evaluates new or changed models.
+
+Usage:
+    python benchmarks/quant_sweep.py --adapter path/to/qwen3-finetuned --llama-cpp path/to/llama.cpp \\
+        --sample-size 500 --threads 4 --name 009-quant-sweep
+
+    # A subset of types
+    python benchmarks/quant_sweep.py --adapter ... --quants Q8_0 Q5_K_M Q4_K_M Q3_K_M
+
+    # Plain vs imatrix-calibrated low-bit quants in one table (<TYPE>-imat rows)
+    python benchmarks/quant_sweep.py --adapter ... --quants Q8_0 Q4_0 Q4_K_M Q3_K_M \
+        --imatrix-quants Q4_0 Q4_K_M Q3_K_M IQ4_NL IQ3_M
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARKS_DIR.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import merge_and_convert as pipeline
+
+# llama-quantize types that work without an importance matrix, largest first
+SWEEP_TYPES = ["Q8_0", "Q6_K", "Q5_K_M", "Q5_K_S", "Q5_0", "Q4_K_M", "Q4_K_S", "Q4_0",
+               "Q3_K_L", "Q3_K_M", "Q3_K_S", "Q2_K"]
+TEST_FILE = REPO_ROOT / "data" / "training_data_full_3level.jsonl"
+TEST_SKIP = 12000  # rows 0..11999 are the training slice
+
+# Pareto axes: (key, +1 higher is better / -1 lower is better)
+ACCURACY = ("combined_accuracy", 1)
+SIZE = ("size_mb", -1)
+SPEED = ("decode_tok_s", 1)
+
+
+def run_quant(quant, model_path, run_path, args):
+    """Evaluate one GGUF through benchmarks/run.py in a fresh process; returns its results dict."""
+    cmd = [
+        sys.executable, str(BENCHMARKS_DIR / "run.py"),
+        "--backend", "llama-cpp", "--model", str(model_path), "--format", args.format,
+        "--test-file", str(args.test_file), "--skip", str(args.skip),
+        "--sample-size", str(args.sample_size), "--threads", str(args.threads),
+        "--output", str(run_path),
+    ]
+    print(f"\n[{quant}] {' '.join(cmd[1:])}")
+    subprocess.run(cmd, check=True)
+    return json.loads(run_path.read_text(encoding="utf-8"))
+
+
+def sweep_row(quant, record, results):
+    s = results["summary"]
+    decode = s["timing"].get("decode_tok_s")
+    return {
+        "quant": quant,
+        "model": record["path"],
+        "sha256": record["sha256"],
+        "size_mb": record["size_bytes"] / 1024 / 1024,
+        "folder_accuracy": s["folder_accuracy"],
+        "priority_accuracy": s["priority_accuracy"],
+        "combined_accuracy": s["combined_accuracy"],
+        "parse_failure_rate": s["parse_failure_rate"],
+        "decode_tok_s": decode["p50"] if decode else None,
+        "ttft_ms": s["mean_ttft_ms"],
+        "latency_ms": s["mean_latency_ms"],
+        "peak_rss_mb": s["peak_rss_mb"],
+    }
+
+
+def dominates(a, b, axes):
+    """a is at least as good as b on every axis and strictly better on one."""
+    better = False
+    for key, sign in axes:
+        if a[key] is None or b[key] is None:
+            return False
+        if sign * a[key] < sign * b[key]:
+            return False
+        better = better or sign * a[key] > sign * b[key]
+    return better
+
+
+def pareto_front(rows, axes):
+    return [row for row in rows if not any(dominates(other, row, axes) for other in rows)]
+
+
+
+def plot_pareto(rows, path):
+    """Combined accuracy against size and against decode speed, frontier highlighted."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed, skipping pareto.png (pip install matplotlib)")
+        return False
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, (key, label) in zip(axes, [(SIZE, "Model size (MB)"), (SPEED, "Decode tok/s (p50)")]):
+        points = [r for r in rows if r[key[0]] is not None]
+        front = sorted(pareto_front(points, [ACCURACY, key]), key=lambda r: r[key[0]])
+        ax.scatter([r[key[0]] for r in points], [r["combined_accuracy"] * 100 for r in points], color="tab:gray")
+        ax.plot([r[key[0]] for r in front], [r["combined_accuracy"] * 100 for r in front],
+                "o-", color="tab:red", label="Pareto front")
+        for r in points:
+            ax.annotate(r["quant"], (r[key[0]], r["combined_accuracy"] * 100),
+                        textcoords="offset points", xytext=(4, 4), fontsize=8)
+        ax.set_xlabel(label)
+        ax.set_ylabel("Combined accuracy (%)")
+        ax.grid(alpha=0.3)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return True
+
+
+def num(value, fmt):
+    return format(value, fmt) if value is not None else "-"
+
+
+def render_table(rows, front):
+    lines = [
+        "| 量化类型 | 大小 (MB) | 文件夹 | 优先级 | 综合 | 解码 (tok/s) | 首 token 延迟 (ms) | 峰值内存 (MB) | Pareto |",
+        "|----------|-----------|--------|--------|------|--------------|--------------------|---------------|--------|",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {r['quant']} | {r['size_mb']:.0f} | {r['folder_accuracy']*100:.1f}% | "
+            f"{r['priority_accuracy']*100:.1f}% | {r['combined_accuracy']*100:.1f}% | "
+            f"{num(r['decode_tok_s'], '.1f')} | {num(r['ttft_ms'], '.1f')} | {num(r['peak_rss_mb'], '.0f')} | "
+            f"{'✓' if r['quant'] in front else ''} |"
+        )
+    return lines
+
+
+def render_readme(results, has_plot):
+    lines = [
+        f"# 基准测试 {results['benchmark']}: 量化类型扫描",
+        "",
+        f"**日期:** {results['created'][:10]}",
+        f"**适配器:** `{results['adapter']}`",
+        f"**提示格式:** {results['format']}",
+        f"**测试样本:** {results['sample_size']} 个样本 (`{results['test_file']}`, 跳过 {results['skip']})",
+        f"**后端:** llama-cpp (CPU, {results['threads']} 线程)",
+        "",
+        "## 结果",
+        "",
+        *render_table(results["rows"], results["pareto"]),
+        "",
+        "Pareto 列标记在大小、解码速度、综合准确率三个维度上不被其他量化类型同时超越的模型。",
+        "",
+    ]
+    if has_plot:
+        lines += ["![Pareto](pareto.png)", ""]
+    lines += ["## 复现", "", "```bash", results["command"], "```", ""]
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Accuracy / speed / size sweep over GGUF quant types")
+    parser.add_argument("--base-model", type=Path, default=pipeline.BASE_MODEL)
+    parser.add_argument("--adapter", type=Path, default=pipeline.LORA_ADAPTER)
+    parser.add_argument("--llama-cpp", type=Path, default=pipeline.LLAMA_CPP)
+    parser.add_argument("--work-dir", type=Path, default=pipeline.WORK_DIR)
+    parser.add_argument("--quants", nargs="+", default=SWEEP_TYPES, metavar="TYPE")
+    parser.add_argument("--imatrix-quants", nargs="+", default=[], metavar="TYPE",
+                        help="Also sweep these types quantized with a calibration imatrix")
+    parser.add_argument("--calib-samples", type=int, default=pipeline.CALIB_SAMPLES)
+    parser.add_argument("--no-f16", action="store_true", help="Leave the unquantized F16 GGUF out of the sweep")
+    parser.add_argument("--jobs", type=int, help="Parallel llama-quantize jobs")
+    parser.add_argument("--format", default="qwen-notif", help="benchmarks/run.py prompt format")
+    parser.add_argument("--test-file", type=Path, default=TEST_FILE)
+    parser.add_argument("--skip", type=int, default=TEST_SKIP)
+    parser.add_argument("--sample-size", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4, help="llama-cpp CPU threads per run")
+    parser.add_argument("--rerun", action="store_true", help="Re-evaluate quants that already have results")
+    parser.add_argument("--name", default="quant-sweep", help="Output folder under benchmarks/")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 70)
+    print(f"QUANT SWEEP: {', '.join(args.quants + [pipeline.quant_label(q, True) for q in args.imatrix_quants])}")
+    print("=" * 70)
+
+    try:
+        manifest = pipeline.export_models(args.base_model, args.adapter, args.llama_cpp, args.quants,
+                                          args.work_dir, args.jobs, imatrix_quants=args.imatrix_quants,
+                                          calib_samples=args.calib_samples)
+    except (FileNotFoundError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    pipeline.print_manifest(manifest)
+
+    records = {r["path"]: r for r in manifest["artifacts"]}
+    models = [(q, records[path]) for q, path in manifest["quants"].items()]
+    if not args.no_f16:
+        models.insert(0, ("F16", next(r for r in manifest["artifacts"] if r["stage"] == "f16")))
+
+    out_dir = BENCHMARKS_DIR / args.name
+    runs_dir = out_dir / "runs"
+    runs_dir.mkdir(parents=True, exist_ok=True)
+
+    rows = []
+    for quant, record in models:
+        run_path = runs_dir / f"{quant}-{record['sha256'][:12]}-{args.format}-{args.skip}-{args.sample_size}.json"
+        if run_path.exists() and not args.rerun:
+            print(f"\n[{quant}] cached run: {run_path.name}")
+            results = json.loads(run_path.read_text(encoding="utf-8"))
+        else:
+            results = run_quant(quant, record["path"], run_path, args)
+        rows.append(sweep_row(quant, record, results))
+
+    front = [r["quant"] for r in pareto_front(rows, [ACCURACY, SIZE, SPEED])]
+    results = {
+        "benchmark": args.name,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "command": "python " + " ".join([Path(sys.argv[0]).as_posix()] + sys.argv[1:]),
+        "adapter": str(args.adapter),
+        "format": args.format,
+        "test_file": str(args.test_file),
+        "skip": args.skip,
+        "sample_size": args.sample_size,
+        "threads": args.threads,
+        "rows": rows,
+        "pareto": front,
+    }
+
+    print()
+    print("=" * 70)
+    print("RESULTS")
+    print("=" * 70)
+    print(f"\n{'Quant':<12} {'Size MB':>8} {'Folder':>7} {'Prio':>7} {'Both':>7} {'Dec t/s':>8} "
+          f"{'TTFT ms':>8} {'RSS MB':>7}  Pareto")
+    for r in rows:
+        print(f"{r['quant']:<12} {r['size_mb']:>8.0f} {r['folder_accuracy']:>7.1%} {r['priority_accuracy']:>7.1%} "
+              f"{r['combined_accuracy']:>7.1%} {num(r['decode_tok_s'], '.1f'):>8} {num(r['ttft_ms'], '.1f'):>8} "
+              f"{num(r['peak_rss_mb'], '.0f'):>7}  {'*' if r['quant'] in front else ''}")
+
+    has_plot = plot_pareto(rows, out_dir / "pareto.png")
+    with open(out_dir / "results.json", 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    (out_dir / "README.md").write_text(render_readme(results, has_plot), encoding="utf-8")
+    print(f"\nResults saved to: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
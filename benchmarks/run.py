@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Unified benchmark runner.
+
+Replaces the per-folder test_script.py copies: one CLI loads a model
+through a pluggable backend (hf, hf-peft, llama-cpp), renders a prompt
+format, runs a test slice and writes one versioned results schema.
+
+Usage:
+    # Benchmark 001 (Qwen3-0.6B base)
+    python benchmarks/run.py --backend hf --model models/qwen3-0.6b --format qwen-json \\
+        --test-file data/training_data.jsonl --sample-size 100
+
+    # New benchmark folder with results.json + generated README.md
+    python benchmarks/run.py --backend llama-cpp --model models/Qwen3-0.6B-notif-Q8_0.gguf \\
+        --format qwen-notif --test-file data/training_data_full_3level.jsonl --skip 12000 \\
+        --sample-size 500 --name 009-qwen3-q8-cpu
+
+    # Compact vs full FunctionGemma targets on the CPU path: run once per GGUF
+    python benchmarks/run.py --backend llama-cpp --model models/functiongemma-notif-compact-Q8_0.gguf \
+        --tokenizer models/functiongemma-270m --format functiongemma-tools-3level \
+        --test-file data/functiongemma_test_3level_compact.jsonl --threads 4 --sample-size 500
+
+    # Speculative decoding: fine-tuned FunctionGemma drafting for the fine-tuned Qwen3
+    # (run once without --draft-* for the greedy baseline)
+    python benchmarks/run.py --backend hf-peft --model models/qwen3-0.6b --adapter qwen3-finetuned-notif-3level \
+        --format qwen-notif --test-file data/training_data_full_3level.jsonl --skip 12000 --sample-size 500 \
+        --draft-model models/functiongemma-270m --draft-adapter functiongemma-finetuned-notif-3level \
+        --draft-format functiongemma-tools-3level
+
+    # Prompt-lookup decoding for the echoing FunctionGemma calls (compare with a plain run)
+    python benchmarks/run.py --backend hf-peft --model models/functiongemma-270m \
+        --adapter functiongemma-finetuned-notif-3level --format functiongemma-tools-3level \
+        --test-file data/functiongemma_test_3level.jsonl --sample-size 500 --prompt-lookup
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from backends import BACKENDS
+from formats import FOLDERS, FORMATS, example_from_messages
+from inference_timing import print_timing_summary, summarize_timings
+from notif_index import read_rows
+
+SCHEMA_VERSION = 2
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARKS_DIR.parent
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, in MB (None if unavailable)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KB on Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def load_examples(path, skip, sample_size):
+    """Load notification/classification rows from either dataset layout, seeking past skip via the line index."""
+    records = read_rows(path, skip, skip + sample_size)
+    return [example_from_messages(record) if "messages" in record else record for record in records]
+
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def summarize(rows):
+    """Aggregate per-example rows into the summary block."""
+    total = len(rows)
+    folder_correct = sum(1 for r in rows if r["folder_correct"])
+    priority_correct = sum(1 for r in rows if r["priority_correct"])
+    both_correct = sum(1 for r in rows if r["folder_correct"] and r["priority_correct"])
+    parse_failures = sum(1 for r in rows if not r["parse_ok"])
+    invalid_folders = sum(1 for r in rows if r["parse_ok"] and r["predicted_folder"] not in FOLDERS)
+
+    return {
+        "total": total,
+        "folder_accuracy": folder_correct / total if total else 0.0,
+        "priority_accuracy": priority_correct / total if total else 0.0,
+        "combined_accuracy": both_correct / total if total else 0.0,
+        "parse_failure_rate": parse_failures / total if total else 0.0,
+        "invalid_folder_rate": invalid_folders / total if total else 0.0,
+        "mean_latency_ms": mean([r["latency_ms"] for r in rows]),
+        "mean_ttft_ms": mean([r["ttft_ms"] for r in rows]),
+        "mean_tokens_per_sec": mean([r["tokens_per_sec"] for r in rows]),
+        "mean_prompt_tokens": mean([r["prompt_tokens"] for r in rows]),
+        "mean_new_tokens": mean([r["new_tokens"] for r in rows]),
+        "peak_rss_mb": max((r["peak_rss_mb"] for r in rows if r["peak_rss_mb"] is not None), default=None),
+        # p50/p95/p99 per metric, the desktop counterpart of the Android 004/008 tables
+        "timing": summarize_timings(rows),
+        "speculative": summarize_speculative(rows),
+    }
+
+
+def summarize_speculative(rows):
+    """Draft acceptance over rows from a speculative run (None otherwise)."""
+    rows = [r for r in rows if r.get("spec_forward_passes")]
+    if not rows:
+        return None
+    passes = sum(r["spec_forward_passes"] for r in rows)
+    proposed = sum(r["spec_proposed"] for r in rows)
+    accepted = sum(r["spec_accepted"] for r in rows)
+    return {
+        "forward_passes": passes,
+        "proposed_tokens": proposed,
+        "accepted_tokens": accepted,
+        "acceptance_rate": accepted / proposed if proposed else 0.0,
+        # Plain greedy generate() is 1.0
+        "tokens_per_forward": sum(r["new_tokens"] for r in rows) / passes,
+    }
+
+
+def render_readme(results):
+    """README skeleton for a new benchmark folder, in the same layout as 001-008."""
+    s = results["summary"]
+    total = s["total"]
+
+    def ms(value):
+        return f"{value:.1f} ms" if value is not None else "-"
+
+    lines = [
+        f"# 基准测试 {results['benchmark']}",
+        "",
+        f"**日期:** {results['created'][:10]}",
+        f"**模型:** `{results['backend']['model']}`",
+        f"**后端:** {results['backend']['name']}",
+        f"**提示格式:** {results['format']}",
+        f"**测试样本:** {total} 个样本 (`{results['test_file']}`, 跳过 {results['skip']})",
+        f"**硬件:** {results['environment']['processor'] or results['environment']['machine']}",
+        "",
+        "## 测试结果",
+        "",
+        "| 指标 | 分数 |",
+        "|------|------|",
+        f"| **文件夹分类准确率** | **{s['folder_accuracy']*100:.1f}%** ({round(s['folder_accuracy']*total)}/{total}) |",
+        f"| **优先级分类准确率** | {s['priority_accuracy']*100:.1f}% ({round(s['priority_accuracy']*total)}/{total}) |",
+        f"| **综合准确率** | {s['combined_accuracy']*100:.1f}% |",
+        f"| **解析失败率** | {s['parse_failure_rate']*100:.1f}% |",
+        f"| **无效文件夹率** | {s['invalid_folder_rate']*100:.1f}% |",
+        "",
+        "## 性能",
+        "",
+        "| 指标 | 数值 |",
+        "|------|------|",
+        f"| 平均延迟 | {ms(s['mean_latency_ms'])} |",
+        f"| 平均首 token 延迟 | {ms(s['mean_ttft_ms'])} |",
+        f"| 平均解码 token 数 | {s['mean_new_tokens']:.1f} |" if s["mean_new_tokens"] is not None else "| 平均解码 token 数 | - |",
+        f"| 平均生成速度 | {s['mean_tokens_per_sec']:.2f} tok/s |" if s["mean_tokens_per_sec"] else "| 平均生成速度 | - |",
+        f"| 峰值内存 (RSS) | {s['peak_rss_mb']:.0f} MB |" if s["peak_rss_mb"] else "| 峰值内存 (RSS) | - |",
+    ]
+    spec = s.get("speculative")
+    if spec:
+        lines += [
+            f"| 草稿接受率 | {spec['acceptance_rate']*100:.1f}% ({spec['accepted_tokens']}/{spec['proposed_tokens']}) |",
+            f"| 每次前向 token 数 | {spec['tokens_per_forward']:.2f} |",
+        ]
+    lines += [
+        "",
+        "### 逐 token 延迟分布",
+        "",
+        "| 指标 | p50 | p95 | p99 |",
+        "|------|-----|-----|-----|",
+    ]
+    for key, label in [("latency_ms", "延迟 (ms)"), ("ttft_ms", "首 token 延迟 (ms)"),
+                       ("prefill_tok_s", "预填充 (tok/s)"), ("decode_tok_s", "解码 (tok/s)"),
+                       ("new_tokens", "解码 token 数")]:
+        stats = s["timing"].get(key)
+        if stats is None:
+            lines.append(f"| {label} | - | - | - |")
+        else:
+            lines.append(f"| {label} | {stats['p50']:.1f} | {stats['p95']:.1f} | {stats['p99']:.1f} |")
+    lines += [
+        "",
+        "## 复现",
+        "",
+        "```bash",
+        results["command"],
+        "```",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a notification classification benchmark")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), required=True)
+    parser.add_argument("--model", required=True, help="HF model directory or GGUF file")
+    parser.add_argument("--adapter", help="LoRA adapter directory (hf-peft)")
+    parser.add_argument("--format", choices=sorted(FORMATS), required=True, help="Prompt/answer format")
+    parser.add_argument("--test-file", required=True)
+    parser.add_argument("--skip", type=int, default=0, help="Leading rows to skip (e.g. the training slice)")
+    parser.add_argument("--sample-size", type=int, default=100)
+    parser.add_argument("--max-new-tokens", type=int, default=150)
+    parser.add_argument("--threads", type=int, default=8, help="llama-cpp CPU threads")
+    parser.add_argument("--tokenizer", help="llama-cpp: HF tokenizer directory for chat-template formats")
+    parser.add_argument("--prefix-cache", action="store_true", help="hf: reuse the system-prompt KV cache")
+    parser.add_argument("--constrained", action="store_true", help="hf: trie-constrained decoding")
+    parser.add_argument("--draft-model", help="hf: draft model for speculative decoding")
+    parser.add_argument("--draft-adapter", help="hf: LoRA adapter for the draft model")
+    parser.add_argument("--draft-format", choices=sorted(FORMATS), default="functiongemma-tools-3level",
+                        help="hf: prompt format of a draft with a different tokenizer")
+    parser.add_argument("--draft-tokens", type=int, default=8, help="hf: max draft tokens verified per forward (an answer-bridge draft is proposed whole)")
+    parser.add_argument("--prompt-lookup", action="store_true",
+                        help="hf: speculative decoding with n-grams copied from the prompt")
+    parser.add_argument("--lookup-ngram", type=int, default=3, help="hf: longest n-gram matched by --prompt-lookup")
+    parser.add_argument("--name", help="Create benchmarks/<name>/ with results.json and README.md")
+    parser.add_argument("--output", help="Results JSON path (default: benchmark_results.json in the repo root)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    fmt = FORMATS[args.format]()
+
+    print("="*70)
+    print(f"BENCHMARK: {args.backend} / {args.format}")
+    print("="*70)
+    print()
+
+    backend = BACKENDS[args.backend](
+        fmt,
+        args.model,
+        adapter=args.adapter,
+        max_new_tokens=args.max_new_tokens,
+        n_threads=args.threads,
+        tokenizer=args.tokenizer,
+        prefix_cache=args.prefix_cache,
+        constrained=args.constrained,
+        draft_model=args.draft_model,
+        draft_adapter=args.draft_adapter,
+        draft_format=FORMATS[args.draft_format]() if args.draft_model else None,
+        draft_tokens=args.draft_tokens,
+        prompt_lookup=args.prompt_lookup,
+        lookup_ngram=args.lookup_ngram,
+    )
+
+    print(f"Loading model: {args.model}")
+    backend.load()
+    print(f"Model loaded ({peak_rss_mb() or 0:.0f} MB peak RSS)")
+    print()
+
+    print(f"Loading {args.sample_size} examples from {args.test_file} (skip {args.skip})...")
+    examples = load_examples(args.test_file, args.skip, args.sample_size)
+    print(f"Loaded {len(examples)} examples")
+    print()
+    print("="*70)
+    print("RUNNING INFERENCE")
+    print("="*70)
+    print()
+
+    rows = []
+    for i, example in enumerate(examples, 1):
+        notif = example["notification"]
+        expected = example["classification"]
+
+        generation = backend.generate(backend.build_prompt(notif))
+        predicted_folder, predicted_priority = fmt.parse(generation["text"])
+
+        latency = generation["latency_s"]
+        ttft = generation["ttft_s"]
+        rows.append({
+            "index": args.skip + i - 1,
+            "app": notif["app_display_name"],
+            "title": notif["title"][:80],
+            "expected_folder": expected["folder"],
+            "expected_priority": expected["priority"],
+            "predicted_folder": predicted_folder,
+            "predicted_priority": predicted_priority,
+            "parse_ok": predicted_folder is not None,
+            "folder_correct": predicted_folder == expected["folder"],
+            "priority_correct": predicted_priority == expected["priority"],
+            "prompt_tokens": generation["prompt_tokens"],
+            "prefill_tokens": generation["prefill_tokens"],
+            "new_tokens": generation["new_tokens"],
+            "latency_s": latency,
+            "ttft_s": ttft,
+            "latency_ms": latency * 1000,
+            "ttft_ms": ttft * 1000 if ttft is not None else None,
+            "tokens_per_sec": generation["new_tokens"] / latency if latency > 0 else None,
+            "prefill_tok_s": generation["prefill_tok_s"],
+            "decode_tok_s": generation["decode_tok_s"],
+            "peak_rss_mb": peak_rss_mb(),
+            "output": generation["text"][:200],
+            **{key: value for key, value in generation.items() if key.startswith("spec_")},
+        })
+
+        if i % 10 == 0:
+            print(f"Progress: {i}/{len(examples)} ({i/len(examples)*100:.0f}%)")
+
+    summary = summarize(rows)
+
+    results = {
+        "schema_version": SCHEMA_VERSION,
+        "benchmark": args.name or f"{args.backend}-{args.format}",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "command": "python " + " ".join([Path(sys.argv[0]).as_posix()] + sys.argv[1:]),
+        "backend": backend.describe(),
+        "format": args.format,
+        "test_file": args.test_file,
+        "skip": args.skip,
+        "sample_size": args.sample_size,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+        },
+        "summary": summary,
+        "examples": rows,
+    }
+
+    # Results
+    total = summary["total"]
+    print()
+    print("="*70)
+    print("RESULTS")
+    print("="*70)
+    print()
+    print(f"Total examples:     {total}")
+    print(f"Folder accuracy:    {summary['folder_accuracy']*100:.1f}%")
+    print(f"Priority accuracy:  {summary['priority_accuracy']*100:.1f}%")
+    print(f"Parse failures:     {summary['parse_failure_rate']*100:.1f}%")
+    if summary["mean_latency_ms"] is not None:
+        print(f"Mean latency:       {summary['mean_latency_ms']:.1f} ms")
+    if summary["mean_ttft_ms"] is not None:
+        print(f"Mean TTFT:          {summary['mean_ttft_ms']:.1f} ms")
+    if summary["mean_tokens_per_sec"] is not None:
+        print(f"Mean tokens/sec:    {summary['mean_tokens_per_sec']:.2f}")
+    if summary["peak_rss_mb"] is not None:
+        print(f"Peak RSS:           {summary['peak_rss_mb']:.0f} MB")
+    spec = summary["speculative"]
+    if spec is not None:
+        print(f"Draft acceptance:   {spec['acceptance_rate']*100:.1f}% "
+              f"({spec['accepted_tokens']}/{spec['proposed_tokens']} tokens)")
+        print(f"Tokens per forward: {spec['tokens_per_forward']:.2f}")
+    print()
+    print_timing_summary(summary["timing"])
+    print()
+
+    if args.name:
+        out_dir = BENCHMARKS_DIR / args.name
+        out_dir.mkdir(parents=True, exist_ok=True)
+        output_path = out_dir / "results.json"
+        readme_path = out_dir / "README.md"
+        if not readme_path.exists():
+            readme_path.write_text(render_readme(results), encoding="utf-8")
+            print(f"README generated: {readme_path}")
+    else:
+        output_path = Path(args.output) if args.output else REPO_ROOT / "benchmark_results.json"
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    print(f"Results saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Semantic cache sweep: hit rate, precision and lookup cost per similarity threshold.
+
+Replays the dataset in file order through scripts/notif_service.py,
+once with the exact cache alone and once per threshold with the
+semantic near-duplicate tier (scripts/semantic_cache.py) behind it.
+The dataset labels play the model; with --model-results (a
+benchmarks/run.py results.json) the model's own predictions do, for
+the rows it covered, and its mean latency is the cost of a full LLM
+call that each semantic hit saves.
+
+Writes benchmarks/<name>/ with results.json and README.md.
+
+Usage:
+    python benchmarks/semantic_cache_sweep.py --name 010-semantic-cache
+
+    # Precision against a model's labels, savings against its latency
+    python benchmarks/semantic_cache_sweep.py --model-results benchmarks/006-finetune-qwen3-notif/results.json
+
+    # A sentence-transformers encoder instead of hashed n-grams
+    python benchmarks/semantic_cache_sweep.py --encoder paraphrase-multilingual-MiniLM-L12-v2
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARKS_DIR.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import notif_service
+from semantic_cache import SemanticCache, make_encoder
+
+DATA_FILE = REPO_ROOT / "data" / "training_data_full_3level.jsonl"
+THRESHOLDS = [0.97, 0.95, 0.93, 0.9, 0.85]
+
+
+def load_model_results(path):
+    """({row index: (folder, priority)} of parsed predictions, mean latency ms) from a run.py results.json."""
+    results = json.loads(Path(path).read_text(encoding="utf-8"))
+    labels = {
+        r["index"]: (r["predicted_folder"], r["predicted_priority"])
+        for r in results["examples"] if r["predicted_folder"] is not None
+    }
+    return labels, results["summary"].get("mean_latency_ms")
+
+
+def sweep_row(threshold, report, llm_ms):
+    semantic = report.get("semantic")
+    total = report["total"]
+    row = {
+        "threshold": threshold,
+        "skipped_rate": report["skipped_rate"],
+        "exact_hit_rate": report["cache"]["hits"] / total if total else 0.0,
+        "semantic_hit_rate": report["semantic_answers"] / total if semantic and total else None,
+        "semantic_precision": report.get("semantic_agreement"),
+        "semantic_folder_precision": report.get("semantic_folder_agreement"),
+        "lookup_us": semantic["mean_lookup_us"] if semantic else None,
+        "entries": semantic["entries"] if semantic else report["cache"]["entries"],
+        "saved_ms_per_notification": None,
+    }
+    if semantic and llm_ms is not None and total:
+        # Semantic hits skip an LLM call; every exact miss pays one lookup
+        row["saved_ms_per_notification"] = (
+            report["semantic_answers"] * llm_ms - semantic["lookups"] * semantic["mean_lookup_us"] / 1000
+        ) / total
+    return row
+
+
+def num(value, fmt):
+    return format(value, fmt) if value is not None else "-"
+
+
+def pct(value):
+    return f"{value*100:.1f}%" if value is not None else "-"
+
+
+def render_table(rows):
+    lines = [
+        "| 阈值 | 跳过模型 | 精确命中 | 语义命中 | 语义精度 (两项) | 语义精度 (文件夹) | 查找 (µs) | 节省 (ms/条) |",
+        "|------|----------|----------|----------|-----------------|-------------------|-----------|--------------|",
+    ]
+    for r in rows:
+        lines.append(
+            f"| {num(r['threshold'], '.2f') if r['threshold'] is not None else '仅精确缓存'} | "
+            f"{pct(r['skipped_rate'])} | {pct(r['exact_hit_rate'])} | {pct(r['semantic_hit_rate'])} | "
+            f"{pct(r['semantic_precision'])} | {pct(r['semantic_folder_precision'])} | "
+            f"{num(r['lookup_us'], '.0f')} | {num(r['saved_ms_per_notification'], '.1f')} |"
+        )
+    return lines
+
+
+def render_readme(results):
+    labels = f"模型预测 (`{results['model_results']}`)" if results["model_results"] else "数据集标注"
+    llm = f"{results['llm_ms']:.1f} ms" if results["llm_ms"] is not None else "未提供 (--model-results 或 --llm-ms)"
+    lines = [
+        f"# 基准测试 {results['benchmark']}: 语义近重复缓存",
+        "",
+        f"**日期:** {results['created'][:10]}",
+        f"**数据:** `{results['data_file']}` ({results['total']} 条通知, 按文件顺序回放, 每分钟 {results['rate']:.0f} 条)",
+        f"**标签来源:** {labels}",
+        f"**编码器:** {results['encoder']} | **索引:** {results['index']}",
+        f"**缓存:** 容量 {results['capacity']}, TTL {results['ttl']:.0f} 秒",
+        f"**单次 LLM 调用:** {llm}",
+        "",
+        "## 结果",
+        "",
+        *render_table(results["rows"]),
+        "",
+        "语义精度是语义层给出的标签与该通知自身标签一致的比例。"
+        "节省 = 语义命中省下的 LLM 调用时间减去所有精确缓存未命中时的查找开销, 按每条通知平均。",
+        "",
+        "## 复现",
+        "",
+        "```bash",
+        results["command"],
+        "```",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hit rate / precision / cost sweep for the semantic cache tier")
+    parser.add_argument("--data-file", type=Path, default=DATA_FILE, help="Dataset replayed in file order")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=THRESHOLDS)
+    parser.add_argument("--capacity", type=int, default=notif_service.DEFAULT_CAPACITY)
+    parser.add_argument("--ttl", type=float, default=notif_service.DEFAULT_TTL)
+    parser.add_argument("--rate", type=float, default=60.0, help="Simulated notifications per minute")
+    parser.add_argument("--encoder", default="hashing",
+                        help="'hashing' or a sentence-transformers model name")
+    parser.add_argument("--index", choices=["auto", "hnsw", "exact"], default="auto")
+    parser.add_argument("--model-results", type=Path,
+                        help="benchmarks/run.py results.json: its predictions are the labels, "
+                             "its mean latency the LLM cost (replays only the rows it covers)")
+    parser.add_argument("--llm-ms", type=float, help="Cost of one LLM call in ms (overrides --model-results)")
+    parser.add_argument("--name", default="semantic-cache", help="Output folder under benchmarks/")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    labels, llm_ms = None, None
+    if args.model_results:
+        labels, llm_ms = load_model_results(args.model_results)
+        print(f"Model labels: {len(labels)} rows from {args.model_results}")
+    if args.llm_ms is not None:
+        llm_ms = args.llm_ms
+
+    encoder = make_encoder(args.encoder)
+    rows = []
+    index_kind = None
+    for threshold in [None] + args.thresholds:
+        semantic = None
+        if threshold is not None:
+            semantic = SemanticCache(encoder, threshold, args.capacity, args.index, ttl=args.ttl)
+            index_kind = semantic.index.kind
+        print(f"Replaying {'exact cache only' if threshold is None else f'threshold {threshold}'}...")
+        report = notif_service.replay([args.data_file], args.capacity, args.ttl, args.rate, semantic, labels)
+        rows.append(sweep_row(threshold, report, llm_ms))
+
+    results = {
+        "benchmark": args.name,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "command": "python " + " ".join([Path(sys.argv[0]).as_posix()] + sys.argv[1:]),
+        "data_file": str(args.data_file),
+        "total": report["total"],
+        "rate": args.rate,
+        "capacity": args.capacity,
+        "ttl": args.ttl,
+        "encoder": encoder.name,
+        "index": index_kind,
+        "model_results": str(args.model_results) if args.model_results else None,
+        "llm_ms": llm_ms,
+        "rows": rows,
+    }
+
+    print()
+    print("=" * 70)
+    print("RESULTS")
+    print("=" * 70)
+    print(f"\n{'Threshold':<10} {'Skipped':>8} {'Exact':>7} {'Semantic':>9} {'Prec':>7} {'Folder':>7} "
+          f"{'Look us':>8} {'Saved ms':>9}")
+    for r in rows:
+        print(f"{num(r['threshold'], '.2f') if r['threshold'] is not None else 'exact':<10} "
+              f"{pct(r['skipped_rate']):>8} {pct(r['exact_hit_rate']):>7} {pct(r['semantic_hit_rate']):>9} "
+              f"{pct(r['semantic_precision']):>7} {pct(r['semantic_folder_precision']):>7} "
+              f"{num(r['lookup_us'], '.0f'):>8} {num(r['saved_ms_per_notification'], '.1f'):>9}")
+
+    out_dir = BENCHMARKS_DIR / args.name
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / "results.json", 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    (out_dir / "README.md").write_text(render_readme(results), encoding="utf-8")
+    print(f"\nResults saved to: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
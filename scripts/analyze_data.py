@@ -1,57 +1,32 @@
 #!/usr/bin/env python3
 """Analyze the quality and distribution of synthetic notification data."""
 
+import argparse
 import json
 import sys
+from collections import Counter
 from pathlib import Path
-from collections import Counter, defaultdict
+
+from dataset_stats import build_report, int_keys
 
 def analyze_dataset(filepath: Path):
     """Analyze the dataset for quality metrics."""
+    render(build_report([filepath]))
+
+def render(report):
+    """Print the quality analysis from a dataset_stats report."""
+    folder_counts = Counter(report["folders"])
+    priority_counts = int_keys(report["priorities"])
+    app_counts = Counter(report["app_packages"])
+    folder_priority = {folder: int_keys(counts) for folder, counts in report["folder_priorities"].items()}
+
+    total = report["total"]
+    title_lengths = report["lengths"]["title"]
+    body_lengths = report["lengths"]["body"]
+    has_cjk = report["cjk"]
 
-    folder_counts = Counter()
-    priority_counts = Counter()
-    app_counts = Counter()
-    folder_priority = defaultdict(lambda: Counter())
-
-    total = 0
-    title_lengths = []
-    body_lengths = []
-    has_cjk = 0
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                entry = json.loads(line)
-                total += 1
-
-                # Extract fields
-                folder = entry["classification"]["folder"]
-                priority = entry["classification"]["priority"]
-                app = entry["notification"]["app"]
-                title = entry["notification"]["title"]
-                body = entry["notification"]["body"]
-
-                # Count distributions
-                folder_counts[folder] += 1
-                priority_counts[priority] += 1
-                app_counts[app] += 1
-                folder_priority[folder][priority] += 1
-
-                # Analyze text
-                title_lengths.append(len(title))
-                body_lengths.append(len(body))
-
-                # Check for CJK characters
-                if any('\u4e00' <= c <= '\u9fff' or '\u3040' <= c <= '\u30ff' for c in title + body):
-                    has_cjk += 1
-
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error on line {line_num}: {e}")
+    for error in report["errors"]:
+        print(f"Error on line {error['line']}: {error['message']}")
 
     # Print analysis
     print("=" * 60)
@@ -84,17 +59,15 @@ def analyze_dataset(filepath: Path):
             print(f"  Priority {priority}: {count:4} ({pct:5.1f}%)")
 
     print(f"\n--- Text Statistics ---")
-    if title_lengths:
-        avg_title = sum(title_lengths) / len(title_lengths)
-        print(f"Avg title length: {avg_title:.1f} chars")
-        print(f"Min title length: {min(title_lengths)} chars")
-        print(f"Max title length: {max(title_lengths)} chars")
-
-    if body_lengths:
-        avg_body = sum(body_lengths) / len(body_lengths)
-        print(f"Avg body length:  {avg_body:.1f} chars")
-        print(f"Min body length:  {min(body_lengths)} chars")
-        print(f"Max body length:  {max(body_lengths)} chars")
+    if title_lengths["count"]:
+        print(f"Avg title length: {title_lengths['mean']:.1f} chars")
+        print(f"Min title length: {title_lengths['min']} chars")
+        print(f"Max title length: {title_lengths['max']} chars")
+
+    if body_lengths["count"]:
+        print(f"Avg body length:  {body_lengths['mean']:.1f} chars")
+        print(f"Min body length:  {body_lengths['min']} chars")
+        print(f"Max body length:  {body_lengths['max']} chars")
 
     cjk_pct = (has_cjk / total) * 100 if total > 0 else 0
     print(f"\nEntries with CJK: {has_cjk} ({cjk_pct:.1f}%)")
@@ -129,11 +102,21 @@ def analyze_dataset(filepath: Path):
     print("\n" + "=" * 60)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Analyze a notification dataset")
+    parser.add_argument("file", nargs="?", help="JSONL file to analyze")
+    parser.add_argument("--report", help="Render from a report written by dataset_stats.py instead")
+    args = parser.parse_args()
+
+    if args.report:
+        with open(args.report, 'r', encoding='utf-8') as f:
+            render(json.load(f))
+        sys.exit(0)
+
+    if not args.file:
         print("Usage: python analyze_data.py <file.jsonl>")
         sys.exit(1)
 
-    filepath = Path(sys.argv[1])
+    filepath = Path(args.file)
     if not filepath.exists():
         print(f"File not found: {filepath}")
         sys.exit(1)
@@ -6,19 +6,20 @@ Analyze priority prediction errors.
 import os
 os.environ["TORCHDYNAMO_DISABLE"] = "1"
 
-import json
 import re
 import torch
 from pathlib import Path
 from transformers import AutoTokenizer, AutoModelForCausalLM
 from peft import PeftModel
 from collections import Counter
+from notif_index import read_rows
 
 # Configuration
 BASE_MODEL = str(Path(__file__).parent.parent / "models" / "functiongemma-270m")
 FINETUNED_MODEL = str(Path(__file__).parent.parent / "functiongemma-finetuned-notif")
 TEST_FILE = Path(__file__).parent.parent / "training_data.jsonl"
 TEST_SIZE = 100
+TRAIN_SIZE = 6000  # Leading rows used for training
 
 # Tool definition
 def classify_notification(app_name: str, title: str, body: str, folder: str = None, priority: int = None):
@@ -83,13 +84,7 @@ def main():
     model.eval()
 
     # Load test data
-    examples = []
-    with open(TEST_FILE, 'r', encoding='utf-8') as f:
-        for i, line in enumerate(f):
-            if i >= 6000:  # Skip training data
-                examples.append(json.loads(line))
-            if len(examples) >= TEST_SIZE:
-                break
+    examples = read_rows(TEST_FILE, TRAIN_SIZE, TRAIN_SIZE + TEST_SIZE)  # Seek past training data
 
     print(f"Testing on {len(examples)} examples\n")
 
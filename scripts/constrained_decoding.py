@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Constrained decoding for notification classification.
+
+The only valid outputs are a fixed scaffold around a folder name and a
+priority digit, so every complete answer is enumerated up front and
+tokenized into a trie. Decoding walks the trie:
+
+- TrieLogitsProcessor masks generate() logits to the trie children, so
+  it works with any existing generate() call, including batches.
+- constrained_generate() skips the forward pass for every forced
+  scaffold token and only runs the model where the trie branches
+  (folder, priority), so decode cost no longer depends on the
+  notification length and the output always parses.
+"""
+
+import torch
+from transformers import LogitsProcessor
+
+FOLDERS = ["Work", "Personal", "Promotions", "Alerts"]
+PRIORITIES_5LEVEL = [1, 2, 3, 4, 5]
+PRIORITIES_3LEVEL = [1, 2, 3]
+
+
+def functiongemma_candidates(priorities, folders=FOLDERS):
+    """All valid FunctionGemma calls, without echoing app_name/title/body."""
+    return [
+        "<start_function_call>call:classify_notification{"
+        f"folder:<escape>{folder}<escape>,priority:<escape>{priority}<escape>"
+        "}<end_function_call>"
+        for folder in folders
+        for priority in priorities
+    ]
+
+
+def json_candidates(priorities, folders=FOLDERS):
+    """All valid JSON answers for the Qwen prompts."""
+    return [
+        f'{{"folder": "{folder}", "priority": {priority}}}'
+        for folder in folders
+        for priority in priorities
+    ]
+
+
+class TokenTrie:
+    """Prefix tree over the token ids of every valid answer."""
+
+    def __init__(self, sequences):
+        self.root = {}
+        leaves = []
+        for seq in sequences:
+            node = self.root
+            for token_id in seq:
+                node = node.setdefault(token_id, {})
+            leaves.append(node)
+
+        # A complete answer must be a leaf, otherwise the decoder can't tell when to stop
+        if any(leaf for leaf in leaves):
+            raise ValueError("A candidate answer is a prefix of another candidate")
+
+    @classmethod
+    def from_strings(cls, tokenizer, strings):
+        sequences = [tokenizer(s, add_special_tokens=False)["input_ids"] for s in strings]
+        return cls(sequences)
+
+    def node(self, prefix):
+        """Return the trie node reached by prefix, or None if prefix left the trie."""
+        node = self.root
+        for token_id in prefix:
+            node = node.get(token_id)
+            if node is None:
+                return None
+        return node
+
+
+class TrieLogitsProcessor(LogitsProcessor):
+    """
+    Restrict generate() to the trie.
+
+    prompt_len is the (padded) prompt width; everything after it in
+    input_ids is treated as the constrained answer. Once a row completes
+    an answer only eos is allowed, so generate() stops that row.
+    """
+
+    def __init__(self, trie, prompt_len, eos_token_id):
+        self.trie = trie
+        self.prompt_len = prompt_len
+        self.eos_token_id = eos_token_id
+
+    def __call__(self, input_ids, scores):
+        mask = torch.full_like(scores, float("-inf"))
+        for row in range(input_ids.shape[0]):
+            node = self.trie.node(input_ids[row, self.prompt_len:].tolist())
+            allowed = list(node) if node else [self.eos_token_id]
+            mask[row, allowed] = 0
+        return scores + mask
+
+
+def constrained_generate(model, input_ids, trie, past_key_values=None, streamer=None):
+    """
+    Greedy decode a single prompt through the trie.
+
+    Runs of forced tokens are appended without a forward pass of their
+    own: they are fed together with the next chunk, so the model runs
+    once per branch point. past_key_values may cover a prefix of
+    input_ids (e.g. a cached system prompt). streamer gets the same
+    put()/end() calls as in generate(), one put() per forward pass.
+
+    Returns (answer_token_ids, forward_passes).
+    """
+    cached = past_key_values.get_seq_length() if past_key_values is not None else 0
+    pending = input_ids[:, cached:]
+    node = trie.root
+    generated = []
+    forward_passes = 0
+
+    if streamer is not None:
+        streamer.put(input_ids.cpu())
+
+    while True:
+        # Jump forward over scaffold tokens with a single continuation
+        forced = []
+        while len(node) == 1:
+            token_id, node = next(iter(node.items()))
+            forced.append(token_id)
+        generated.extend(forced)
+
+        if not node:
+            if streamer is not None and forced:
+                streamer.put(torch.tensor(forced))
+            break
+
+        if forced:
+            forced_ids = torch.tensor([forced], dtype=pending.dtype, device=pending.device)
+            pending = torch.cat([pending, forced_ids], dim=1)
+
+        with torch.no_grad():
+            outputs = model(input_ids=pending, past_key_values=past_key_values, use_cache=True)
+        forward_passes += 1
+        past_key_values = outputs.past_key_values
+
+        allowed = list(node)
+        logits = outputs.logits[0, -1, allowed]
+        token_id = allowed[int(torch.argmax(logits))]
+
+        generated.append(token_id)
+        node = node[token_id]
+        if streamer is not None:
+            streamer.put(torch.tensor(forced + [token_id]))
+        pending = torch.tensor([[token_id]], dtype=input_ids.dtype, device=input_ids.device)
+
+    if streamer is not None:
+        streamer.end()
+
+    return generated, forward_passes
@@ -7,11 +7,18 @@ This version uses 3-level priority system:
 - Priority 1: Low (can ignore/check later)
 - Priority 2: Medium (normal daily notifications)
 - Priority 3: High (requires immediate attention)
+
+--input also takes a .parquet copy made by notif_columnar.py.
+--target compact writes calls with only folder and priority to
+functiongemma_{train,test}_3level_compact.jsonl.
 """
 
+import argparse
 import json
 from pathlib import Path
 
+from notif_io import iter_json
+
 def classify_notification(app_name: str, title: str, body: str, folder: str = None, priority: int = None):
     """
     Classify a notification into a folder and priority level.
@@ -31,8 +38,14 @@ def classify_notification(app_name: str, title: str, body: str, folder: str = No
 # Tool definition for FunctionGemma
 TOOLS = [classify_notification]
 
-def convert_example(example):
-    """Convert a notification example to FunctionGemma format."""
+def convert_example(example, target="full"):
+    """
+    Convert a notification example to FunctionGemma format.
+
+    target="full" echoes app_name, title and body in the call before the
+    labels; target="compact" emits only folder and priority, so the model
+    decodes a handful of tokens instead of re-generating the notification.
+    """
     notif = example["notification"]
     classification = example["classification"]
 
@@ -45,7 +58,10 @@ Title: {notif['title']}
 Body: {notif['body']}"""
 
     # Expected function call
-    function_call = f"call:classify_notification{{app_name:<escape>{app_name}<escape>,title:<escape>{notif['title']}<escape>,body:<escape>{notif['body']}<escape>,folder:<escape>{classification['folder']}<escape>,priority:<escape>{classification['priority']}<escape>}}"
+    if target == "compact":
+        function_call = f"call:classify_notification{{folder:<escape>{classification['folder']}<escape>,priority:<escape>{classification['priority']}<escape>}}"
+    else:
+        function_call = f"call:classify_notification{{app_name:<escape>{app_name}<escape>,title:<escape>{notif['title']}<escape>,body:<escape>{notif['body']}<escape>,folder:<escape>{classification['folder']}<escape>,priority:<escape>{classification['priority']}<escape>}}"
 
     # Message format for training
     messages = [
@@ -59,10 +75,17 @@ Body: {notif['body']}"""
     }
 
 def main():
-    # Load training data (3-level priority remapped)
-    input_file = Path(__file__).parent.parent / "training_data_3level.jsonl"
-    train_file = Path(__file__).parent.parent / "functiongemma_train_3level.jsonl"
-    test_file = Path(__file__).parent.parent / "functiongemma_test_3level.jsonl"
+    parser = argparse.ArgumentParser(description="Convert and split the 3-level dataset for FunctionGemma")
+    parser.add_argument("--input", type=Path, default=Path(__file__).parent.parent / "training_data_3level.jsonl",
+                        help="JSONL or Parquet dataset (3-level priority remapped)")
+    parser.add_argument("--target", choices=["full", "compact"], default="full",
+                        help="full: echo app_name/title/body in the call; compact: folder and priority only")
+    args = parser.parse_args()
+
+    suffix = "_compact" if args.target == "compact" else ""
+    input_file = args.input
+    train_file = Path(__file__).parent.parent / f"functiongemma_train_3level{suffix}.jsonl"
+    test_file = Path(__file__).parent.parent / f"functiongemma_test_3level{suffix}.jsonl"
 
     print("="*70)
     print("CONVERT TO FUNCTIONGEMMA FORMAT (3-LEVEL PRIORITY)")
@@ -71,10 +94,7 @@ def main():
 
     print(f"Loading data from {input_file}...")
 
-    examples = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            examples.append(json.loads(line))
+    examples = [example for _, _, example in iter_json(input_file)]
 
     print(f"Loaded {len(examples)} examples")
 
@@ -94,7 +114,7 @@ def main():
         if i % 1000 == 0 and i > 0:
             print(f"  Processed {i}/{len(train_examples)}...")
         try:
-            train_converted.append(convert_example(example))
+            train_converted.append(convert_example(example, args.target))
         except Exception as e:
             print(f"Error on example {i}: {e}")
             print(f"Example: {example}")
@@ -105,7 +125,7 @@ def main():
     test_converted = []
     for i, example in enumerate(test_examples):
         try:
-            test_converted.append(convert_example(example))
+            test_converted.append(convert_example(example, args.target))
         except Exception as e:
             print(f"Error on example {i}: {e}")
             raise
@@ -2,8 +2,12 @@
 """
 Convert notification dataset to official FunctionGemma format.
 Uses apply_chat_template with tools parameter as per Google's documentation.
+
+--target compact writes calls with only folder and priority to
+functiongemma_train_compact.jsonl.
 """
 
+import argparse
 import json
 from pathlib import Path
 
@@ -26,8 +30,14 @@ def classify_notification(app_name: str, title: str, body: str, folder: str = No
 # Tool definition for FunctionGemma
 TOOLS = [classify_notification]
 
-def convert_example(example):
-    """Convert a notification example to FunctionGemma format."""
+def convert_example(example, target="full"):
+    """
+    Convert a notification example to FunctionGemma format.
+
+    target="full" echoes app_name, title and body in the call before the
+    labels; target="compact" emits only folder and priority, so the model
+    decodes a handful of tokens instead of re-generating the notification.
+    """
     notif = example["notification"]
     classification = example["classification"]
 
@@ -40,7 +50,10 @@ Title: {notif['title']}
 Body: {notif['body']}"""
 
     # Expected function call
-    function_call = f"call:classify_notification{{app_name:<escape>{app_name}<escape>,title:<escape>{notif['title']}<escape>,body:<escape>{notif['body']}<escape>,folder:<escape>{classification['folder']}<escape>,priority:<escape>{classification['priority']}<escape>}}"
+    if target == "compact":
+        function_call = f"call:classify_notification{{folder:<escape>{classification['folder']}<escape>,priority:<escape>{classification['priority']}<escape>}}"
+    else:
+        function_call = f"call:classify_notification{{app_name:<escape>{app_name}<escape>,title:<escape>{notif['title']}<escape>,body:<escape>{notif['body']}<escape>,folder:<escape>{classification['folder']}<escape>,priority:<escape>{classification['priority']}<escape>}}"
 
     # Message format for training
     messages = [
@@ -54,9 +67,15 @@ Body: {notif['body']}"""
     }
 
 def main():
+    parser = argparse.ArgumentParser(description="Convert the dataset for FunctionGemma")
+    parser.add_argument("--target", choices=["full", "compact"], default="full",
+                        help="full: echo app_name/title/body in the call; compact: folder and priority only")
+    args = parser.parse_args()
+
     # Load training data
     input_file = Path(__file__).parent.parent / "training_data.jsonl"
-    output_file = Path(__file__).parent.parent / "functiongemma_train.jsonl"
+    suffix = "_compact" if args.target == "compact" else ""
+    output_file = Path(__file__).parent.parent / f"functiongemma_train{suffix}.jsonl"
 
     print(f"Loading data from {input_file}...")
 
@@ -78,7 +97,7 @@ def main():
         if i % 1000 == 0:
             print(f"  Processed {i}/{len(examples)}...")
         try:
-            converted.append(convert_example(example))
+            converted.append(convert_example(example, args.target))
         except Exception as e:
             print(f"Error on example {i}: {e}")
             print(f"Example: {example}")
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Single-pass stats engine for the notification datasets.
+
+Aggregators register once with a StatsEngine and all of them see every
+record in one scan. Files can be scanned in parallel; each worker fills
+its own copy of the aggregators and the copies are merged. The result is
+one JSON report that analyze_stats.py, detailed_stats.py,
+analyze_data.py and visualize_distributions.py render from, so the data
+is read once instead of once per view.
+
+Usage:
+    # Build the report once
+    python dataset_stats.py data/raw --workers 8 --output stats.json
+
+    # Render any view from it without re-reading the data
+    python detailed_stats.py --report stats.json
+"""
+
+import argparse
+import copy
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from notif_io import LengthStats, iter_records, jsonl_files
+
+REPORT_VERSION = 1
+DEFAULT_DATA_DIR = r"E:\projects\notif\data"
+
+# CJK regex pattern (Han, Extension A, Hiragana, Katakana)
+CJK_PATTERN = re.compile(r'[\u4e00-\u9fff\u3400-\u4dbf\u3040-\u309f\u30a0-\u30ff]')
+
+FIELDS = ("notification", "classification")
+
+
+def _key(value):
+    """JSON object keys are strings; missing values count as 'Unknown'."""
+    return "Unknown" if value is None else str(value)
+
+
+class Aggregator:
+    """One statistic over the record stream. Subclasses fill add/merge/to_json."""
+
+    name = None
+
+    def add(self, record):
+        raise NotImplementedError
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def to_json(self):
+        raise NotImplementedError
+
+
+class CountAggregator(Aggregator):
+    """Counter over one value per record."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def value(self, record):
+        raise NotImplementedError
+
+    def add(self, record):
+        self.counts[_key(self.value(record))] += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+
+    def to_json(self):
+        return dict(self.counts.most_common())
+
+
+class FolderCounts(CountAggregator):
+    name = "folders"
+
+    def value(self, record):
+        return record.classification.folder
+
+
+class PriorityCounts(CountAggregator):
+    name = "priorities"
+
+    def value(self, record):
+        return record.classification.priority
+
+
+class AppCounts(CountAggregator):
+    """Display name, falling back to the package name."""
+
+    name = "apps"
+
+    def value(self, record):
+        return record.notification.app_display_name or record.notification.app
+
+
+class AppPackageCounts(CountAggregator):
+    name = "app_packages"
+
+    def value(self, record):
+        return record.notification.app
+
+
+class FileCounts(CountAggregator):
+    name = "files"
+
+    def value(self, record):
+        return record.source
+
+
+class FolderPriorityCounts(Aggregator):
+    """Priority distribution within each folder."""
+
+    name = "folder_priorities"
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+
+    def add(self, record):
+        self.counts[_key(record.classification.folder)][_key(record.classification.priority)] += 1
+
+    def merge(self, other):
+        for folder, counts in other.counts.items():
+            self.counts[folder].update(counts)
+
+    def to_json(self):
+        return {folder: dict(sorted(counts.items())) for folder, counts in sorted(self.counts.items())}
+
+
+class CJKCount(Aggregator):
+    """Entries with CJK characters in the title or body."""
+
+    name = "cjk"
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, record):
+        if CJK_PATTERN.search(record.notification.title or '') or CJK_PATTERN.search(record.notification.body or ''):
+            self.count += 1
+
+    def merge(self, other):
+        self.count += other.count
+
+    def to_json(self):
+        return self.count
+
+
+class TextLengths(Aggregator):
+    """Title and body length summaries."""
+
+    name = "lengths"
+
+    def __init__(self):
+        self.title = LengthStats()
+        self.body = LengthStats()
+
+    def add(self, record):
+        self.title.add(len(record.notification.title or ''))
+        self.body.add(len(record.notification.body or ''))
+
+    def merge(self, other):
+        self.title.merge(other.title)
+        self.body.merge(other.body)
+
+    def to_json(self):
+        return {"title": self.title.to_json(), "body": self.body.to_json()}
+
+
+DEFAULT_AGGREGATORS = [
+    FolderCounts, PriorityCounts, AppCounts, AppPackageCounts, FileCounts,
+    FolderPriorityCounts, CJKCount, TextLengths,
+]
+
+
+class StatsEngine:
+    """Runs every registered aggregator over the records in one pass."""
+
+    def __init__(self, aggregators=()):
+        self.aggregators = {}
+        self.total = 0
+        self.errors = []
+        for aggregator in aggregators:
+            self.register(aggregator)
+
+    def register(self, aggregator):
+        if aggregator.name in self.aggregators:
+            raise ValueError(f"Aggregator already registered: {aggregator.name}")
+        self.aggregators[aggregator.name] = aggregator
+        return aggregator
+
+    def add(self, record):
+        self.total += 1
+        for aggregator in self.aggregators.values():
+            aggregator.add(record)
+
+    def scan(self, paths):
+        for record in iter_records(paths, fields=FIELDS, errors=self.errors):
+            self.add(record)
+        return self
+
+    def merge(self, other):
+        self.total += other.total
+        self.errors.extend(other.errors)
+        for name, aggregator in self.aggregators.items():
+            aggregator.merge(other.aggregators[name])
+        return self
+
+    def scan_parallel(self, paths, workers):
+        """Scan files on a process pool, one file per shard, and merge in file order."""
+        paths = [Path(p) for p in paths]
+        if workers <= 1 or len(paths) <= 1:
+            return self.scan(paths)
+
+        blank = copy.deepcopy(self)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard in executor.map(_scan_shard, [blank] * len(paths), paths):
+                self.merge(shard)
+        return self
+
+    def report(self, sources=()):
+        """JSON-ready report: totals, errors and one entry per aggregator."""
+        report = {
+            "version": REPORT_VERSION,
+            "sources": [str(p) for p in sources],
+            "total": self.total,
+            "errors": [{"source": e.source, "line": e.line_num, "message": e.message} for e in self.errors],
+        }
+        for name, aggregator in self.aggregators.items():
+            report[name] = aggregator.to_json()
+        return report
+
+
+def _scan_shard(engine, path):
+    return engine.scan([path])
+
+
+def resolve_paths(inputs):
+    """Expand directories to their .jsonl files; keep files as given."""
+    paths = []
+    for item in inputs:
+        item = Path(item)
+        paths.extend(jsonl_files(item) if item.is_dir() else [item])
+    return paths
+
+
+def build_report(inputs, workers=1, aggregators=None):
+    """Scan files/directories once with the default (or given) aggregators."""
+    paths = resolve_paths(inputs)
+    engine = StatsEngine(cls() for cls in (aggregators or DEFAULT_AGGREGATORS))
+    engine.scan_parallel(paths, workers)
+    return engine.report(paths)
+
+
+def add_scan_args(parser, default_inputs=(DEFAULT_DATA_DIR,)):
+    parser.add_argument("inputs", nargs="*", default=list(default_inputs),
+                        help="JSONL/Parquet files or directories of batch files")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel file shards when scanning")
+    return parser
+
+
+def add_report_args(parser, default_inputs=(DEFAULT_DATA_DIR,)):
+    """Common CLI for the views: data paths, or a prebuilt --report."""
+    add_scan_args(parser, default_inputs)
+    parser.add_argument("--report", help="Render from a report written by dataset_stats.py instead of scanning")
+    return parser
+
+
+def report_from_args(args):
+    if args.report:
+        with open(args.report, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return build_report(args.inputs, args.workers)
+
+
+def int_keys(counts):
+    """Undo the JSON string keys for numeric values (priorities)."""
+    return Counter({int(k) if k.isdigit() else k: v for k, v in counts.items()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the dataset stats report in one pass")
+    add_scan_args(parser)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    report = build_report(args.inputs, args.workers)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"{report['total']:,} entries from {len(report['sources'])} file(s) -> {args.output}")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
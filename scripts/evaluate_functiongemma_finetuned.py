@@ -1,23 +1,61 @@
 #!/usr/bin/env python3
 """
 Evaluate fine-tuned FunctionGemma on test set.
+
+Usage:
+    python evaluate_functiongemma_finetuned.py [--batch-size 16] [--constrained]
+
+    # Scoring classifier vs generate on the 3-level held-out set
+    python evaluate_functiongemma_finetuned.py --mode compare --priority-levels 3 \
+        --adapter functiongemma-finetuned-notif-3level \
+        --test-file data/functiongemma_test_3level.jsonl --skip 0 --test-size 2800
+
+    # Adapter trained on --target compact calls (folder and priority only)
+    python evaluate_functiongemma_finetuned.py --priority-levels 3 --target compact \
+        --adapter functiongemma-finetuned-notif-3level-compact \
+        --test-file data/functiongemma_test_3level_compact.jsonl --skip 0
+
+    # 200 random held-out rows (seeks via the .idx line index, no full scan)
+    python evaluate_functiongemma_finetuned.py --sample 200 --seed 1
+
+    # Prompt-lookup decoding vs plain greedy generate on the same prompts
+    python evaluate_functiongemma_finetuned.py --prompt-lookup --priority-levels 3 \
+        --adapter functiongemma-finetuned-notif-3level \
+        --test-file data/functiongemma_test_3level.jsonl --skip 0 --test-size 500
 """
 
 import os
 os.environ["TORCHDYNAMO_DISABLE"] = "1"
 
+import argparse
 import json
 import re
+import sys
+import time
 import torch
 from pathlib import Path
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, LogitsProcessorList
+from transformers.utils import get_json_schema
 from peft import PeftModel
+from constrained_decoding import (
+    FOLDERS, PRIORITIES_3LEVEL, PRIORITIES_5LEVEL, TokenTrie, TrieLogitsProcessor,
+    constrained_generate, functiongemma_candidates
+)
+from finetune_data import LengthBucketSampler, padding_report
+from inference_timing import TokenTimer, print_timing_summary, summarize_timings
+from notif_index import LineIndex
+from speculative import PromptLookupProposer, speculative_generate
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from formats import example_from_messages
 
 # Configuration
 BASE_MODEL = str(Path(__file__).parent.parent / "models" / "functiongemma-270m")
 FINETUNED_MODEL = str(Path(__file__).parent.parent / "functiongemma-finetuned-notif")
 TEST_FILE = Path(__file__).parent.parent / "training_data.jsonl"
 TEST_SIZE = 100
+MAX_NEW_TOKENS = 150
+END_FUNCTION_CALL = "<end_function_call>"
 
 # Tool definition
 def classify_notification(app_name: str, title: str, body: str, folder: str = None, priority: int = None):
@@ -38,6 +76,15 @@ def classify_notification(app_name: str, title: str, body: str, folder: str = No
 
 TOOLS = [classify_notification]
 
+def tools_for(priorities):
+    """Tool list matching the priority scale the adapter was trained on."""
+    if priorities == PRIORITIES_3LEVEL:
+        schema = get_json_schema(classify_notification)
+        schema["function"]["parameters"]["properties"]["priority"]["description"] = \
+            "Priority level from 1 (low) to 3 (high)"
+        return [schema]
+    return TOOLS
+
 def parse_function_call(text):
     """Parse function call from model output."""
     try:
@@ -64,85 +111,333 @@ def parse_function_call(text):
     except Exception as e:
         return None, None
 
-def main():
-    print("="*70)
-    print("EVALUATE FINE-TUNED FUNCTIONGEMMA")
-    print("="*70)
-    print()
+def format_function_call(folder, priority):
+    """Render a prediction in the same call format parse_function_call reads."""
+    return (
+        "<start_function_call>call:classify_notification{"
+        f"folder:<escape>{folder}<escape>,priority:<escape>{priority}<escape>"
+        "}<end_function_call>"
+    )
 
-    # Load model
-    print(f"Loading base model from {BASE_MODEL}...")
-    tokenizer = AutoTokenizer.from_pretrained(FINETUNED_MODEL)
+def expand_cache(past_key_values, n):
+    """Repeat a batch-1 KV cache n times along the batch dimension."""
+    if hasattr(past_key_values, "batch_repeat_interleave"):
+        past_key_values.batch_repeat_interleave(n)
+        return past_key_values
+    return tuple(tuple(t.repeat_interleave(n, dim=0) for t in layer) for layer in past_key_values)
 
-    base_model = AutoModelForCausalLM.from_pretrained(
-        BASE_MODEL,
-        torch_dtype=torch.bfloat16,
-        device_map="auto"
-    )
+class ScoringClassifier:
+    """
+    Classify by scoring every label instead of decoding.
 
-    print(f"Loading LoRA adapters from {FINETUNED_MODEL}...")
-    model = PeftModel.from_pretrained(base_model, FINETUNED_MODEL)
-    model.eval()
+    The prompt plus the call scaffold up to ``folder:<escape>`` is run
+    through the model once. Each (folder, priority) answer is then scored
+    as a batch of continuations on top of that shared prefix cache, and
+    the answer with the highest total log-probability wins. Nothing is
+    decoded autoregressively, so cost is two forward calls per example.
 
-    print(f"Model loaded on: {model.device}")
-    print()
+    With echo_fields=True the prefix also contains the app_name, title and
+    body arguments the fine-tuned model was trained to echo; they are
+    known, so they are teacher-forced instead of generated.
+    """
 
-    # Load test data
-    print(f"Loading test data from {TEST_FILE}...")
-    examples = []
-    with open(TEST_FILE, 'r', encoding='utf-8') as f:
-        for i, line in enumerate(f):
-            if i >= 6000:  # Skip training data
-                examples.append(json.loads(line))
-            if len(examples) >= TEST_SIZE:
-                break
+    def __init__(self, model, tokenizer, priorities=PRIORITIES_5LEVEL, folders=FOLDERS, echo_fields=True):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.echo_fields = echo_fields
+        self.labels = [(folder, priority) for folder in folders for priority in priorities]
 
-    print(f"Testing on {len(examples)} examples")
-    print()
-    print("="*70)
-    print("RUNNING INFERENCE")
-    print("="*70)
-    print()
+        continuations = [
+            tokenizer(f"{folder}<escape>,priority:<escape>{priority}<escape>", add_special_tokens=False)["input_ids"]
+            for folder, priority in self.labels
+        ]
+        width = max(len(ids) for ids in continuations)
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
 
-    # Test
-    correct_folder = 0
-    correct_priority = 0
-    parse_failures = 0
-    errors = []
+        self.cont_ids = torch.tensor(
+            [ids + [pad_id] * (width - len(ids)) for ids in continuations],
+            device=model.device
+        )
+        self.cont_mask = torch.tensor(
+            [[1] * len(ids) + [0] * (width - len(ids)) for ids in continuations],
+            device=model.device
+        )
 
-    for i, example in enumerate(examples, 1):
-        notif = example["notification"]
-        expected = example["classification"]
+    def answer_prefix(self, app_name, title, body):
+        """Fixed part of the model turn before the folder value."""
+        prefix = "<start_function_call>call:classify_notification{"
+        if self.echo_fields:
+            prefix += f"app_name:<escape>{app_name}<escape>,title:<escape>{title}<escape>,body:<escape>{body}<escape>,"
+        return prefix + "folder:<escape>"
+
+    def score(self, prompt, app_name, title, body):
+        """Total log-probability of each label, in self.labels order."""
+        text = prompt + self.answer_prefix(app_name, title, body)
+        prefix_ids = self.tokenizer(text, return_tensors="pt")["input_ids"].to(self.model.device)
+        n = len(self.labels)
+
+        with torch.no_grad():
+            prefix_out = self.model(input_ids=prefix_ids, use_cache=True)
+            cache = expand_cache(prefix_out.past_key_values, n)
+            attention_mask = torch.cat([
+                torch.ones(n, prefix_ids.shape[1], dtype=self.cont_mask.dtype, device=self.model.device),
+                self.cont_mask
+            ], dim=1)
+            cont_out = self.model(
+                input_ids=self.cont_ids,
+                attention_mask=attention_mask,
+                past_key_values=cache,
+                use_cache=False
+            )
+
+        # First label token is predicted at the answer position of the prefix
+        first = torch.log_softmax(prefix_out.logits[0, -1].float(), dim=-1)[self.cont_ids[:, 0]]
 
-        # Build user message
-        user_content = f"""App: {notif['app_display_name']}
+        # Remaining label tokens are predicted inside the candidate batch
+        logprobs = torch.log_softmax(cont_out.logits[:, :-1].float(), dim=-1)
+        rest = logprobs.gather(-1, self.cont_ids[:, 1:].unsqueeze(-1)).squeeze(-1)
+        rest = (rest * self.cont_mask[:, 1:]).sum(dim=1)
+
+        return first + rest
+
+    def classify(self, prompt, app_name, title, body):
+        """Return (folder, priority) with the highest score."""
+        scores = self.score(prompt, app_name, title, body)
+        return self.labels[int(torch.argmax(scores))]
+
+def load_examples(path, skip, size, sample=None, seed=0):
+    """
+    Load test examples from either dataset layout.
+
+    Seeks past the first skip rows (the training slice) through the
+    .idx line index, then takes the next size rows, or sample random
+    rows from the rest of the file when sample is given.
+    """
+    with LineIndex(path) as index:
+        if sample:
+            records = index.sample(sample, seed, start=skip)
+        else:
+            records = list(index.rows(skip, skip + size))
+    return [example_from_messages(record) if "messages" in record else record for record in records]
+
+def build_prompt(tokenizer, notif, tools=TOOLS):
+    """Render a notification through the chat template with tools."""
+    user_content = f"""App: {notif['app_display_name']}
 Title: {notif['title']}
 Body: {notif['body']}"""
 
-        messages = [
-            {"role": "user", "content": user_content}
-        ]
+    messages = [
+        {"role": "user", "content": user_content}
+    ]
 
-        # Apply chat template with tools
-        text = tokenizer.apply_chat_template(
-            messages,
-            tools=TOOLS,
-            tokenize=False,
-            add_generation_prompt=True
-        )
+    return tokenizer.apply_chat_template(
+        messages,
+        tools=tools,
+        tokenize=False,
+        add_generation_prompt=True
+    )
+
+def stop_token_ids(tokenizer):
+    """EOS plus <end_function_call>, so each row stops right after its call."""
+    stop_ids = [tokenizer.eos_token_id]
+    end_call_id = tokenizer.convert_tokens_to_ids(END_FUNCTION_CALL)
+    if end_call_id is not None and end_call_id != tokenizer.unk_token_id:
+        stop_ids.append(end_call_id)
+    return stop_ids
 
+def generate_serial(model, tokenizer, prompts, timings=None):
+    """Generate one example at a time (reference path); appends per-token timing to timings."""
+    stop_ids = stop_token_ids(tokenizer)
+    responses = []
+
+    for i, text in enumerate(prompts, 1):
         inputs = tokenizer(text, return_tensors="pt").to(model.device)
+        timer = TokenTimer()
 
         with torch.no_grad():
             outputs = model.generate(
                 **inputs,
-                max_new_tokens=150,
+                max_new_tokens=MAX_NEW_TOKENS,
                 do_sample=False,
                 pad_token_id=tokenizer.pad_token_id,
-                eos_token_id=tokenizer.eos_token_id,
+                eos_token_id=stop_ids,
+                streamer=timer,
             )
+        if timings is not None:
+            timings.append(timer.record())
+
+        responses.append(tokenizer.decode(outputs[0][inputs['input_ids'].shape[1]:], skip_special_tokens=False))
+
+        if i % 10 == 0:
+            print(f"Progress: {i}/{len(prompts)} ({i/len(prompts)*100:.0f}%)")
+
+    return responses
+
+def generate_constrained(model, tokenizer, prompts, trie, timings=None):
+    """Serial constrained decoding; only folder and priority are model decisions."""
+    responses = []
+    forward_passes = 0
 
-        response = tokenizer.decode(outputs[0][inputs['input_ids'].shape[1]:], skip_special_tokens=False)
+    for i, text in enumerate(prompts, 1):
+        input_ids = tokenizer(text, return_tensors="pt")["input_ids"].to(model.device)
+        timer = TokenTimer()
+        answer_ids, passes = constrained_generate(model, input_ids, trie, streamer=timer)
+        if timings is not None:
+            timings.append(timer.record())
+        forward_passes += passes
+        responses.append(tokenizer.decode(answer_ids, skip_special_tokens=False))
+
+        if i % 10 == 0:
+            print(f"Progress: {i}/{len(prompts)} ({i/len(prompts)*100:.0f}%)")
+
+    print(f"Decode forward passes: {forward_passes/len(prompts):.1f} per example")
+    return responses
+
+def generate_lookup(model, tokenizer, prompts, proposer, draft_tokens, timings=None):
+    """
+    Serial greedy decoding with prompt-lookup drafts verified by the model.
+
+    Returns (responses, counters) with forward_passes, proposed and accepted totals.
+    """
+    stop_ids = stop_token_ids(tokenizer)
+    responses = []
+    counters = {"forward_passes": 0, "proposed": 0, "accepted": 0}
+
+    for i, text in enumerate(prompts, 1):
+        input_ids = tokenizer(text, return_tensors="pt")["input_ids"].to(model.device)
+        timer = TokenTimer()
+        answer_ids, stats = speculative_generate(model, input_ids, proposer, MAX_NEW_TOKENS, stop_ids,
+                                                 k=draft_tokens, streamer=timer)
+        if timings is not None:
+            timings.append(timer.record())
+        for key in counters:
+            counters[key] += stats[key]
+        responses.append(tokenizer.decode(answer_ids, skip_special_tokens=False))
+
+        if i % 10 == 0:
+            print(f"Progress: {i}/{len(prompts)} ({i/len(prompts)*100:.0f}%)")
+
+    return responses, counters
+
+def decode_seconds(timings):
+    """Wall-clock spent after the first token, summed over examples."""
+    return sum(t["latency_s"] - t["ttft_s"] for t in timings if t["ttft_s"] is not None)
+
+def generate_scored(classifier, prompts, examples):
+    """Classify with ScoringClassifier, formatted as function calls."""
+    responses = []
+
+    for i, (text, example) in enumerate(zip(prompts, examples), 1):
+        notif = example["notification"]
+        folder, priority = classifier.classify(text, notif["app_display_name"], notif["title"], notif["body"])
+        responses.append(format_function_call(folder, priority))
+
+        if i % 10 == 0:
+            print(f"Progress: {i}/{len(prompts)} ({i/len(prompts)*100:.0f}%)")
+
+    return responses
+
+def generate_batched(model, tokenizer, prompts, batch_size, trie=None):
+    """
+    Generate in left-padded batches.
+
+    Prompts are sorted by token length (LengthBucketSampler without
+    shuffling) so each batch pads to a similar length, and responses are
+    returned in the original prompt order. With a trie, each row is
+    masked to the constrained answers.
+    """
+    stop_ids = stop_token_ids(tokenizer)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+
+    encoded = [tokenizer(text)["input_ids"] for text in prompts]
+    lengths = [len(ids) for ids in encoded]
+    batches = LengthBucketSampler(lengths, batch_size, num_buckets=1, shuffle=False).batches()
+    responses = [None] * len(prompts)
+
+    done = 0
+
+    for batch_idx in batches:
+        batch = tokenizer.pad(
+            {"input_ids": [encoded[idx] for idx in batch_idx]},
+            padding=True,
+            return_tensors="pt"
+        ).to(model.device)
+
+        prompt_len = batch["input_ids"].shape[1]
+
+        logits_processor = None
+        if trie is not None:
+            logits_processor = LogitsProcessorList([
+                TrieLogitsProcessor(trie, prompt_len, tokenizer.eos_token_id)
+            ])
+
+        with torch.no_grad():
+            outputs = model.generate(
+                **batch,
+                max_new_tokens=MAX_NEW_TOKENS,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+                eos_token_id=stop_ids,
+                logits_processor=logits_processor,
+            )
+
+        for row, idx in enumerate(batch_idx):
+            responses[idx] = tokenizer.decode(outputs[row][prompt_len:], skip_special_tokens=False)
+
+        done += len(batch_idx)
+        print(f"Progress: {done}/{len(prompts)} ({done/len(prompts)*100:.0f}%)")
+
+    if batches:
+        report = padding_report(lengths, batches, pad_to_multiple_of=1)
+        print(f"Prompt padding: {report['padding_ratio']*100:.1f}% of prefill tokens")
+
+    return responses
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate fine-tuned FunctionGemma")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Examples per generate call (1 = serial reference path)")
+    parser.add_argument("--check-serial", action="store_true",
+                        help="Also run the serial path and report rows whose parsed prediction differs")
+    parser.add_argument("--constrained", action="store_true",
+                        help="Constrain decoding to the folder enum and priority range")
+    parser.add_argument("--mode", choices=["generate", "score", "compare"], default="generate",
+                        help="generate (decode), score (one prefix pass + batched label scoring), "
+                             "or compare (run both and report latency/accuracy side by side)")
+    parser.add_argument("--no-echo", action="store_true",
+                        help="Score labels right after the call name instead of after the echoed fields")
+    parser.add_argument("--target", choices=["full", "compact"], default="full",
+                        help="Call format the adapter was trained on (compact implies --no-echo)")
+    parser.add_argument("--adapter", default=FINETUNED_MODEL, help="LoRA adapter directory")
+    parser.add_argument("--test-file", default=str(TEST_FILE),
+                        help="notification JSONL or functiongemma_*.jsonl messages file")
+    parser.add_argument("--skip", type=int, default=6000, help="Leading rows to skip (training slice)")
+    parser.add_argument("--test-size", type=int, default=TEST_SIZE)
+    parser.add_argument("--sample", type=int,
+                        help="Evaluate this many random rows after --skip instead of the first --test-size")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --sample")
+    parser.add_argument("--priority-levels", type=int, choices=[3, 5], default=5)
+    parser.add_argument("--prompt-lookup", action="store_true",
+                        help="Decode with prompt-lookup drafts and compare against plain greedy generate")
+    parser.add_argument("--lookup-ngram", type=int, default=3, help="Longest n-gram matched against the prompt")
+    parser.add_argument("--lookup-tokens", type=int, default=10, help="Max draft tokens verified per forward")
+    args = parser.parse_args()
+    if args.prompt_lookup and (args.batch_size > 1 or args.constrained):
+        parser.error("--prompt-lookup decodes one example at a time and without --constrained")
+    return args
+
+def score_responses(examples, responses):
+    """Compare parsed responses with the expected labels."""
+    correct_folder = 0
+    correct_priority = 0
+    parse_failures = 0
+    errors = []
+
+    for i, (example, response) in enumerate(zip(examples, responses), 1):
+        notif = example["notification"]
+        expected = example["classification"]
 
         # Parse
         predicted_folder, predicted_priority = parse_function_call(response)
@@ -172,9 +467,146 @@ Body: {notif['body']}"""
             if predicted_priority == expected["priority"]:
                 correct_priority += 1
 
-        # Progress
-        if i % 10 == 0:
-            print(f"Progress: {i}/{len(examples)} ({i/len(examples)*100:.0f}%)")
+    return correct_folder, correct_priority, parse_failures, errors
+
+def run_generate(args, model, tokenizer, prompts, priorities):
+    """Autoregressive path: serial, batched, constrained or prompt-lookup."""
+    trie = None
+    if args.constrained:
+        trie = TokenTrie.from_strings(tokenizer, functiongemma_candidates(priorities))
+        print(f"Constrained decoding: folder enum + priority {priorities[0]}-{priorities[-1]}")
+
+    # Per-token timing is only meaningful one prompt at a time
+    timings = []
+    lookup = None
+    start_time = time.perf_counter()
+    if args.prompt_lookup:
+        proposer = PromptLookupProposer(args.lookup_ngram)
+        print(f"Prompt-lookup decoding: {args.lookup_ngram}-gram matches, up to {args.lookup_tokens} tokens per forward")
+        responses, lookup = generate_lookup(model, tokenizer, prompts, proposer, args.lookup_tokens, timings)
+    elif args.batch_size > 1:
+        print(f"Batched generation: batch size {args.batch_size}, length-sorted, left-padded")
+        responses = generate_batched(model, tokenizer, prompts, args.batch_size, trie)
+    elif trie is not None:
+        responses = generate_constrained(model, tokenizer, prompts, trie, timings)
+    else:
+        responses = generate_serial(model, tokenizer, prompts, timings)
+    elapsed = time.perf_counter() - start_time
+
+    serial_mismatches = None
+    if args.check_serial and args.batch_size > 1:
+        print()
+        print("Re-running serial path for comparison...")
+        if trie is not None:
+            serial_responses = generate_constrained(model, tokenizer, prompts, trie)
+        else:
+            serial_responses = generate_serial(model, tokenizer, prompts)
+        serial_mismatches = sum(
+            1 for batched, serial in zip(responses, serial_responses)
+            if parse_function_call(batched) != parse_function_call(serial)
+        )
+
+    if lookup is not None:
+        print()
+        print("Re-running plain greedy generate for comparison...")
+        greedy_timings = []
+        greedy_start = time.perf_counter()
+        greedy_responses = generate_serial(model, tokenizer, prompts, greedy_timings)
+        greedy_elapsed = time.perf_counter() - greedy_start
+        new_tokens = sum(t["new_tokens"] for t in timings)
+        lookup_decode, greedy_decode = decode_seconds(timings), decode_seconds(greedy_timings)
+        lookup.update({
+            "max_ngram": args.lookup_ngram,
+            "draft_tokens": args.lookup_tokens,
+            "acceptance_rate": lookup["accepted"] / lookup["proposed"] if lookup["proposed"] else 0.0,
+            # Plain greedy generate() is 1.0
+            "tokens_per_step": new_tokens / lookup["forward_passes"] if lookup["forward_passes"] else 0.0,
+            "greedy_seconds": greedy_elapsed,
+            "lookup_seconds": elapsed,
+            "speedup": greedy_elapsed / elapsed if elapsed > 0 else 0.0,
+            "decode_speedup": greedy_decode / lookup_decode if lookup_decode > 0 else None,
+            "greedy_timing": summarize_timings(greedy_timings),
+            "mismatches": sum(
+                1 for spec, greedy in zip(responses, greedy_responses)
+                if parse_function_call(spec) != parse_function_call(greedy)
+            ),
+        })
+
+    timing = summarize_timings(timings) if timings else None
+    return responses, elapsed, serial_mismatches, timing, lookup
+
+def run_score(args, model, tokenizer, prompts, examples, priorities):
+    """Scoring path: one prefix pass + batched label scoring per example."""
+    classifier = ScoringClassifier(model, tokenizer, priorities,
+                                   echo_fields=not args.no_echo and args.target == "full")
+    print(f"Scoring {len(classifier.labels)} labels per example")
+
+    start_time = time.perf_counter()
+    responses = generate_scored(classifier, prompts, examples)
+    elapsed = time.perf_counter() - start_time
+
+    return responses, elapsed
+
+def main():
+    args = parse_args()
+    priorities = PRIORITIES_3LEVEL if args.priority_levels == 3 else PRIORITIES_5LEVEL
+
+    print("="*70)
+    print("EVALUATE FINE-TUNED FUNCTIONGEMMA")
+    print("="*70)
+    print()
+
+    # Load model
+    print(f"Loading base model from {BASE_MODEL}...")
+    tokenizer = AutoTokenizer.from_pretrained(args.adapter)
+
+    base_model = AutoModelForCausalLM.from_pretrained(
+        BASE_MODEL,
+        torch_dtype=torch.bfloat16,
+        device_map="auto"
+    )
+
+    print(f"Loading LoRA adapters from {args.adapter}...")
+    model = PeftModel.from_pretrained(base_model, args.adapter)
+    model.eval()
+
+    print(f"Model loaded on: {model.device}")
+    print()
+
+    # Load test data
+    print(f"Loading test data from {args.test_file}...")
+    examples = load_examples(args.test_file, args.skip, args.test_size, args.sample, args.seed)
+
+    print(f"Testing on {len(examples)} examples")
+    print()
+    print("="*70)
+    print("RUNNING INFERENCE")
+    print("="*70)
+    print()
+
+    tools = tools_for(priorities)
+    prompts = [build_prompt(tokenizer, example["notification"], tools) for example in examples]
+
+    # Each mode: (responses, elapsed seconds)
+    runs = {}
+    serial_mismatches = None
+    timing = None
+    lookup = None
+    if args.mode in ("generate", "compare"):
+        responses, elapsed, serial_mismatches, timing, lookup = run_generate(
+            args, model, tokenizer, prompts, priorities
+        )
+        runs["generate"] = (responses, elapsed)
+    if args.mode in ("score", "compare"):
+        if runs:
+            print()
+        runs["score"] = run_score(args, model, tokenizer, prompts, examples, priorities)
+
+    # The last mode run is the one reported in detail
+    mode = list(runs)[-1]
+    responses, elapsed = runs[mode]
+    examples_per_sec = len(examples) / elapsed if elapsed > 0 else 0.0
+    correct_folder, correct_priority, parse_failures, errors = score_responses(examples, responses)
 
     # Results
     total = len(examples)
@@ -183,12 +615,59 @@ Body: {notif['body']}"""
     print("RESULTS")
     print("="*70)
     print()
+    print(f"Mode:               {mode}")
     print(f"Total examples:     {total}")
     print(f"Folder accuracy:    {correct_folder}/{total} ({correct_folder/total*100:.1f}%)")
     print(f"Priority accuracy:  {correct_priority}/{total} ({correct_priority/total*100:.1f}%)")
     print(f"Parse failures:     {parse_failures}/{total} ({parse_failures/total*100:.1f}%)")
+    if mode == "generate":
+        print(f"Batch size:         {args.batch_size}")
+    print(f"Inference time:     {elapsed:.1f}s ({examples_per_sec:.2f} examples/sec)")
+    if serial_mismatches is not None:
+        print(f"Serial mismatches:  {serial_mismatches}/{total}")
     print()
 
+    if timing:
+        print(f"Per-token timing (generate, {'prompt-lookup' if lookup else 'serial'}):")
+        print_timing_summary(timing, indent="  ")
+        print()
+
+    if lookup:
+        print("PROMPT LOOKUP vs GREEDY")
+        print("-"*70)
+        print(f"  Accepted tokens per step: {lookup['tokens_per_step']:.2f} "
+              f"({lookup['accepted']}/{lookup['proposed']} draft tokens accepted, "
+              f"{lookup['acceptance_rate']*100:.1f}%)")
+        print(f"  Forward passes:           {lookup['forward_passes']/total:.1f} per example")
+        print(f"  Wall-clock speedup:       {lookup['speedup']:.2f}x "
+              f"({lookup['greedy_seconds']:.1f}s greedy -> {lookup['lookup_seconds']:.1f}s)")
+        if lookup["decode_speedup"] is not None:
+            print(f"  Decode speedup:           {lookup['decode_speedup']:.2f}x (time after the first token)")
+        print(f"  Prediction mismatches:    {lookup['mismatches']}/{total}")
+        print()
+
+    modes = {}
+    for name, (mode_responses, mode_elapsed) in runs.items():
+        mode_folder, mode_priority, mode_failures, _ = score_responses(examples, mode_responses)
+        modes[name] = {
+            "folder_accuracy": mode_folder / total,
+            "priority_accuracy": mode_priority / total,
+            "parse_failure_rate": mode_failures / total,
+            "inference_seconds": mode_elapsed,
+            "latency_ms": mode_elapsed / total * 1000,
+        }
+
+    if len(modes) > 1:
+        print("GENERATE vs SCORE")
+        print("-"*70)
+        print(f"  {'Mode':<10} {'Folder':>8} {'Priority':>9} {'Parse fail':>11} {'ms/example':>11}")
+        for name, stats in modes.items():
+            print(f"  {name:<10} {stats['folder_accuracy']*100:>7.1f}% {stats['priority_accuracy']*100:>8.1f}% "
+                  f"{stats['parse_failure_rate']*100:>10.1f}% {stats['latency_ms']:>11.1f}")
+        speedup = modes["generate"]["latency_ms"] / modes["score"]["latency_ms"] if modes["score"]["latency_ms"] else 0.0
+        print(f"  Scoring speedup: {speedup:.2f}x")
+        print()
+
     # Show errors
     if errors:
         print("Sample Errors (first 10):")
@@ -219,11 +698,23 @@ Body: {notif['body']}"""
 
     # Save results
     results = {
-        "model": FINETUNED_MODEL,
+        "model": args.adapter,
+        "test_file": args.test_file,
+        "sample": {"size": args.sample, "seed": args.seed, "skip": args.skip} if args.sample else None,
+        "mode": mode,
         "total": total,
         "folder_accuracy": correct_folder / total,
         "priority_accuracy": correct_priority / total,
         "parse_failure_rate": parse_failures / total,
+        "batch_size": args.batch_size,
+        "constrained": args.constrained,
+        "target": args.target,
+        "inference_seconds": elapsed,
+        "examples_per_sec": examples_per_sec,
+        "serial_mismatches": serial_mismatches,
+        "timing": timing,
+        "prompt_lookup": lookup,
+        "modes": modes,
         "errors": errors[:20]
     }
 
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Tokenization stage for the FunctionGemma fine-tune scripts.
+
+The fine-tune scripts used to run apply_chat_template and the tokenizer
+over every example on every run. tokenize_dataset() does it once and
+writes the result to disk as packed arrays:
+
+    .cache/tokenized/<data name>-<key>/
+        input_ids.npy   int32, every example's tokens back to back
+        labels.npy      int32, same layout
+        offsets.npy     int64, example i is [offsets[i], offsets[i+1])
+        meta.json       what the key was built from
+
+The key hashes the tokenizer, the chat template (plus tool schemas and
+max_length), the label mode and the data file's bytes. A run that only changes
+hyperparameters finds the same key and memory-maps the arrays instead
+of tokenizing; changing any of them builds a new entry.
+
+Labels default to completion-only: every token up to and including the
+model-turn header is IGNORE_INDEX, so the tool declaration and the
+notification text carry no loss. label_mode="full" trains on all tokens
+as the scripts originally did.
+
+Tokenizing a miss can use several worker processes. Each one loads the
+tokenizer from tokenizer.name_or_path, and shards come back in order.
+
+Packing: PackedDataset concatenates examples into rows of at most
+seq_len tokens (best-fit decreasing), with position_ids restarting at 0
+for every example and the first label of each example masked, so no
+loss is taken across a boundary. PackingCollator flattens each batch
+into a single row (like transformers' DataCollatorWithFlattening) and
+leaves out attention_mask. transformers only reads position_ids resets
+as separate sequences when the batch is one row and the attention is
+flash-attention (PACKED_ATTENTION); any other implementation attends
+across examples, so the fine-tune scripts refuse --pack without it.
+
+LengthBucketSampler batches rows of similar length together (training
+and the batched eval path), cutting the padding a random batch of short
+and long notifications would need; padding_report() measures it.
+
+Usage from a fine-tune script:
+
+    dataset = tokenize_dataset(TRAIN_FILE, tokenizer, TOOLS, workers=8)
+    trainer = Trainer(..., train_dataset=dataset, data_collator=DataCollatorForSeq2Seq(...))
+
+    # or packed
+    packed = PackedDataset(dataset, seq_len=1024)
+    trainer = Trainer(..., train_dataset=packed, data_collator=PackingCollator(tokenizer.pad_token_id))
+"""
+
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from notif_io import iter_json
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache" / "tokenized"
+MAX_LENGTH = 2048
+SHARD_SIZE = 256
+LABEL_MODES = ("completion", "full")
+PAD_TO_MULTIPLE_OF = 8
+IGNORE_INDEX = -100
+
+# Per-process state, set by _init_worker
+_worker = {}
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8") if isinstance(part, str) else part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def tokenizer_digest(tokenizer):
+    """Hash of everything that changes token ids: vocab, merges, normalizer, special tokens."""
+    if getattr(tokenizer, "is_fast", False):
+        body = tokenizer.backend_tokenizer.to_str()
+    else:
+        body = json.dumps(sorted(tokenizer.get_vocab().items()), ensure_ascii=False)
+    special = json.dumps(tokenizer.special_tokens_map, sort_keys=True, default=str)
+    return _digest(type(tokenizer).__name__, body, special, tokenizer.truncation_side)
+
+
+def tool_schemas(tools):
+    """JSON schemas for the tool functions, as apply_chat_template would build them."""
+    from transformers.utils import get_json_schema
+    return [tool if isinstance(tool, dict) else get_json_schema(tool) for tool in tools]
+
+
+def template_digest(tokenizer, schemas, max_length):
+    template = json.dumps(tokenizer.chat_template, sort_keys=True, default=str)
+    return _digest(template, json.dumps(schemas, sort_keys=True, ensure_ascii=False), str(max_length))
+
+
+def _tokenize(tokenizer, text, max_length):
+    return tokenizer(
+        text,
+        truncation=True,
+        max_length=max_length,
+        padding=False,  # Will pad in data collator
+        return_tensors=None
+    )["input_ids"]
+
+
+def encode_messages(tokenizer, messages, schemas, max_length=MAX_LENGTH, label_mode="completion"):
+    """
+    Render one conversation through the chat template; returns (input_ids, labels).
+
+    label_mode "completion" masks everything up to the start of the model
+    turn, so loss is only taken on the answer; "full" trains on every token.
+    """
+    text = tokenizer.apply_chat_template(
+        messages,
+        tools=schemas,
+        tokenize=False,
+        add_generation_prompt=False  # False because we include model response in messages
+    )
+    input_ids = _tokenize(tokenizer, text, max_length)
+    if label_mode == "full":
+        return input_ids, list(input_ids)
+
+    # The prompt is the conversation without the answer, up to the model-turn header
+    prompt = tokenizer.apply_chat_template(messages[:-1], tools=schemas, tokenize=False, add_generation_prompt=True)
+    if not text.startswith(prompt):
+        raise ValueError("Chat template does not render the prompt as a prefix of the full conversation")
+    prompt_ids = _tokenize(tokenizer, prompt, max_length)
+
+    # Tokens can merge across the boundary; mask only the ids both renderings share
+    boundary = next((i for i, (a, b) in enumerate(zip(input_ids, prompt_ids)) if a != b),
+                    min(len(input_ids), len(prompt_ids)))
+    return input_ids, [IGNORE_INDEX] * boundary + input_ids[boundary:]
+
+
+def _init_worker(tokenizer_path, schemas, max_length, label_mode):
+    from transformers import AutoTokenizer
+    _worker.update(tokenizer=AutoTokenizer.from_pretrained(tokenizer_path),
+                   schemas=schemas, max_length=max_length, label_mode=label_mode)
+
+
+def _encode_shard(shard):
+    return [encode_messages(_worker["tokenizer"], messages, _worker["schemas"], _worker["max_length"],
+                            _worker["label_mode"])
+            for messages in shard]
+
+
+def encode_all(conversations, tokenizer, schemas, max_length=MAX_LENGTH, workers=1, label_mode="completion"):
+    """Encode every conversation, in input order, on `workers` processes."""
+    if workers <= 1 or len(conversations) <= SHARD_SIZE:
+        return [encode_messages(tokenizer, messages, schemas, max_length, label_mode) for messages in conversations]
+
+    shards = [conversations[i:i + SHARD_SIZE] for i in range(0, len(conversations), SHARD_SIZE)]
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(tokenizer.name_or_path, schemas, max_length, label_mode)) as pool:
+        return list(itertools.chain.from_iterable(pool.imap(_encode_shard, shards)))
+
+
+def _write_cache(target, encoded, meta):
+    """Write the packed arrays into a temp dir, then rename it into place."""
+    lengths = np.fromiter((len(ids) for ids, _ in encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    total = int(offsets[-1])
+    input_ids = np.fromiter(itertools.chain.from_iterable(ids for ids, _ in encoded), dtype=np.int32, count=total)
+    labels = np.fromiter(itertools.chain.from_iterable(lab for _, lab in encoded), dtype=np.int32, count=total)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = Path(tempfile.mkdtemp(dir=target.parent, prefix=f".{target.name}."))
+    np.save(temp / "input_ids.npy", input_ids)
+    np.save(temp / "labels.npy", labels)
+    np.save(temp / "offsets.npy", offsets)
+    (temp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    try:
+        os.replace(temp, target)
+    except OSError:
+        # Another run wrote the same key first; its arrays are identical
+        shutil.rmtree(temp, ignore_errors=True)
+
+
+class TokenizedDataset:
+    """
+    Map-style dataset over a cache entry; the arrays are memory-mapped.
+
+    Items are the dicts DataCollatorForSeq2Seq expects: input_ids,
+    attention_mask and labels as lists.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.input_ids = np.load(self.path / "input_ids.npy", mmap_mode="r")
+        self.labels = np.load(self.path / "labels.npy", mmap_mode="r")
+        self.offsets = np.load(self.path / "offsets.npy")
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        input_ids = self.input_ids[start:end].tolist()
+        return {
+            "input_ids": input_ids,
+            "attention_mask": [1] * len(input_ids),
+            "labels": self.labels[start:end].tolist(),
+        }
+
+
+def cache_key(data_path, tokenizer, schemas, max_length=MAX_LENGTH, label_mode="completion"):
+    """(key, parts): the cache key and the hashes it was built from."""
+    parts = {
+        "version": CACHE_VERSION,
+        "label_mode": label_mode,
+        "tokenizer": tokenizer_digest(tokenizer),
+        "template": template_digest(tokenizer, schemas, max_length),
+        "data": file_digest(data_path),
+    }
+    key = _digest(*(f"{name}={value}" for name, value in sorted(parts.items())))[:24]
+    return key, parts
+
+
+def tokenize_dataset(data_path, tokenizer, tools, workers=1, cache_dir=DEFAULT_CACHE_DIR,
+                     max_length=MAX_LENGTH, rebuild=False, progress=True, label_mode="completion"):
+    """
+    TokenizedDataset for a messages JSONL (or Parquet) file, tokenizing
+    only when no cache entry matches the tokenizer, template, data and
+    label mode.
+    """
+    if label_mode not in LABEL_MODES:
+        raise ValueError(f"Unknown label mode: {label_mode}")
+    data_path = Path(data_path)
+    schemas = tool_schemas(tools)
+    key, parts = cache_key(data_path, tokenizer, schemas, max_length, label_mode)
+    target = Path(cache_dir) / f"{data_path.stem}-{key}"
+
+    if target.exists() and not rebuild:
+        if progress:
+            print(f"Tokenized cache hit: {target}")
+        return TokenizedDataset(target)
+    if target.exists():
+        shutil.rmtree(target)
+
+    conversations = [entry["messages"] for _, _, entry in iter_json(data_path)]
+    if progress:
+        print(f"Tokenizing {len(conversations)} examples with {workers} worker(s)...")
+    start = time.perf_counter()
+    encoded = encode_all(conversations, tokenizer, schemas, max_length, workers, label_mode)
+    elapsed = time.perf_counter() - start
+
+    meta = {
+        "source": str(data_path),
+        "key": key,
+        **parts,
+        "max_length": max_length,
+        "examples": len(encoded),
+        "tokens": sum(len(ids) for ids, _ in encoded),
+        "label_tokens": sum(sum(1 for t in labels if t != IGNORE_INDEX) for _, labels in encoded),
+        "tokenize_seconds": elapsed,
+        "workers": workers,
+    }
+    _write_cache(target, encoded, meta)
+    if progress:
+        print(f"Tokenized {meta['tokens']:,} tokens in {elapsed:.1f}s -> {target}")
+    return TokenizedDataset(target)
+
+
+# Attention implementations that split a flattened row at position_ids resets
+PACKED_ATTENTION = ("flash_attention_2", "flash_attention_3")
+
+
+def pack_examples(lengths, seq_len):
+    """
+    Best-fit decreasing: lists of example indices whose lengths sum to at
+    most seq_len. An example longer than seq_len gets a row of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: (-int(lengths[i]), i))
+    bins = []
+    by_space = defaultdict(list)  # room left -> bins with exactly that much room
+    for i in order:
+        n = int(lengths[i])
+        space = next((room for room in range(n, seq_len) if by_space.get(room)), None)
+        if space is None:
+            bins.append([i])
+            if n < seq_len:
+                by_space[seq_len - n].append(len(bins) - 1)
+            continue
+        b = by_space[space].pop()
+        bins[b].append(i)
+        if space > n:
+            by_space[space - n].append(b)
+    return bins
+
+
+class PackedDataset:
+    """Rows of several tokenized examples back to back, with per-example position_ids."""
+
+    def __init__(self, dataset, seq_len):
+        self.dataset = dataset
+        self.seq_len = seq_len
+        self.bins = pack_examples(dataset.lengths, seq_len)
+        self.lengths = np.array([sum(int(dataset.lengths[i]) for i in b) for b in self.bins], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.bins)
+
+    def __getitem__(self, i):
+        input_ids, labels, position_ids = [], [], []
+        for index in self.bins[i]:
+            item = self.dataset[index]
+            segment_labels = item["labels"]
+            # The previous example's last token must not be trained to predict this one's first
+            segment_labels[0] = IGNORE_INDEX
+            input_ids += item["input_ids"]
+            labels += segment_labels
+            position_ids += range(len(item["input_ids"]))
+        return {"input_ids": input_ids, "labels": labels, "position_ids": position_ids}
+
+
+class PackingCollator:
+    """
+    Concatenates a batch of packed rows into one [1, tokens] row, padded
+    to a multiple of pad_to_multiple_of. Padding is its own position run
+    with ignored labels, and no attention_mask is returned, so
+    flash-attention splits the row at every position_ids reset.
+    """
+
+    def __init__(self, pad_token_id, pad_to_multiple_of=PAD_TO_MULTIPLE_OF):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, features):
+        import torch  # only needed once batches are built
+
+        batch = {"input_ids": [], "labels": [], "position_ids": []}
+        for f in features:
+            for name in batch:
+                batch[name] += f[name]
+        pad = padded_width(len(batch["input_ids"]), self.pad_to_multiple_of) - len(batch["input_ids"])
+        batch["input_ids"] += [self.pad_token_id] * pad
+        batch["labels"] += [IGNORE_INDEX] * pad
+        batch["position_ids"] += range(pad)
+        return {name: torch.tensor([row], dtype=torch.long) for name, row in batch.items()}
+
+
+class LengthBucketSampler:
+    """
+    Batch sampler that groups rows of similar length.
+
+    Rows are sorted by length and split into num_buckets equal-sized
+    buckets. Each epoch shuffles the rows within every bucket, cuts the
+    buckets into batches and shuffles the batch order, so batches stay
+    random but only pad to lengths from their own bucket. With
+    shuffle=False it yields plain length-sorted batches (for eval).
+    """
+
+    def __init__(self, lengths, batch_size, num_buckets=8, shuffle=True, seed=0):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.num_buckets = max(1, min(num_buckets, len(self.lengths)))
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def _buckets(self):
+        return np.array_split(np.argsort(self.lengths, kind="stable"), self.num_buckets)
+
+    def batches(self, epoch=0):
+        """The batches (lists of row indices) drawn in the given epoch."""
+        rng = np.random.default_rng([self.seed, epoch])
+        batches = []
+        for bucket in self._buckets():
+            if self.shuffle:
+                bucket = rng.permutation(bucket)
+            batches += [bucket[i:i + self.batch_size].tolist() for i in range(0, len(bucket), self.batch_size)]
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def __iter__(self):
+        batches = self.batches(self.epoch)
+        self.epoch += 1
+        return iter(batches)
+
+    def __len__(self):
+        return sum(-(-len(bucket) // self.batch_size) for bucket in self._buckets())
+
+
+def bucket_dataloader(trainer, batch_sampler):
+    """Training DataLoader for a transformers Trainer that draws batches from batch_sampler."""
+    from torch.utils.data import DataLoader
+
+    loader = DataLoader(
+        trainer.train_dataset,
+        batch_sampler=batch_sampler,
+        collate_fn=trainer.data_collator,
+        num_workers=trainer.args.dataloader_num_workers,
+        pin_memory=trainer.args.dataloader_pin_memory,
+    )
+    return trainer.accelerator.prepare(loader)
+
+
+def padded_width(longest, multiple=PAD_TO_MULTIPLE_OF):
+    return -(-longest // multiple) * multiple
+
+
+def shuffled_batches(n, batch_size, seed=0):
+    """Index batches in the order a shuffling sampler would draw them."""
+    order = np.random.default_rng(seed).permutation(n)
+    return [order[i:i + batch_size] for i in range(0, n, batch_size)]
+
+
+def padding_report(lengths, batches, pad_to_multiple_of=PAD_TO_MULTIPLE_OF, flatten=False):
+    """
+    Real tokens vs padded slots when rows of these lengths are batched as
+    given; flatten=True for PackingCollator's one-row batches.
+    """
+    lengths = np.asarray(lengths)
+    real = slots = 0
+    for batch in batches:
+        batch_lengths = lengths[np.asarray(batch)]
+        real += int(batch_lengths.sum())
+        if flatten:
+            slots += padded_width(int(batch_lengths.sum()), pad_to_multiple_of)
+        else:
+            slots += padded_width(int(batch_lengths.max()), pad_to_multiple_of) * len(batch_lengths)
+    return {
+        "rows": len(lengths),
+        "batches": len(batches),
+        "real_tokens": real,
+        "padded_tokens": slots,
+        "padding_ratio": 1 - real / slots if slots else 0.0,
+    }
+
+
+def print_padding_table(reports):
+    """reports: {label: padding_report(...)} printed side by side."""
+    print(f"{'Layout':<16} {'Rows':>7} {'Batches':>8} {'Real tok':>10} {'Padded tok':>11} {'Padding':>8}")
+    for label, report in reports.items():
+        print(f"{label:<16} {report['rows']:>7,} {report['batches']:>8,} {report['real_tokens']:>10,} "
+              f"{report['padded_tokens']:>11,} {report['padding_ratio']:>7.1%}")
+
+
+def training_throughput(report, epochs, runtime):
+    """Real and padded tokens/sec for a run that saw the report's batches `epochs` times."""
+    return {
+        "train_runtime_s": runtime,
+        "real_tok_s": report["real_tokens"] * epochs / runtime if runtime else None,
+        "padded_tok_s": report["padded_tokens"] * epochs / runtime if runtime else None,
+        **report,
+    }
@@ -3,6 +3,24 @@
 Fine-tune FunctionGemma-270M on notification classification with 3-level priorities.
 Uses official format with apply_chat_template and tools parameter.
 
+Tokenized examples are cached on disk (see finetune_data.py), so re-runs
+that only change hyperparameters skip tokenization.
+
+--pack concatenates examples into rows of --pack-length tokens and each
+batch into one row instead of padding every batch to its longest
+example. It requires --attn-implementation flash_attention_2 (or _3),
+the only attention that keeps packed examples from attending to each
+other; any other value is an error. Padding ratio before/after and tokens/sec are printed
+and saved to training_stats.json in the output directory.
+
+Loss is taken on the model's answer only (--loss-on completion); pass
+--loss-on full to train on the prompt too, as earlier runs did. To
+compare the two, train each into its own --output-dir and evaluate
+both with evaluate_functiongemma_finetuned.py --adapter <dir>.
+
+--buckets N draws each batch from one of N length buckets instead of at
+random, so short and long notifications are not padded together.
+
 Priority levels:
 - 1: Low (can ignore/check later)
 - 2: Medium (normal daily notifications)
@@ -12,15 +30,23 @@ Priority levels:
 import os
 os.environ["TORCHDYNAMO_DISABLE"] = "1"
 
+import argparse
 import json
 import torch
 from pathlib import Path
 from transformers import AutoTokenizer, AutoModelForCausalLM, TrainingArguments, Trainer, DataCollatorForSeq2Seq
-from datasets import Dataset
 from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
 from transformers import BitsAndBytesConfig
+from finetune_data import (
+    DEFAULT_CACHE_DIR, LABEL_MODES, PACKED_ATTENTION, LengthBucketSampler, PackedDataset, PackingCollator,
+    bucket_dataloader, padding_report, print_padding_table, shuffled_batches, tokenize_dataset,
+    training_throughput
+)
 
 # Configuration
+NUM_EPOCHS = 3
+BATCH_SIZE = 4
+SEED = 42
 BASE_MODEL = str(Path(__file__).parent.parent / "models" / "functiongemma-270m")
 TRAIN_FILE = Path(__file__).parent.parent / "functiongemma_train_3level.jsonl"
 OUTPUT_DIR = Path(__file__).parent.parent / "functiongemma-finetuned-notif-3level"
@@ -44,41 +70,43 @@ def classify_notification(app_name: str, title: str, body: str, folder: str = No
 
 TOOLS = [classify_notification]
 
-def load_dataset_from_jsonl(file_path):
-    """Load dataset from JSONL."""
-    data = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            data.append(json.loads(line))
-    return Dataset.from_list(data)
-
-def format_dataset(example, tokenizer):
-    """Format example using apply_chat_template with tools."""
-    messages = example["messages"]
-
-    # Apply chat template with tools - get text first
-    text = tokenizer.apply_chat_template(
-        messages,
-        tools=TOOLS,
-        tokenize=False,
-        add_generation_prompt=False  # False because we include model response in messages
-    )
-
-    # Now tokenize
-    encoded = tokenizer(
-        text,
-        truncation=True,
-        max_length=2048,
-        padding=False,  # Will pad in data collator
-        return_tensors=None
-    )
-
-    # Add labels (same as input_ids for causal LM)
-    encoded["labels"] = encoded["input_ids"].copy()
-
-    return encoded
+class BucketedTrainer(Trainer):
+    """Trainer that draws training batches from a LengthBucketSampler when one is given."""
+
+    def __init__(self, *args, batch_sampler=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_sampler = batch_sampler
+
+    def get_train_dataloader(self):
+        if self.batch_sampler is None:
+            return super().get_train_dataloader()
+        return bucket_dataloader(self, self.batch_sampler)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fine-tune FunctionGemma with LoRA")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1),
+                        help="Tokenizer processes on a cache miss")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="Tokenized dataset cache")
+    parser.add_argument("--loss-on", choices=LABEL_MODES, default="completion",
+                        help="completion: answer tokens only; full: every token")
+    parser.add_argument("--train-file", type=Path, default=TRAIN_FILE,
+                        help="Messages JSONL, e.g. the *_compact.jsonl output of --target compact")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--retokenize", action="store_true", help="Ignore a matching cache entry")
+    parser.add_argument("--pack", action="store_true", help="Pack several examples into each training row")
+    parser.add_argument("--pack-length", type=int, default=1024, help="Row length in tokens with --pack")
+    parser.add_argument("--buckets", type=int, default=0,
+                        help="Length buckets for batching (0 = random batches)")
+    parser.add_argument("--attn-implementation", help="e.g. flash_attention_2 (needed to isolate packed examples)")
+    args = parser.parse_args()
+    if args.pack and args.attn_implementation not in PACKED_ATTENTION:
+        parser.error(f"--pack needs --attn-implementation {' or '.join(PACKED_ATTENTION)}; "
+                     "other attention lets packed examples attend to each other")
+    return args
 
 def main():
+    args = parse_args()
+
     print("="*70)
     print("FUNCTIONGEMMA FINE-TUNING (3-LEVEL PRIORITY)")
     print("="*70)
@@ -101,6 +129,7 @@ def main():
         quantization_config=bnb_config,
         device_map="auto",
         torch_dtype=torch.bfloat16,
+        attn_implementation=args.attn_implementation,
     )
 
     # Prepare for k-bit training
@@ -119,25 +148,37 @@ def main():
     model = get_peft_model(model, lora_config)
     model.print_trainable_parameters()
 
-    # Load and format dataset
-    print(f"\nLoading dataset from {TRAIN_FILE}...")
-    dataset = load_dataset_from_jsonl(TRAIN_FILE)
+    # Load the tokenized dataset (cached by tokenizer, template and data hash)
+    print(f"\nLoading dataset from {args.train_file}...")
+    dataset = tokenize_dataset(args.train_file, tokenizer, TOOLS, workers=args.workers,
+                               cache_dir=args.cache_dir, rebuild=args.retokenize, label_mode=args.loss_on)
     print(f"Loaded {len(dataset)} examples")
-
-    print("\nFormatting dataset with apply_chat_template...")
-    dataset = dataset.map(
-        lambda x: format_dataset(x, tokenizer),
-        remove_columns=dataset.column_names
-    )
+    label_tokens, tokens = dataset.meta["label_tokens"], dataset.meta["tokens"]
+    print(f"Loss on {args.loss_on}: {label_tokens:,} of {tokens:,} tokens ({label_tokens / tokens:.1%})")
 
     print(f"\nDataset formatted. Sample length: {len(dataset[0]['input_ids'])} tokens")
     print()
 
+    # Padding before/after packing, for the batches a shuffling sampler would draw
+    reports = {"unpacked": padding_report(dataset.lengths, shuffled_batches(len(dataset), BATCH_SIZE))}
+    if args.pack:
+        dataset = PackedDataset(dataset, args.pack_length)
+        reports["packed"] = padding_report(dataset.lengths, shuffled_batches(len(dataset), BATCH_SIZE), flatten=True)
+    layout = "packed" if args.pack else "unpacked"
+
+    batch_sampler = None
+    if args.buckets:
+        batch_sampler = LengthBucketSampler(dataset.lengths, BATCH_SIZE, args.buckets, seed=SEED)
+        layout += "+buckets"
+        reports[layout] = padding_report(dataset.lengths, batch_sampler.batches(), flatten=args.pack)
+    print_padding_table(reports)
+    print()
+
     # Training arguments
     training_args = TrainingArguments(
-        output_dir=str(OUTPUT_DIR),
-        num_train_epochs=3,
-        per_device_train_batch_size=4,
+        output_dir=str(args.output_dir),
+        num_train_epochs=NUM_EPOCHS,
+        per_device_train_batch_size=BATCH_SIZE,
         gradient_accumulation_steps=4,
         learning_rate=2e-4,
         logging_steps=50,
@@ -147,24 +188,29 @@ def main():
         lr_scheduler_type="cosine",
         warmup_ratio=0.1,
         report_to="none",
+        seed=SEED,
     )
 
     # Data collator for padding - handles labels properly
-    data_collator = DataCollatorForSeq2Seq(
-        tokenizer=tokenizer,
-        model=model,
-        padding=True,
-        pad_to_multiple_of=8,
-        label_pad_token_id=-100  # Ignore padding tokens in loss
-    )
+    if args.pack:
+        data_collator = PackingCollator(tokenizer.pad_token_id)
+    else:
+        data_collator = DataCollatorForSeq2Seq(
+            tokenizer=tokenizer,
+            model=model,
+            padding=True,
+            pad_to_multiple_of=8,
+            label_pad_token_id=-100  # Ignore padding tokens in loss
+        )
 
     # Trainer
-    trainer = Trainer(
+    trainer = BucketedTrainer(
         model=model,
         args=training_args,
         train_dataset=dataset,
         tokenizer=tokenizer,
         data_collator=data_collator,
+        batch_sampler=batch_sampler,
     )
 
     print("="*70)
@@ -173,18 +219,29 @@ def main():
     print()
 
     # Train
-    trainer.train()
+    train_result = trainer.train()
+    stats = training_throughput(reports[layout], NUM_EPOCHS,
+                                train_result.metrics["train_runtime"])
+    stats.update(layout=layout, buckets=args.buckets, packed=args.pack,
+                 pack_length=args.pack_length if args.pack else None,
+                 attn_implementation=args.attn_implementation, loss_on=args.loss_on,
+                 label_tokens_per_epoch=label_tokens, tokens_per_epoch=tokens)
 
     # Save
     print("\nSaving model...")
-    trainer.save_model(OUTPUT_DIR)
-    tokenizer.save_pretrained(OUTPUT_DIR)
+    trainer.save_model(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
 
     print()
     print("="*70)
     print("[OK] TRAINING COMPLETE")
     print("="*70)
-    print(f"Model saved to: {OUTPUT_DIR}")
+    print(f"Model saved to: {args.output_dir}")
+    print(f"Throughput: {stats['real_tok_s']:,.0f} tok/s ({stats['padded_tok_s']:,.0f} tok/s incl. padding, "
+          f"{stats['padding_ratio']:.1%} padding) over {stats['train_runtime_s'] / 60:.1f} min")
+
+    with open(Path(args.output_dir) / "training_stats.json", 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Per-token timing for the Python inference harnesses.
+
+Records the same numbers the Android benchmarks (004, 008) report for
+each example: time to first token, prefill tok/s and decode tok/s.
+
+- TokenTimer is a generate() streamer (put/end, same interface as
+  transformers' BaseStreamer): the first put() is the prompt, every
+  later put() is a decoded token.
+- timed_llama_call() streams llama-cpp's Llama.__call__ and timestamps
+  each chunk.
+- summarize_timings() turns per-example records into p50/p95/p99 for
+  the results JSON.
+
+The first new token comes out of the prefill forward pass, so prefill
+tok/s is prefill_tokens / TTFT and decode tok/s only counts the tokens
+after it.
+"""
+
+import time
+
+PERCENTILES = (50, 95, 99)
+
+
+def timing_record(start, first_token_time, end_time, prefill_tokens, new_tokens):
+    """Build one per-example timing record (times in seconds)."""
+    latency = end_time - start
+    ttft = first_token_time - start if first_token_time is not None else None
+
+    prefill_tok_s = None
+    if ttft and prefill_tokens:
+        prefill_tok_s = prefill_tokens / ttft
+
+    decode_tok_s = None
+    if first_token_time is not None and new_tokens > 1 and end_time > first_token_time:
+        decode_tok_s = (new_tokens - 1) / (end_time - first_token_time)
+
+    return {
+        "prefill_tokens": prefill_tokens,
+        "new_tokens": new_tokens,
+        "latency_s": latency,
+        "ttft_s": ttft,
+        "prefill_tok_s": prefill_tok_s,
+        "decode_tok_s": decode_tok_s,
+    }
+
+
+class TokenTimer:
+    """
+    Streamer for model.generate(streamer=...) that timestamps every step.
+
+    Create it right before generate(); the clock starts at construction.
+    With a batched generate() each put() carries one token per row, so
+    decode tok/s is the aggregate throughput of the batch.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.prompt_tokens = None
+        self.first_token_time = None
+        self.last_token_time = None
+        self.new_tokens = 0
+
+    def put(self, value):
+        now = time.perf_counter()
+        if self.prompt_tokens is None:
+            self.prompt_tokens = value.shape[-1]
+            return
+
+        if self.first_token_time is None:
+            self.first_token_time = now
+        self.last_token_time = now
+        self.new_tokens += value.numel()
+
+    def end(self):
+        if self.last_token_time is None:
+            self.last_token_time = time.perf_counter()
+
+    def record(self, prefill_tokens=None, end_time=None):
+        """
+        Timing record for this generation.
+
+        prefill_tokens defaults to the prompt length; pass the uncached
+        part when generate() started from a prefix cache.
+        """
+        if prefill_tokens is None:
+            prefill_tokens = self.prompt_tokens
+        if end_time is None:
+            end_time = self.last_token_time or time.perf_counter()
+        return timing_record(self.start, self.first_token_time, end_time, prefill_tokens, self.new_tokens)
+
+
+def timed_llama_call(llm, prompt, **kwargs):
+    """
+    Run Llama.__call__ with stream=True and time each chunk.
+
+    llama-cpp-python reuses the KV cache for the longest prefix the
+    prompt shares with the previous call (always re-evaluating the last
+    prompt token), so only the rest is counted as prefilled. Chunks are
+    not one per token (text held back for a partial stop-string match
+    or a multi-byte character is merged), so new tokens are counted by
+    tokenizing the completion.
+
+    Returns (text, finish_reason, timing_record).
+    """
+    tokens = llm.tokenize(prompt.encode("utf-8"), special=True)
+    prompt_tokens = len(tokens)
+    cached_tokens = llm.longest_token_prefix(llm._input_ids.tolist(), tokens[:-1])
+
+    start = time.perf_counter()
+    first_token_time = None
+    pieces = []
+    finish_reason = None
+
+    for chunk in llm(prompt, stream=True, **kwargs):
+        if first_token_time is None:
+            first_token_time = time.perf_counter()
+        choice = chunk["choices"][0]
+        pieces.append(choice["text"])
+        finish_reason = choice.get("finish_reason") or finish_reason
+
+    end_time = time.perf_counter()
+    text = "".join(pieces)
+    new_tokens = len(llm.tokenize(text.encode("utf-8"), add_bos=False, special=True)) if text else 0
+
+    record = timing_record(start, first_token_time, end_time, prompt_tokens - cached_tokens, new_tokens)
+    record["prompt_tokens"] = prompt_tokens
+    record["cached_tokens"] = cached_tokens
+    return text, finish_reason, record
+
+
+def percentile(values, p):
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def distribution(values):
+    """Mean and p50/p95/p99 of the non-None values, or None if there are none."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    summary = {"mean": sum(values) / len(values)}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = percentile(values, p)
+    return summary
+
+
+def summarize_timings(records):
+    """p50/p95/p99 of latency, TTFT, prefill/decode speed and decode length over timing records."""
+    return {
+        "count": len(records),
+        "latency_ms": distribution([r["latency_s"] * 1000 for r in records]),
+        "ttft_ms": distribution([r["ttft_s"] * 1000 if r["ttft_s"] is not None else None for r in records]),
+        "prefill_tok_s": distribution([r["prefill_tok_s"] for r in records]),
+        "decode_tok_s": distribution([r["decode_tok_s"] for r in records]),
+        "new_tokens": distribution([r["new_tokens"] for r in records]),
+    }
+
+
+def print_timing_summary(summary, indent=""):
+    """Print a summarize_timings() block as a small p50/p95/p99 table."""
+    print(f"{indent}{'Metric':<16} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for key, label in [("latency_ms", "Latency (ms)"), ("ttft_ms", "TTFT (ms)"),
+                       ("prefill_tok_s", "Prefill tok/s"), ("decode_tok_s", "Decode tok/s"),
+                       ("new_tokens", "Decode tokens")]:
+        stats = summary.get(key)
+        if stats is None:
+            print(f"{indent}{label:<16} {'-':>10} {'-':>10} {'-':>10}")
+            continue
+        print(f"{indent}{label:<16} {stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['p99']:>10.1f}")
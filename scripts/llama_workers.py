@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Multiprocess llama-cpp evaluation.
+
+One Llama instance per worker process, each with its own thread count,
+fed dataset shards from the pool's work queue. Results are merged back
+by example index, so the output order (and, with greedy decoding and a
+fixed thread count, the output itself) does not depend on scheduling.
+
+Usage from a script (the infer function must be defined at module level
+and the script must guard its entry point with __name__ == "__main__",
+since workers are spawned):
+
+    def infer(llm, prompt):
+        return llm(prompt, max_tokens=100, temperature=0.0)["choices"][0]["text"]
+
+    outputs, stats = run_workers(MODEL_PATH, prompts, infer, workers=8)
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+
+DEFAULT_SHARD_SIZE = 8
+
+# Per-process state, set by _init_worker
+_llm = None
+_infer = None
+
+
+def threads_per_worker(workers, cpu_count=None):
+    """Split the machine's cores evenly across workers (at least one thread each)."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // workers)
+
+
+def load_llama(model_path, n_threads, n_ctx=2048):
+    try:
+        from llama_cpp import Llama
+    except ImportError:
+        print("Error: llama-cpp-python not installed")
+        print("Install with: pip install llama-cpp-python")
+        sys.exit(1)
+
+    return Llama(
+        model_path=str(model_path),
+        n_ctx=n_ctx,
+        n_threads=n_threads,
+        n_threads_batch=n_threads,
+        n_gpu_layers=0,  # CPU only
+        verbose=False
+    )
+
+
+def _init_worker(model_path, n_threads, n_ctx, infer):
+    global _llm, _infer
+    _llm = load_llama(model_path, n_threads, n_ctx)
+    _infer = infer
+
+
+def _run_shard(shard):
+    """Run one shard; returns ([(index, result), ...], busy seconds)."""
+    start = time.perf_counter()
+    results = [(index, _infer(_llm, item)) for index, item in shard]
+    return results, time.perf_counter() - start
+
+
+def make_shards(items, shard_size=DEFAULT_SHARD_SIZE):
+    indexed = list(enumerate(items))
+    return [indexed[i:i + shard_size] for i in range(0, len(indexed), shard_size)]
+
+
+def run_workers(model_path, items, infer, workers, n_threads=None, n_ctx=2048,
+                shard_size=DEFAULT_SHARD_SIZE, progress=True):
+    """
+    Run infer(llm, item) over items on `workers` processes.
+
+    Returns (results in input order, stats). stats["examples_per_sec"]
+    is wall-clock throughput including model load; the busy figures only
+    count time spent inside infer().
+    """
+    n_threads = n_threads or threads_per_worker(workers)
+    shards = make_shards(items, shard_size)
+    results = [None] * len(items)
+    busy = 0.0
+    done = 0
+    shards_done = 0
+
+    start = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(model_path, n_threads, n_ctx, infer)) as pool:
+        for shard_results, shard_busy in pool.imap_unordered(_run_shard, shards):
+            for index, result in shard_results:
+                results[index] = result
+            busy += shard_busy
+            done += len(shard_results)
+            shards_done += 1
+            if progress and (shards_done % 10 == 0 or done == len(items)):
+                print(f"Progress: {done}/{len(items)} ({done/len(items)*100:.0f}%)")
+    elapsed = time.perf_counter() - start
+
+    cores = workers * n_threads
+    stats = {
+        "workers": workers,
+        "threads_per_worker": n_threads,
+        "cores": cores,
+        "examples": len(items),
+        "wall_seconds": elapsed,
+        "examples_per_sec": len(items) / elapsed if elapsed > 0 else 0.0,
+        "examples_per_sec_per_core": len(items) / elapsed / cores if elapsed > 0 else 0.0,
+        # Inference-only throughput: every worker busy in parallel
+        "busy_examples_per_sec": len(items) / (busy / workers) if busy > 0 else 0.0,
+    }
+    return results, stats
+
+
+def parse_worker_counts(value):
+    """'--workers 1,4,16' -> [1, 4, 16]."""
+    counts = [int(part) for part in value.split(",") if part.strip()]
+    if not counts or any(count < 1 for count in counts):
+        raise ValueError(f"Invalid worker counts: {value}")
+    return counts
+
+
+def print_throughput_table(runs):
+    """Aggregate throughput per core count, one row per run_workers() stats dict."""
+    print(f"{'Workers':>8} {'Threads':>8} {'Cores':>6} {'Wall (s)':>9} {'Ex/s':>8} {'Ex/s/core':>10} {'Busy ex/s':>10}")
+    for stats in runs:
+        print(f"{stats['workers']:>8} {stats['threads_per_worker']:>8} {stats['cores']:>6} "
+              f"{stats['wall_seconds']:>9.1f} {stats['examples_per_sec']:>8.2f} "
+              f"{stats['examples_per_sec_per_core']:>10.3f} {stats['busy_examples_per_sec']:>10.2f}")
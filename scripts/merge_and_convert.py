@@ -1,158 +1,494 @@
 #!/usr/bin/env python3
 """
-Merge LoRA adapter with base model and convert to GGUF.
+Merge LoRA adapter with base model, convert to GGUF and quantize.
+
+Every stage writes into a content-addressed store under --work-dir:
+
+    merge/<key>/     merged HF model;  key = base model + adapter + merge dtype
+    f16/<key>/       f16 GGUF;         key = merge key + converter script
+    quant/<key>/     one per type;     key = f16 key + type + llama-quantize
+
+A stage whose key already has an artifact is skipped, so re-running after
+changing only the quant list does one llama-quantize per new type, and
+re-running with nothing changed does no work at all. Quant jobs run in
+parallel (--jobs), each with its share of the CPU threads.
+
+manifest.json in the work dir records size, sha256 and key of every
+artifact from the last run.
+
+--imatrix-quants builds extra low-bit quants with an importance matrix:
+a calibration sample of the training slice of the 3-level dataset is
+rendered through the production prompt (formats.py qwen-notif, with
+the reference answer), llama-imatrix measures which weights those
+mixed Chinese/English notifications actually exercise on the f16
+model, and llama-quantize spends its bits there. These are listed as
+<type>-imat next to the plain quants, and are cached like every other
+stage (calibration text, imatrix and quant each by input hash).
+
+Usage:
+    python merge_and_convert.py --adapter path/to/qwen3-finetuned \\
+        --llama-cpp path/to/llama.cpp --quants Q8_0 Q5_K_M Q4_K_M
+
+    # Copy one quant into the Android assets
+    python merge_and_convert.py --adapter ... --deploy Q5_K_M
+
+    # Calibrated low-bit quants for low-end ARMv8 phones (Q4_0 and
+    # IQ4_NL use llama.cpp's repacked ARM kernels)
+    python merge_and_convert.py --adapter ... --quants Q8_0 \
+        --imatrix-quants Q4_0 Q4_K_M IQ4_NL Q3_K_M --deploy Q4_K_M-imat
 """
 
+import argparse
+import hashlib
+import json
 import os
-import sys
+import shutil
 import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Paths
-BASE_MODEL = Path("E:/projects/functiongemma-finetune/qwen3-0.6b")
-LORA_ADAPTER = Path("E:/projects/functiongemma-finetune/notif-3level/qwen3-finetuned")
-MERGED_OUTPUT = Path("E:/projects/functiongemma-finetune/notif-3level/qwen3-merged")
-LLAMA_CPP = Path("E:/projects/notif/llama.cpp")
-GGUF_OUTPUT = Path("E:/projects/notif/android/app/src/main/assets/models")
-
-def merge_lora():
-    """Merge LoRA adapter with base model."""
-    print("=" * 60)
-    print("Step 1: Merging LoRA adapter with base model")
-    print("=" * 60)
-
-    from transformers import AutoModelForCausalLM, AutoTokenizer
-    from peft import PeftModel
-    import torch
-
-    print(f"Loading base model from {BASE_MODEL}...")
-    base_model = AutoModelForCausalLM.from_pretrained(
-        str(BASE_MODEL),
-        torch_dtype=torch.float16,
-        device_map="cpu"
-    )
-
-    print(f"Loading LoRA adapter from {LORA_ADAPTER}...")
-    model = PeftModel.from_pretrained(base_model, str(LORA_ADAPTER))
-
-    print("Merging weights...")
-    merged_model = model.merge_and_unload()
-
-    print(f"Saving merged model to {MERGED_OUTPUT}...")
-    MERGED_OUTPUT.mkdir(parents=True, exist_ok=True)
-    merged_model.save_pretrained(str(MERGED_OUTPUT))
-
-    # Also save tokenizer
-    print("Saving tokenizer...")
-    tokenizer = AutoTokenizer.from_pretrained(str(LORA_ADAPTER))
-    tokenizer.save_pretrained(str(MERGED_OUTPUT))
-
-    print("Merge complete!")
-    return MERGED_OUTPUT
-
-def convert_to_gguf(merged_path: Path):
-    """Convert merged model to GGUF format."""
-    print("\n" + "=" * 60)
-    print("Step 2: Converting to GGUF format")
-    print("=" * 60)
-
-    convert_script = LLAMA_CPP / "convert_hf_to_gguf.py"
-    output_file = merged_path / "qwen3-notif-f16.gguf"
-
-    cmd = [
-        sys.executable,
-        str(convert_script),
-        str(merged_path),
-        "--outfile", str(output_file),
-        "--outtype", "f16"
-    ]
-
-    print(f"Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        print(f"Error: {result.stderr}")
-        sys.exit(1)
-
-    print(result.stdout)
-    print(f"GGUF file created: {output_file}")
-    return output_file
-
-def quantize(gguf_file: Path, quant_type: str = "Q5_K_M"):
-    """Quantize GGUF model."""
-    print("\n" + "=" * 60)
-    print(f"Step 3: Quantizing to {quant_type}")
-    print("=" * 60)
-
-    # Find quantize executable
-    quantize_exe = LLAMA_CPP / "build" / "bin" / "llama-quantize"
-    if not quantize_exe.exists():
-        quantize_exe = LLAMA_CPP / "llama-quantize"
-    if not quantize_exe.exists():
-        # Try building
-        print("Quantize executable not found. You may need to build llama.cpp first.")
-        print("Skipping quantization - using F16 model.")
-        return gguf_file
-
-    output_file = gguf_file.parent / f"Qwen3-0.6B-notif-{quant_type}.gguf"
-
-    cmd = [str(quantize_exe), str(gguf_file), str(output_file), quant_type]
-    print(f"Running: {' '.join(cmd)}")
-
-    result = subprocess.run(cmd, capture_output=True, text=True)
+from llama_workers import threads_per_worker
+
+REPO = Path(__file__).parent.parent
+PIPELINE_VERSION = 1
+
+# Defaults; all overridable from the command line
+BASE_MODEL = REPO / "models" / "qwen3-0.6b"
+LORA_ADAPTER = REPO / "qwen3-finetuned-notif-3level"
+LLAMA_CPP = Path(os.environ.get("LLAMA_CPP", REPO / "llama.cpp"))
+WORK_DIR = REPO / ".cache" / "export"
+GGUF_OUTPUT = REPO / "android" / "app" / "src" / "main" / "assets" / "models"
+MODEL_NAME = "Qwen3-0.6B-notif"
+QUANT_TYPES = ["Q8_0", "Q5_K_M", "Q4_K_M"]
+
+# imatrix calibration: sampled from the training slice only, so the
+# held-out rows (12000..) stay unseen
+CALIB_FILE = REPO / "data" / "training_data_full_3level.jsonl"
+CALIB_ROWS = 12000
+CALIB_SAMPLES = 512
+CALIB_FORMAT = "qwen-notif"
+IMATRIX_CTX = 512
+
+RECORD_FILE = "artifact.json"
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8") if isinstance(part, str) else part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DigestMemo:
+    """
+    sha256 of input files, remembered by (path, size, mtime) in a JSON
+    file so the 1.2 GB base model is hashed once, not on every run.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+        self.dirty = False
+
+    def file(self, path):
+        path = Path(path).resolve()
+        stat = path.stat()
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        entry = self.entries.get(str(path))
+        if entry and entry["stamp"] == stamp:
+            return entry["sha256"]
+        digest = file_digest(path)
+        self.entries[str(path)] = {"stamp": stamp, "sha256": digest}
+        self.dirty = True
+        return digest
+
+    def tree(self, root):
+        """Digest of a directory: relative path and content of every file."""
+        root = Path(root)
+        files = sorted(p for p in root.rglob("*") if p.is_file())
+        return _digest(*(f"{p.relative_to(root).as_posix()}={self.file(p)}" for p in files))
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(self.path.name + ".tmp")
+        temp.write_text(json.dumps(self.entries, indent=1), encoding="utf-8")
+        os.replace(temp, self.path)
+        self.dirty = False
+
+
+class ArtifactStore:
+    """
+    <work_dir>/<stage>/<key>/ directories, each holding one artifact and
+    an artifact.json record. The record is written last and the directory
+    renamed into place, so an interrupted build never looks finished.
+    """
+
+    def __init__(self, work_dir, force=False):
+        self.work_dir = Path(work_dir)
+        self.force = force
+        self.memo = DigestMemo(self.work_dir / "digests.json")
+
+    def lookup(self, stage, key):
+        try:
+            record = json.loads((self.work_dir / stage / key / RECORD_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not self.resolve(record).exists():
+            return None
+        return record
+
+    def resolve(self, record):
+        return self.work_dir / record["stage"] / record["key"] / record["name"]
+
+    def build(self, stage, key, name, inputs, builder):
+        """
+        Return the record for (stage, key), calling builder(out_path) in
+        a temp dir to create `name` when there is none yet.
+        """
+        record = None if self.force else self.lookup(stage, key)
+        if record is not None:
+            return dict(record, cached=True)
+
+        target = self.work_dir / stage / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = Path(tempfile.mkdtemp(dir=target.parent, prefix=f".{key}."))
+        try:
+            start = time.perf_counter()
+            builder(temp / name)
+            seconds = time.perf_counter() - start
+            out = temp / name
+            if out.is_dir():
+                files = sorted(p for p in out.rglob("*") if p.is_file())
+                size = sum(p.stat().st_size for p in files)
+                sha256 = _digest(*(f"{p.relative_to(out).as_posix()}={file_digest(p)}" for p in files))
+            else:
+                size, sha256 = out.stat().st_size, file_digest(out)
+            record = {
+                "stage": stage, "key": key, "name": name, "inputs": inputs,
+                "size_bytes": size, "sha256": sha256, "build_seconds": round(seconds, 2),
+            }
+            (temp / RECORD_FILE).write_text(json.dumps(record, indent=2), encoding="utf-8")
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(temp, target)
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+        return dict(record, cached=False)
+
+
+def find_tool(llama_cpp, name):
+    """A llama.cpp executable from a CMake build (Linux/macOS or Windows layout), or None."""
+    for candidate in (f"build/bin/{name}", f"build/bin/Release/{name}.exe", f"build/bin/{name}.exe", name):
+        path = Path(llama_cpp) / candidate
+        if path.exists():
+            return path
+    return None
+
+
+def require_tool(llama_cpp, name):
+    path = find_tool(llama_cpp, name)
+    if path is None:
+        raise FileNotFoundError(f"{name} not found under {llama_cpp}; build llama.cpp first "
+                                f"(cmake -B build && cmake --build build --config Release)")
+    return path
+
+
+def run(cmd):
+    print(f"Running: {' '.join(str(c) for c in cmd)}")
+    result = subprocess.run([str(c) for c in cmd], capture_output=True, text=True)
     if result.returncode != 0:
-        print(f"Error: {result.stderr}")
-        return gguf_file
-
-    print(result.stdout)
-    print(f"Quantized model: {output_file}")
-    return output_file
-
-def deploy_to_android(model_file: Path):
+        raise RuntimeError(f"{Path(cmd[0]).name} failed ({result.returncode}):\n{result.stderr[-4000:]}")
+    return result
+
+
+def merge_stage(store, base_model, adapter, dtype="float32"):
+    """Merge the LoRA adapter into the base model and save it with its tokenizer."""
+    inputs = {
+        "version": PIPELINE_VERSION,
+        "base_model": store.memo.tree(base_model),
+        "adapter": store.memo.tree(adapter),
+        "dtype": dtype,
+    }
+    key = _digest(*(f"{k}={v}" for k, v in sorted(inputs.items())))[:24]
+
+    def build(out):
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        from peft import PeftModel
+        import torch
+
+        # Merge in full precision; rounding W + BA to fp16 before the sum
+        # loses the small LoRA deltas. The converter picks the GGUF type.
+        print(f"Loading base model from {base_model} ({dtype})...")
+        model = AutoModelForCausalLM.from_pretrained(
+            str(base_model), torch_dtype=getattr(torch, dtype), device_map="cpu"
+        )
+        print(f"Loading LoRA adapter from {adapter}...")
+        model = PeftModel.from_pretrained(model, str(adapter)).merge_and_unload()
+        model.save_pretrained(str(out))
+        AutoTokenizer.from_pretrained(str(adapter)).save_pretrained(str(out))
+
+    return store.build("merge", key, "merged", inputs, build)
+
+
+def convert_stage(store, merged, llama_cpp, outtype="f16"):
+    """Convert the merged HF model to a GGUF file with convert_hf_to_gguf.py."""
+    convert_script = Path(llama_cpp) / "convert_hf_to_gguf.py"
+    inputs = {
+        "merge": merged["key"],
+        "converter": store.memo.file(convert_script),
+        "outtype": outtype,
+    }
+    key = _digest(*(f"{k}={v}" for k, v in sorted(inputs.items())))[:24]
+
+    def build(out):
+        run([sys.executable, convert_script, store.resolve(merged), "--outfile", out, "--outtype", outtype])
+
+    return store.build(outtype, key, f"{MODEL_NAME}-{outtype}.gguf", inputs, build)
+
+
+def render_calibration(path, samples, seed=0, fmt_name=CALIB_FORMAT):
+    """
+    llama-imatrix input: for each sampled training row, the production
+    prompt followed by the reference answer, as the model sees them.
+    """
+    sys.path.insert(0, str(REPO / "benchmarks"))
+    from formats import FORMATS
+    from notif_index import sample_rows
+
+    fmt = FORMATS[fmt_name]()
+    parts = []
+    for row in sample_rows(path, samples, seed=seed, stop=CALIB_ROWS):
+        answer = json.dumps({"folder": row["classification"]["folder"],
+                             "priority": row["classification"]["priority"]})
+        parts.append(f"{fmt.build(row['notification'])}\n{answer}{fmt.stop[0]}\n")
+    return "".join(parts)
+
+
+def calibration_stage(store, calib_file, samples, seed=0):
+    """Calibration text for llama-imatrix, keyed by its own content."""
+    text = render_calibration(calib_file, samples, seed)
+    inputs = {"source": str(calib_file), "samples": samples, "seed": seed, "format": CALIB_FORMAT}
+    key = _digest(text)[:24]
+
+    def build(out):
+        out.write_text(text, encoding="utf-8")
+
+    return store.build("calib", key, "calibration.txt", inputs, build)
+
+
+def imatrix_stage(store, gguf, calib, imatrix_exe, ctx_size=IMATRIX_CTX):
+    """Importance matrix of the f16 model over the calibration text."""
+    inputs = {
+        "gguf": gguf["key"],
+        "calib": calib["key"],
+        "imatrix": store.memo.file(imatrix_exe),
+        "ctx_size": ctx_size,
+        "parse_special": True,
+    }
+    key = _digest(*(f"{k}={v}" for k, v in sorted(inputs.items())))[:24]
+
+    def build(out):
+        # --parse-special: <|im_start|>/<|im_end|> in the text are the chat control tokens
+        run([imatrix_exe, "-m", store.resolve(gguf), "-f", store.resolve(calib), "-o", out,
+             "-c", ctx_size, "-t", threads_per_worker(1), "--parse-special"])
+
+    return store.build("imatrix", key, "imatrix.dat", inputs, build)
+
+
+def quant_label(quant_type, imatrix=None):
+    return f"{quant_type}-imat" if imatrix else quant_type
+
+
+def quantize_stage(store, gguf, quant_type, quantize_exe, threads, imatrix=None):
+    """Quantize the GGUF file to quant_type with llama-quantize, optionally guided by an imatrix."""
+    inputs = {
+        "gguf": gguf["key"],
+        "quant_type": quant_type,
+        "quantize": store.memo.file(quantize_exe),
+    }
+    if imatrix:
+        inputs["imatrix"] = imatrix["key"]
+    key = _digest(*(f"{k}={v}" for k, v in sorted(inputs.items())))[:24]
+
+    def build(out):
+        extra = ["--imatrix", store.resolve(imatrix)] if imatrix else []
+        run([quantize_exe, *extra, store.resolve(gguf), out, quant_type, threads])
+
+    return store.build("quant", key, f"{MODEL_NAME}-{quant_label(quant_type, imatrix)}.gguf", inputs, build)
+
+
+def quantize_all(store, gguf, jobs_list, quantize_exe, jobs):
+    """
+    Run (quant_type, imatrix record or None) jobs `jobs` at a time;
+    returns records in jobs_list order.
+    """
+    jobs = max(1, min(jobs, len(jobs_list)))
+    threads = threads_per_worker(jobs)
+    store.memo.file(quantize_exe)  # hash once, not in every job
+    with ThreadPoolExecutor(jobs) as pool:
+        futures = [pool.submit(quantize_stage, store, gguf, q, quantize_exe, threads, imatrix)
+                   for q, imatrix in jobs_list]
+        return [future.result() for future in futures]
+
+
+def export_models(base_model=BASE_MODEL, adapter=LORA_ADAPTER, llama_cpp=LLAMA_CPP, quant_types=QUANT_TYPES,
+                  work_dir=WORK_DIR, jobs=None, merge_dtype="float32", force=False, imatrix_quants=(),
+                  calib_file=CALIB_FILE, calib_samples=CALIB_SAMPLES, calib_seed=0):
+    """
+    Run merge -> f16 GGUF -> quants (and calibration -> imatrix -> the
+    imatrix_quants), reusing every cached stage.
+
+    Returns the manifest: {"artifacts": [record, ...], "quants": {label: path}},
+    where labels are the quant types, with "-imat" for imatrix quants.
+    """
+    store = ArtifactStore(work_dir, force)
+    quantize_exe = require_tool(llama_cpp, "llama-quantize") if quant_types or imatrix_quants else None
+    imatrix_exe = require_tool(llama_cpp, "llama-imatrix") if imatrix_quants else None
+    calib = imatrix = None
+    try:
+        print("=" * 60)
+        print("Step 1: Merging LoRA adapter with base model")
+        print("=" * 60)
+        merged = merge_stage(store, base_model, adapter, merge_dtype)
+        print(f"{'Cached' if merged['cached'] else 'Built'}: {store.resolve(merged)}")
+
+        print("\n" + "=" * 60)
+        print("Step 2: Converting to GGUF format")
+        print("=" * 60)
+        f16 = convert_stage(store, merged, llama_cpp)
+        print(f"{'Cached' if f16['cached'] else 'Built'}: {store.resolve(f16)}")
+
+        if imatrix_quants:
+            print("\n" + "=" * 60)
+            print(f"Step 2b: Importance matrix from {calib_samples} calibration prompts")
+            print("=" * 60)
+            calib = calibration_stage(store, calib_file, calib_samples, calib_seed)
+            imatrix = imatrix_stage(store, f16, calib, imatrix_exe)
+            print(f"{'Cached' if imatrix['cached'] else 'Built'}: {store.resolve(imatrix)}")
+
+        jobs_list = [(q, None) for q in quant_types] + [(q, imatrix) for q in imatrix_quants]
+        print("\n" + "=" * 60)
+        print(f"Step 3: Quantizing to {', '.join(quant_label(q, m) for q, m in jobs_list)}")
+        print("=" * 60)
+        quants = quantize_all(store, f16, jobs_list, quantize_exe, jobs or len(jobs_list)) if jobs_list else []
+    finally:
+        store.memo.save()
+
+    artifacts = [merged, f16, *(r for r in (calib, imatrix) if r), *quants]
+    for record in artifacts:
+        record["path"] = str(store.resolve(record))
+    manifest = {
+        "base_model": str(base_model),
+        "adapter": str(adapter),
+        "artifacts": artifacts,
+        "quants": {quant_label(q, m): record["path"] for (q, m), record in zip(jobs_list, quants)},
+    }
+    temp = store.work_dir / "manifest.json.tmp"
+    temp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(temp, store.work_dir / "manifest.json")
+    return manifest
+
+
+def print_manifest(manifest):
+    print(f"\n{'Stage':<8} {'Artifact':<32} {'Size':>10} {'sha256':<14} {'Status':<8} {'Time':>8}")
+    print("-" * 86)
+    for record in manifest["artifacts"]:
+        status, seconds = ("cached", "-") if record["cached"] else ("built", f"{record['build_seconds']:.1f}s")
+        print(f"{record['stage']:<8} {record['name']:<32} {record['size_bytes'] / 1024 / 1024:>8.1f}MB "
+              f"{record['sha256'][:12]:<14} {status:<8} {seconds:>8}")
+
+
+def deploy_to_android(model_file, dest_dir=GGUF_OUTPUT):
     """Copy model to Android assets."""
     print("\n" + "=" * 60)
     print("Step 4: Deploying to Android assets")
     print("=" * 60)
 
-    GGUF_OUTPUT.mkdir(parents=True, exist_ok=True)
-    dest = GGUF_OUTPUT / model_file.name
-
-    import shutil
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    dest = dest_dir / Path(model_file).name
     shutil.copy2(model_file, dest)
     print(f"Copied to: {dest}")
     print(f"Size: {dest.stat().st_size / 1024 / 1024:.1f} MB")
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="LoRA -> merged model -> GGUF -> quants, with cached stages")
+    parser.add_argument("--base-model", type=Path, default=BASE_MODEL)
+    parser.add_argument("--adapter", type=Path, default=LORA_ADAPTER, help="LoRA adapter directory")
+    parser.add_argument("--llama-cpp", type=Path, default=LLAMA_CPP,
+                        help="llama.cpp checkout with a build (default: $LLAMA_CPP or ./llama.cpp)")
+    parser.add_argument("--quants", nargs="+", default=QUANT_TYPES, metavar="TYPE",
+                        help="llama-quantize types, e.g. Q8_0 Q5_K_M Q4_K_M")
+    parser.add_argument("--imatrix-quants", nargs="+", default=[], metavar="TYPE",
+                        help="Types to also build with a calibration imatrix, listed as <TYPE>-imat")
+    parser.add_argument("--calib-file", type=Path, default=CALIB_FILE,
+                        help=f"Dataset to sample calibration prompts from (rows < {CALIB_ROWS})")
+    parser.add_argument("--calib-samples", type=int, default=CALIB_SAMPLES)
+    parser.add_argument("--calib-seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, help="Parallel quant jobs (default: one per type)")
+    parser.add_argument("--merge-dtype", choices=["float32", "bfloat16", "float16"], default="float32")
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR, help="Artifact store and manifest.json")
+    parser.add_argument("--force", action="store_true", help="Rebuild every stage even if cached")
+    parser.add_argument("--deploy", metavar="TYPE", help="Copy this quant (e.g. Q5_K_M, Q4_K_M-imat) into --deploy-dir")
+    parser.add_argument("--deploy-dir", type=Path, default=GGUF_OUTPUT)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     print("Qwen3 LoRA -> GGUF Conversion Pipeline")
     print("=" * 60)
 
     # Check paths
-    if not BASE_MODEL.exists():
-        print(f"Error: Base model not found at {BASE_MODEL}")
+    for label, path in (("Base model", args.base_model), ("LoRA adapter", args.adapter),
+                        ("llama.cpp", args.llama_cpp)):
+        if not path.exists():
+            print(f"Error: {label} not found at {path}")
+            sys.exit(1)
+    labels = args.quants + [quant_label(q, True) for q in args.imatrix_quants]
+    if args.deploy and args.deploy not in labels:
+        print(f"Error: --deploy {args.deploy} is not one of {' '.join(labels)}")
         sys.exit(1)
-    if not LORA_ADAPTER.exists():
-        print(f"Error: LoRA adapter not found at {LORA_ADAPTER}")
-        sys.exit(1)
-
-    # Step 1: Merge LoRA
-    merged_path = merge_lora()
-
-    # Step 2: Convert to GGUF
-    gguf_file = convert_to_gguf(merged_path)
 
-    # Step 3: Quantize
-    quantized_file = quantize(gguf_file, "Q5_K_M")
+    try:
+        manifest = export_models(args.base_model, args.adapter, args.llama_cpp, args.quants,
+                                 args.work_dir, args.jobs, args.merge_dtype, args.force, args.imatrix_quants,
+                                 args.calib_file, args.calib_samples, args.calib_seed)
+    except (FileNotFoundError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print_manifest(manifest)
 
-    # Step 4: Deploy
-    deploy_to_android(quantized_file)
+    if args.deploy:
+        deploy_to_android(manifest["quants"][args.deploy], args.deploy_dir)
 
     print("\n" + "=" * 60)
     print("DONE!")
     print("=" * 60)
-    print(f"\nFinal model: {quantized_file}")
-    print("\nNext steps:")
-    print("1. Update LlamaClassifier.kt MODEL_FILENAME if needed")
-    print("2. Rebuild and test the app")
+    print(f"\nManifest: {args.work_dir / 'manifest.json'}")
+    if args.deploy:
+        print("\nNext steps:")
+        print("1. Update LlamaClassifier.kt MODEL_FILENAME if needed")
+        print("2. Rebuild and test the app")
+
 
 if __name__ == "__main__":
     main()
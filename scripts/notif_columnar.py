@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Columnar (Parquet) copies of the notification datasets.
+
+The JSONL files stay the source of truth; a .parquet file next to one
+holds the same lines as flat columns:
+
+    id, app, app_display_name, title, body, folder, priority, _json
+
+app, app_display_name, folder and priority are dictionary-encoded, so a
+scan of classification.folder reads a few hundred bytes of indices
+instead of decoding every line. Both dataset layouts are supported:
+notification records (training_data*.jsonl) and the FunctionGemma
+message files (functiongemma_*.jsonl, full or --target compact), whose
+user/model text is rebuilt from the same columns.
+
+Export is byte-compatible: a line is only stored as columns if
+rebuilding it gives back exactly the same bytes. Anything else (blank
+lines, invalid JSON, extra or misspelled keys, other key order) keeps
+the original line in the _json column and is written back verbatim.
+
+notif_io.iter_json() and iter_records() accept .parquet paths, so the
+stats, remap and split scripts read Parquet without changes, and
+iter_records() only reads the columns its fields= projection needs.
+
+Usage:
+    python notif_columnar.py to-parquet data/training_data_3level.jsonl
+    python notif_columnar.py to-jsonl data/training_data_3level.parquet -o out.jsonl
+    python notif_columnar.py verify data/*.jsonl
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from notif_io import (CLASSIFICATION_FIELDS, NOTIFICATION_FIELDS, Classification, Notification,
+                      NotifRecord, ReadError, jsonl_files, to_record)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMAT_VERSION = 1
+METADATA_KEY = b"notif_columnar"
+BATCH_ROWS = 65536
+
+NOTIFICATION = "notification"
+MESSAGES = "messages"
+MESSAGES_COMPACT = "messages_compact"
+
+RAW = "_json"
+COLUMNS = ("id",) + NOTIFICATION_FIELDS + CLASSIFICATION_FIELDS + (RAW,)
+DICTIONARY_COLUMNS = ("app", "app_display_name", "folder", "priority")
+
+# FunctionGemma message text, as written by convert_to_functiongemma_*.py
+USER_TEMPLATE = "App: {app}\nTitle: {title}\nBody: {body}"
+MODEL_TEMPLATE = ("<start_function_call>call:classify_notification{{app_name:<escape>{app}<escape>,"
+                  "title:<escape>{title}<escape>,body:<escape>{body}<escape>,"
+                  "folder:<escape>{folder}<escape>,priority:<escape>{priority}<escape>}}<end_function_call>")
+MODEL_PATTERN = re.compile(
+    r"<start_function_call>call:classify_notification\{app_name:<escape>(.*?)<escape>,"
+    r"title:<escape>(.*?)<escape>,body:<escape>(.*?)<escape>,"
+    r"folder:<escape>(.*?)<escape>,priority:<escape>(-?\d+)<escape>\}<end_function_call>",
+    re.DOTALL,
+)
+# --target compact: the call carries only the labels, the text comes from the user turn
+COMPACT_TEMPLATE = ("<start_function_call>call:classify_notification{{folder:<escape>{folder}<escape>,"
+                    "priority:<escape>{priority}<escape>}}<end_function_call>")
+COMPACT_PATTERN = re.compile(
+    r"<start_function_call>call:classify_notification\{folder:<escape>(.*?)<escape>,"
+    r"priority:<escape>(-?\d+)<escape>\}<end_function_call>",
+    re.DOTALL,
+)
+USER_PATTERN = re.compile(r"App: (.*?)\nTitle: (.*?)\nBody: (.*)", re.DOTALL)
+
+
+def require_pyarrow():
+    if pa is None:
+        print("Error: pyarrow not installed")
+        print("Install with: pip install pyarrow")
+        sys.exit(1)
+
+
+def _schema(layout):
+    strings = pa.dictionary(pa.int32(), pa.string())
+    metadata = {"version": FORMAT_VERSION, "layout": layout}
+    return pa.schema([
+        pa.field("id", pa.string()),
+        pa.field("app", strings),
+        pa.field("app_display_name", strings),
+        pa.field("title", pa.string()),
+        pa.field("body", pa.string()),
+        pa.field("folder", strings),
+        pa.field("priority", pa.dictionary(pa.int32(), pa.int8())),
+        pa.field(RAW, pa.string()),
+    ], metadata={METADATA_KEY: json.dumps(metadata).encode("utf-8")})
+
+
+def _str(value):
+    return value if isinstance(value, str) else None
+
+
+def _priority(value):
+    """Priorities are small ints; anything else cannot be a column value."""
+    if isinstance(value, int) and not isinstance(value, bool) and -128 <= value < 128:
+        return value
+    return None
+
+
+def _section(entry, name):
+    section = entry.get(name)
+    return section if isinstance(section, dict) else {}
+
+
+def _notification_row(entry):
+    notif = _section(entry, "notification")
+    classification = _section(entry, "classification")
+    return {
+        "id": _str(entry.get("id")),
+        "app": _str(notif.get("app")),
+        "app_display_name": _str(notif.get("app_display_name")),
+        "title": _str(notif.get("title")),
+        "body": _str(notif.get("body")),
+        "folder": _str(classification.get("folder")),
+        "priority": _priority(classification.get("priority")),
+    }
+
+
+def _notification_entry(row):
+    return {
+        "id": row["id"],
+        "notification": {name: row[name] for name in NOTIFICATION_FIELDS},
+        "classification": {name: row[name] for name in CLASSIFICATION_FIELDS},
+    }
+
+
+def _messages_row(entry):
+    row = dict.fromkeys(COLUMNS[:-1])
+    messages = entry.get("messages")
+    if not isinstance(messages, list) or len(messages) != 2:
+        return row
+    model = messages[1].get("content") if isinstance(messages[1], dict) else None
+    match = MODEL_PATTERN.fullmatch(model) if isinstance(model, str) else None
+    if match:
+        app, title, body, folder, priority = match.groups()
+        row.update(app_display_name=app, title=title, body=body, folder=folder,
+                   priority=_priority(int(priority)))
+    return row
+
+
+def _messages_entry(row):
+    # The user text names the app as "App:"; the message files carry no package name
+    fields = {"app": row["app_display_name"], "title": row["title"], "body": row["body"]}
+    return {"messages": [
+        {"role": "user", "content": USER_TEMPLATE.format(**fields)},
+        {"role": "model", "content": MODEL_TEMPLATE.format(folder=row["folder"], priority=row["priority"], **fields)},
+    ]}
+
+
+def _message_contents(entry):
+    """(user, model) content strings of a two-turn messages entry, or None."""
+    messages = entry.get("messages")
+    if not isinstance(messages, list) or len(messages) != 2 or not all(isinstance(m, dict) for m in messages):
+        return None
+    user, model = (m.get("content") for m in messages)
+    return (user, model) if isinstance(user, str) and isinstance(model, str) else None
+
+
+def _compact_row(entry):
+    row = dict.fromkeys(COLUMNS[:-1])
+    contents = _message_contents(entry)
+    user = USER_PATTERN.fullmatch(contents[0]) if contents else None
+    model = COMPACT_PATTERN.fullmatch(contents[1]) if contents else None
+    if user and model:
+        app, title, body = user.groups()
+        folder, priority = model.groups()
+        row.update(app_display_name=app, title=title, body=body, folder=folder,
+                   priority=_priority(int(priority)))
+    return row
+
+
+def _compact_entry(row):
+    fields = {"app": row["app_display_name"], "title": row["title"], "body": row["body"]}
+    return {"messages": [
+        {"role": "user", "content": USER_TEMPLATE.format(**fields)},
+        {"role": "model", "content": COMPACT_TEMPLATE.format(folder=row["folder"], priority=row["priority"])},
+    ]}
+
+
+LAYOUTS = {
+    NOTIFICATION: (_notification_row, _notification_entry),
+    MESSAGES: (_messages_row, _messages_entry),
+    MESSAGES_COMPACT: (_compact_row, _compact_entry),
+}
+
+
+def detect_layout(entry):
+    if "messages" not in entry:
+        return NOTIFICATION
+    contents = _message_contents(entry)
+    if contents and COMPACT_PATTERN.fullmatch(contents[1]):
+        return MESSAGES_COMPACT
+    return MESSAGES
+
+
+def _dumps(entry):
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+def _columns_for(line, layout_hint):
+    """
+    Split one raw line into (layout, row). The row keeps the line
+    verbatim in _json unless the columns rebuild it byte for byte.
+    """
+    try:
+        entry = json.loads(line)
+    except json.JSONDecodeError:
+        entry = None
+
+    if not isinstance(entry, dict):
+        row = dict.fromkeys(COLUMNS)
+        row[RAW] = line
+        return layout_hint, row
+
+    layout = layout_hint or detect_layout(entry)
+    to_row, to_entry = LAYOUTS[layout]
+    row = to_row(entry)
+    row[RAW] = None if _dumps(to_entry(row)) == line else line
+    return layout, row
+
+
+class _BatchWriter:
+    """Buffers rows and writes them as Parquet row groups."""
+
+    def __init__(self, path, batch_rows):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.layout = None
+        self.rows = []
+        self.writer = None
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if self.writer is None:
+            self.schema = _schema(self.layout or NOTIFICATION)
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression="zstd",
+                                           use_dictionary=list(DICTIONARY_COLUMNS))
+        if not self.rows:
+            return
+        arrays = []
+        for field in self.schema:
+            values = [row[field.name] for row in self.rows]
+            if field.name in DICTIONARY_COLUMNS:
+                arrays.append(pa.array(values, type=field.type.value_type).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def convert_to_parquet(src, dst=None, batch_rows=BATCH_ROWS):
+    """
+    Write src (JSONL) as Parquet, one row per line.
+
+    Returns (dst, lines, verbatim) where verbatim counts the lines kept
+    as raw JSON because the columns could not reproduce them exactly.
+    """
+    require_pyarrow()
+    src = Path(src)
+    dst = Path(dst) if dst else src.with_suffix(".parquet")
+
+    out = _BatchWriter(dst, batch_rows)
+    lines = verbatim = 0
+    # Binary split keeps \r\n and a missing final newline intact
+    with open(src, "rb") as f:
+        for raw in f:
+            layout, row = _columns_for(raw.decode("utf-8"), out.layout)
+            out.layout = layout
+            out.add(row)
+            lines += 1
+            verbatim += row[RAW] is not None
+    out.close()
+    return dst, lines, verbatim
+
+
+def read_layout(path):
+    """Layout (notification, messages or messages_compact) recorded when the file was written."""
+    require_pyarrow()
+    metadata = pq.read_schema(path).metadata or {}
+    if METADATA_KEY not in metadata:
+        raise ValueError(f"{path}: not written by notif_columnar.py")
+    info = json.loads(metadata[METADATA_KEY])
+    if info["version"] != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported format version {info['version']}")
+    return info["layout"]
+
+
+def read_columns(path, columns=None):
+    """Load the given columns (default: all) as a pyarrow Table."""
+    require_pyarrow()
+    return pq.read_table(path, columns=list(columns) if columns else None)
+
+
+def iter_rows(path, columns=COLUMNS, batch_rows=BATCH_ROWS):
+    """Yield one dict per line, holding only the requested columns."""
+    require_pyarrow()
+    columns = list(columns)
+    parquet = pq.ParquetFile(path)
+    for batch in parquet.iter_batches(batch_size=batch_rows, columns=columns):
+        values = [batch.column(name).to_pylist() for name in columns]
+        for row in zip(*values):
+            yield dict(zip(columns, row))
+
+
+def _raw_entry(path, line_num, raw, errors):
+    """Parse a verbatim line like iter_json does: None for blank or recorded-invalid lines."""
+    line = raw.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        if errors is None:
+            raise
+        errors.append(ReadError(path.name, line_num, f"Invalid JSON - {e}"))
+        return None
+
+
+def iter_entries(path, errors=None):
+    """Parquet counterpart of notif_io.iter_json(): (source, line_num, entry)."""
+    path = Path(path)
+    to_entry = LAYOUTS[read_layout(path)][1]
+    for line_num, row in enumerate(iter_rows(path), 1):
+        if row[RAW] is None:
+            yield path.name, line_num, to_entry(row)
+            continue
+        entry = _raw_entry(path, line_num, row[RAW], errors)
+        if entry is not None:
+            yield path.name, line_num, entry
+
+
+def iter_parquet_records(path, projection, errors=None):
+    """
+    Parquet counterpart of notif_io.iter_records(), reading only the
+    columns the projection needs (plus the mostly-null _json column).
+    """
+    path = Path(path)
+    read_layout(path)
+    columns = [name for name in COLUMNS[:-1] if name == "id" and "id" in projection
+               or name in projection.get("notification", ())
+               or name in projection.get("classification", ())]
+
+    for line_num, row in enumerate(iter_rows(path, columns + [RAW]), 1):
+        raw = row[RAW]
+        if raw is not None:
+            entry = _raw_entry(path, line_num, raw, errors)
+            if entry is None:
+                continue
+            try:
+                yield to_record(entry, path.name, line_num, projection)
+            except (AttributeError, TypeError) as e:
+                if errors is None:
+                    raise
+                errors.append(ReadError(path.name, line_num, f"Invalid record - {e}"))
+            continue
+
+        notification = classification = None
+        if "notification" in projection:
+            notification = Notification(*(row.get(name) for name in NOTIFICATION_FIELDS))
+        if "classification" in projection:
+            classification = Classification(*(row.get(name) for name in CLASSIFICATION_FIELDS))
+        yield NotifRecord(row.get("id"), notification, classification, path.name, line_num)
+
+
+def export_jsonl(src, dst):
+    """Write a Parquet file back out as JSONL, byte for byte. Returns the line count."""
+    to_entry = LAYOUTS[read_layout(src)][1]
+    count = 0
+    with open(dst, "w", encoding="utf-8", newline="") as f:
+        for row in iter_rows(src):
+            f.write(_dumps(to_entry(row)) if row[RAW] is None else row[RAW])
+            count += 1
+    return count
+
+
+def verify(src):
+    """Round-trip src through Parquet; returns (identical, jsonl bytes, parquet bytes, lines, verbatim)."""
+    src = Path(src)
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet, lines, verbatim = convert_to_parquet(src, Path(tmp) / "data.parquet")
+        exported = Path(tmp) / "data.jsonl"
+        export_jsonl(parquet, exported)
+        identical = exported.read_bytes() == src.read_bytes()
+        return identical, src.stat().st_size, parquet.stat().st_size, lines, verbatim
+
+
+def _expand(inputs, suffix):
+    paths = []
+    for item in map(Path, inputs):
+        if item.is_dir():
+            paths.extend(jsonl_files(item) if suffix == ".jsonl" else sorted(item.glob(f"*{suffix}")))
+        else:
+            paths.append(item)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert notification datasets between JSONL and Parquet")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    to_parquet = commands.add_parser("to-parquet", help="JSONL -> Parquet (next to the input by default)")
+    to_parquet.add_argument("inputs", nargs="+", help="JSONL files or directories")
+    to_parquet.add_argument("-o", "--output", help="Output path (single input only)")
+
+    to_jsonl = commands.add_parser("to-jsonl", help="Parquet -> JSONL, byte-identical to the original")
+    to_jsonl.add_argument("input", help="Parquet file")
+    to_jsonl.add_argument("-o", "--output", help="Output path (default: input with .jsonl suffix)")
+
+    check = commands.add_parser("verify", help="Round-trip JSONL through Parquet and compare bytes")
+    check.add_argument("inputs", nargs="+", help="JSONL files or directories")
+
+    args = parser.parse_args()
+    require_pyarrow()
+
+    if args.command == "to-parquet":
+        paths = _expand(args.inputs, ".jsonl")
+        if args.output and len(paths) != 1:
+            parser.error("--output needs exactly one input file")
+        for path in paths:
+            dst, lines, verbatim = convert_to_parquet(path, args.output)
+            print(f"{path} -> {dst}: {lines:,} lines ({verbatim} verbatim), "
+                  f"{path.stat().st_size:,} -> {dst.stat().st_size:,} bytes")
+
+    elif args.command == "to-jsonl":
+        src = Path(args.input)
+        dst = Path(args.output) if args.output else src.with_suffix(".jsonl")
+        count = export_jsonl(src, dst)
+        print(f"{src} -> {dst}: {count:,} lines")
+
+    else:
+        failed = 0
+        for path in _expand(args.inputs, ".jsonl"):
+            identical, jsonl_size, parquet_size, lines, verbatim = verify(path)
+            status = "OK" if identical else "MISMATCH"
+            failed += not identical
+            print(f"[{status}] {path}: {lines:,} lines ({verbatim} verbatim), "
+                  f"{jsonl_size:,} -> {parquet_size:,} bytes ({parquet_size / jsonl_size:.1%})")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
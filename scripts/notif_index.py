@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Random access into JSONL datasets through a sidecar line-offset index.
+
+The first open of data/foo.jsonl scans it once and writes
+data/foo.jsonl.idx: the byte offset of every line. Later opens load
+the offsets, memory-map the JSONL file and slice lines out of it
+directly, so reading rows 6000..6100 or a random sample of 200 costs
+O(k) instead of parsing everything before them.
+
+The index records the file's size and mtime and is rebuilt when either
+changes. If the directory is read-only the offsets are kept in memory.
+
+Usage:
+    from notif_index import read_rows, sample_rows
+
+    examples = read_rows("data/training_data.jsonl", 6000, 6100)
+    examples = sample_rows("data/training_data.jsonl", 200, seed=0, start=6000)
+
+    # Build (or refresh) the .idx files up front
+    python notif_index.py data/*.jsonl
+"""
+
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+from array import array
+from pathlib import Path
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"NIDX"
+INDEX_VERSION = 1
+# magic, version, source size, source mtime_ns, line count
+HEADER = struct.Struct("<4sIQqQ")
+
+
+def index_path(path):
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def scan_offsets(path):
+    """Start offset of every line, plus the file size as the final end offset."""
+    offsets = array("Q", [0])
+    with open(path, "rb") as f:
+        position = 0
+        for line in f:
+            position += len(line)
+            offsets.append(position)
+    return offsets
+
+
+def _read_index(path, stat):
+    try:
+        with open(index_path(path), "rb") as f:
+            magic, version, size, mtime_ns, count = HEADER.unpack(f.read(HEADER.size))
+            if (magic, version, size, mtime_ns) != (INDEX_MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns):
+                return None
+            offsets = array("Q")
+            offsets.frombytes(f.read())
+    except (OSError, struct.error):
+        return None
+    if len(offsets) != count + 1 or offsets[-1] != stat.st_size:
+        return None
+    return offsets
+
+
+def _write_index(path, stat, offsets):
+    target = index_path(path)
+    temp = target.with_name(target.name + ".tmp")
+    try:
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, stat.st_size, stat.st_mtime_ns, len(offsets) - 1))
+            offsets.tofile(f)
+        os.replace(temp, target)
+    except OSError:
+        pass
+
+
+def load_offsets(path, rebuild=False):
+    """Offsets from the .idx sidecar, (re)building it when missing or stale."""
+    stat = os.stat(path)
+    offsets = None if rebuild else _read_index(path, stat)
+    if offsets is None:
+        offsets = scan_offsets(path)
+        _write_index(path, stat, offsets)
+    return offsets
+
+
+class LineIndex:
+    """
+    Memory-mapped JSONL file with O(1) access to any line.
+
+    Rows are physical lines (0-based), the same numbering as
+    enumerate(open(path)). Use as a context manager to release the map.
+    """
+
+    def __init__(self, path, rebuild=False):
+        self.path = Path(path)
+        self.offsets = load_offsets(self.path, rebuild)
+        self._file = open(self.path, "rb")
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def line(self, i):
+        """Raw bytes of line i, newline included."""
+        if not 0 <= i < len(self):
+            raise IndexError(f"line {i} out of range for {self.path.name} ({len(self)} lines)")
+        return self._map[self.offsets[i]:self.offsets[i + 1]]
+
+    def row(self, i):
+        """Parsed JSON of line i, or None for a blank line."""
+        line = self.line(i).strip()
+        return json.loads(line) if line else None
+
+    def rows(self, start=0, stop=None):
+        """Parsed rows start..stop (like a slice), skipping blank lines."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        for i in range(start, stop):
+            row = self.row(i)
+            if row is not None:
+                yield row
+
+    def sample(self, k, seed=None, start=0, stop=None):
+        """k distinct random rows from start..stop, returned in file order."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        population = range(start, stop)
+        picks = sorted(random.Random(seed).sample(population, min(k, len(population))))
+        return [row for row in map(self.row, picks) if row is not None]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_rows(path, start=0, stop=None):
+    """Rows start..stop of a JSONL file, read through its index."""
+    with LineIndex(path) as index:
+        return list(index.rows(start, stop))
+
+
+def sample_rows(path, k, seed=None, start=0, stop=None):
+    """k random rows from start..stop of a JSONL file, in file order."""
+    with LineIndex(path) as index:
+        return index.sample(k, seed, start, stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build .idx line-offset sidecars for JSONL files")
+    parser.add_argument("files", nargs="+", help="JSONL files to index")
+    parser.add_argument("--rebuild", action="store_true", help="Rescan even if the index is current")
+    args = parser.parse_args()
+
+    for path in args.files:
+        offsets = load_offsets(path, args.rebuild)
+        print(f"{path}: {len(offsets) - 1:,} lines -> {index_path(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for notification JSONL files.
+
+Every data script used to open its files and json.loads each line on
+its own. This module does it once, lazily:
+
+- iter_json() yields the raw dict for each non-blank line, for scripts
+  that need the exact input (validation, rewriting files).
+- iter_records() yields typed NotifRecord tuples. With fields=... only
+  the requested parts are built, and the rest of the line is dropped as
+  soon as it has been parsed, so memory stays flat on any file size.
+- newline_shards() / iter_range_lines() split one big file into
+  byte ranges that start on line boundaries, for process pools.
+- Paths ending in .parquet are read through notif_columnar.py; for
+  those, iter_records() loads only the columns its fields= need.
+- LengthStats keeps count/mean/min/max/median of text lengths without
+  storing one number per row.
+
+Bad lines are either raised or, when an errors list is passed, recorded
+as ReadError and skipped.
+"""
+
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+NOTIFICATION_FIELDS = ("app", "app_display_name", "title", "body")
+CLASSIFICATION_FIELDS = ("folder", "priority")
+SECTIONS = {"notification": NOTIFICATION_FIELDS, "classification": CLASSIFICATION_FIELDS}
+PARQUET_SUFFIX = ".parquet"
+
+
+class Notification(NamedTuple):
+    app: Optional[str]
+    app_display_name: Optional[str]
+    title: Optional[str]
+    body: Optional[str]
+
+
+class Classification(NamedTuple):
+    folder: Optional[str]
+    priority: Optional[int]
+
+
+class NotifRecord(NamedTuple):
+    id: Optional[str]
+    notification: Optional[Notification]
+    classification: Optional[Classification]
+    source: str
+    line_num: int
+
+
+class ReadError(NamedTuple):
+    source: str
+    line_num: int
+    message: str
+
+    def __str__(self):
+        return f"{self.source} line {self.line_num}: {self.message}"
+
+
+def jsonl_files(data_dir):
+    """Sorted .jsonl files directly inside data_dir."""
+    data_dir = Path(data_dir)
+    return sorted(data_dir / name for name in os.listdir(data_dir) if name.endswith(".jsonl"))
+
+
+def _as_paths(paths):
+    if isinstance(paths, (str, os.PathLike)):
+        return [Path(paths)]
+    return [Path(p) for p in paths]
+
+
+def iter_json(paths, errors=None):
+    """
+    Yield (source, line_num, entry) for every non-blank line.
+
+    source is the file name; line_num is 1-based. Invalid JSON raises
+    json.JSONDecodeError unless an errors list is given.
+    """
+    for path in _as_paths(paths):
+        if path.suffix == PARQUET_SUFFIX:
+            from notif_columnar import iter_entries
+            yield from iter_entries(path, errors)
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e:
+                    if errors is None:
+                        raise
+                    errors.append(ReadError(path.name, line_num, f"Invalid JSON - {e}"))
+                    continue
+                yield path.name, line_num, entry
+
+
+def newline_shards(path, n_shards):
+    """
+    Split a file into at most n_shards (start, end) byte ranges.
+
+    Every range starts at the beginning of a line, so each one can be
+    read on its own; together they cover the file exactly once.
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n_shards):
+            target = size * i // n_shards
+            if target <= bounds[-1]:
+                continue
+            # Finish the line that contains byte target-1; the next line starts the shard
+            f.seek(target - 1)
+            f.readline()
+            start = f.tell()
+            if start >= size:
+                break
+            if start > bounds[-1]:
+                bounds.append(start)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def iter_range_lines(path, start, end):
+    """Yield the decoded lines (newline included) of a newline-aligned byte range."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode("utf-8")
+
+
+def parse_projection(fields):
+    """
+    Turn ("classification", "notification.title") into
+    {"classification": ("folder", "priority"), "notification": ("title",)}.
+
+    None means every section and field.
+    """
+    if fields is None:
+        return {"id": None, **SECTIONS}
+
+    projection = {}
+    for field in fields:
+        section, _, name = field.partition(".")
+        if section == "id":
+            projection["id"] = None
+            continue
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown field: {field}")
+        if not name:
+            projection[section] = SECTIONS[section]
+            continue
+        if name not in SECTIONS[section]:
+            raise ValueError(f"Unknown field: {field}")
+        current = projection.get(section, ())
+        if name not in current:
+            projection[section] = current + (name,)
+    return projection
+
+
+def _build(cls, all_fields, wanted, data):
+    if not isinstance(data, dict):
+        raise TypeError(f"expected an object, got {type(data).__name__}")
+    return cls(*(data.get(name) if name in wanted else None for name in all_fields))
+
+
+def to_record(entry, source="", line_num=0, fields=None):
+    """Build a NotifRecord from a parsed entry, keeping only the projected fields."""
+    projection = fields if isinstance(fields, dict) else parse_projection(fields)
+
+    notification = None
+    if "notification" in projection:
+        notification = _build(Notification, NOTIFICATION_FIELDS, projection["notification"],
+                               entry.get("notification", {}))
+
+    classification = None
+    if "classification" in projection:
+        classification = _build(Classification, CLASSIFICATION_FIELDS, projection["classification"],
+                                entry.get("classification", {}))
+
+    return NotifRecord(
+        entry.get("id") if "id" in projection else None,
+        notification,
+        classification,
+        source,
+        line_num,
+    )
+
+
+def iter_records(paths, fields=None, errors=None):
+    """
+    Yield a NotifRecord per line of one or more JSONL (or Parquet) files.
+
+    fields selects what to build, e.g. ("classification",) or
+    ("classification.folder", "notification.title"); unselected parts
+    are None. Missing keys inside a selected section are None too.
+    """
+    projection = parse_projection(fields)
+    for path in _as_paths(paths):
+        if path.suffix == PARQUET_SUFFIX:
+            from notif_columnar import iter_parquet_records
+            yield from iter_parquet_records(path, projection, errors)
+            continue
+        for source, line_num, entry in iter_json(path, errors):
+            try:
+                record = to_record(entry, source, line_num, projection)
+            except (AttributeError, TypeError) as e:
+                if errors is None:
+                    raise
+                errors.append(ReadError(source, line_num, f"Invalid record - {e}"))
+                continue
+            yield record
+
+
+def write_jsonl(path, entries):
+    """
+    Write dict entries one per line, in the same format as the dataset files.
+
+    entries may be a lazy generator over the file being replaced, or
+    raise partway through, so the lines go to a sibling temp file that
+    only replaces path once every entry has been written.
+    """
+    path = Path(path)
+    temp = path.with_name(path.name + ".tmp")
+    count = 0
+    try:
+        with open(temp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                count += 1
+        os.replace(temp, path)
+    finally:
+        if temp.exists():
+            temp.unlink()
+    return count
+
+
+class LengthStats:
+    """Streaming length summary; a Counter of lengths stands in for the full list."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.count = 0
+        self.total = 0
+
+    def add(self, length):
+        self.counts[length] += 1
+        self.count += 1
+        self.total += length
+
+    def merge(self, other):
+        """Fold in another LengthStats (e.g. from a parallel shard)."""
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def min(self):
+        return min(self.counts) if self.counts else 0
+
+    @property
+    def max(self):
+        return max(self.counts) if self.counts else 0
+
+    @property
+    def median(self):
+        """Upper median, same as sorted(lengths)[len(lengths) // 2]."""
+        if not self.count:
+            return 0
+        target = self.count // 2
+        seen = 0
+        for length in sorted(self.counts):
+            seen += self.counts[length]
+            if seen > target:
+                return length
+        return self.max
+
+    def to_json(self):
+        return {"count": self.count, "mean": self.mean, "min": self.min,
+                "max": self.max, "median": self.median}
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Notification classification service with a result cache.
+
+Real notification streams repeat heavily: "群消息99+", "Your OTP is 4821",
+the same Slack channel titles all day. ClassificationService puts an
+LRU/TTL cache in front of the model, keyed on
+
+    (model+prompt version, app package, normalized title, normalized body)
+
+where normalization masks digits and URLs, folds case and width and
+collapses whitespace, so "Your OTP is 4821" and "Your OTP is 0937"
+share one entry. The version hash covers the model file and the prompt
+format, so a new model or prompt never reads stale labels.
+
+An optional second tier (semantic_cache.SemanticCache) catches near
+duplicates the exact key misses, by embedding similarity within the
+same app. An optional package prior (package_prior.PackagePrior) runs
+before both and answers apps the training data always files the same
+way without touching the model.
+
+The model side is any classify(notif) -> (folder, priority) callable;
+backend_classifier() wraps a benchmarks/ backend and prompt format, so
+the service uses the same prompt builders and parsers as the benchmarks.
+
+Replay a dataset through the service (labels stand in for the model)
+to see how many model calls the cache would skip:
+    python notif_service.py replay data/training_data_full_3level.jsonl --capacity 4096 --ttl 3600
+
+The semantic tier is off unless --semantic-threshold is given; choose
+the threshold from benchmarks/semantic_cache_sweep.py (precision per
+threshold), e.g. with THRESHOLD set from its results:
+    python benchmarks/semantic_cache_sweep.py --name 010-semantic-cache
+    python notif_service.py replay data/training_data_full_3level.jsonl --semantic-threshold $THRESHOLD
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from fix_package_names import PACKAGE_NAME_MAP
+from notif_io import iter_records
+
+BENCHMARKS_DIR = Path(__file__).parent.parent / "benchmarks"
+DEFAULT_CAPACITY = 4096
+DEFAULT_TTL = 3600.0  # seconds
+
+URL_RE = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+DIGITS_RE = re.compile(r"\d+")
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """NFKC, URLs -> <url>, digit runs -> #, case-folded, whitespace collapsed."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = URL_RE.sub("<url>", text)
+    text = DIGITS_RE.sub("#", text)
+    return SPACE_RE.sub(" ", text).strip().casefold()
+
+
+def canonical_package(app):
+    """Android package for an app name ("slack" and "com.slack" are the same app)."""
+    app = (app or "").strip().lower()
+    return PACKAGE_NAME_MAP.get(app, app)
+
+
+def cache_key(notif, version=""):
+    return (
+        version,
+        canonical_package(notif.get("app") or notif.get("app_display_name")),
+        normalize_text(notif.get("title")),
+        normalize_text(notif.get("body")),
+    )
+
+
+def version_hash(*parts):
+    """Short hash of whatever identifies the model and prompt."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    LRU cache with a per-entry time to live.
+
+    clock is injectable so a replay can run on simulated time.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (stored_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and self.ttl is not None and self.clock() - entry[0] > self.ttl:
+            del self.entries[key]
+            self.expired += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self.entries[key] = (self.clock(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl,
+            "entries": len(self.entries),
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+class ClassificationService:
+    """
+    classify(notif) -> (folder, priority, source), where source says
+    which layer answered ("prior", "cache", "semantic" or "model").
+    Answers the model could not parse are returned but never cached.
+    Prior and semantic answers are not written back to the caches, so
+    every stored label comes from the model.
+    """
+
+    def __init__(self, classify, version, cache=None, semantic=None, prior=None):
+        self.model_classify = classify
+        self.version = version
+        self.cache = cache if cache is not None else ResultCache()
+        self.semantic = semantic
+        self.prior = prior
+        self.model_calls = 0
+        self.model_seconds = 0.0
+
+    def classify(self, notif):
+        if self.prior is not None:
+            label = self.prior.lookup(notif)
+            if label is not None:
+                return (*label, "prior")
+        key = cache_key(notif, self.version)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return (*cached, "cache")
+        if self.semantic is not None:
+            near = self.semantic.lookup(notif)
+            if near is not None:
+                return (*near[0], "semantic")
+
+        start = time.perf_counter()
+        folder, priority = self.model_classify(notif)
+        self.model_seconds += time.perf_counter() - start
+        self.model_calls += 1
+        if folder is not None:
+            self.cache.put(key, (folder, priority))
+            if self.semantic is not None:
+                self.semantic.add(notif, (folder, priority))
+        return folder, priority, "model"
+
+    def stats(self):
+        stats = {
+            "version": self.version,
+            "model_calls": self.model_calls,
+            "model_seconds": self.model_seconds,
+            "cache": self.cache.stats(),
+        }
+        if self.semantic is not None:
+            stats["semantic"] = self.semantic.stats()
+        if self.prior is not None:
+            stats["prior"] = self.prior.stats()
+        return stats
+
+
+def backend_classifier(backend, fmt):
+    """classify(notif) over a loaded benchmarks/backends.py backend and its prompt format."""
+    def classify(notif):
+        generation = backend.generate(backend.build_prompt(notif))
+        return fmt.parse(generation["text"])
+    return classify
+
+
+def backend_version(backend, fmt):
+    """Version hash of a backend's model files and the prompt format."""
+    info = backend.describe()
+    files = []
+    for path in (info.get("model"), info.get("adapter")):
+        if path and Path(path).exists():
+            stat = Path(path).stat()
+            files.append([str(path), stat.st_size, stat.st_mtime_ns])
+    prompt = fmt.system_prefix() if hasattr(fmt, "system_prefix") else None
+    return version_hash(files, fmt.name, prompt)
+
+
+def load_service(backend_name, model, format_name, capacity=DEFAULT_CAPACITY, ttl=DEFAULT_TTL, semantic=None,
+                 prior=None, **backend_kwargs):
+    """
+    ClassificationService over a benchmarks/ backend, e.g. ("llama-cpp",
+    "model.gguf", "qwen-notif"). semantic is an optional SemanticCache
+    (give it the same ttl), prior an optional PackagePrior.
+    """
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+    from backends import BACKENDS
+    from formats import FORMATS
+
+    fmt = FORMATS[format_name]()
+    backend = BACKENDS[backend_name](fmt, model, **backend_kwargs)
+    backend.load()
+    return ClassificationService(backend_classifier(backend, fmt), backend_version(backend, fmt),
+                                 ResultCache(capacity, ttl), semantic, prior)
+
+
+def replay(paths, capacity=DEFAULT_CAPACITY, ttl=DEFAULT_TTL, rate=60.0, semantic=None, labels=None, prior=None):
+    """
+    Feed every notification of the dataset through a ClassificationService
+    in file order, `rate` notifications per simulated minute. The stored
+    label plays the model, or labels ({row index: (folder, priority)},
+    e.g. a model's own predictions) when given; rows without an entry
+    are skipped. semantic is an optional SemanticCache tier (put on the
+    replay's clock), prior an optional PackagePrior. Returns a report
+    dict.
+    """
+    clock = [0.0]
+    current = {}
+
+    def label_model(notif):
+        return current["label"]
+
+    cache = ResultCache(capacity, ttl, clock=lambda: clock[0])
+    if semantic is not None:
+        # Both tiers expire on the simulated clock
+        semantic.clock = cache.clock
+    service = ClassificationService(label_model, "replay", cache, semantic, prior)
+
+    total = 0
+    answered = {"prior": 0, "cache": 0, "semantic": 0}
+    agree = {"prior": 0, "cache": 0, "semantic": 0}
+    folder_agree = 0
+    start = time.perf_counter()
+    for i, record in enumerate(iter_records(paths, fields=("notification", "classification"))):
+        if labels is None:
+            current["label"] = (record.classification.folder, record.classification.priority)
+        elif i in labels:
+            current["label"] = labels[i]
+        else:
+            continue
+        folder, priority, source = service.classify(record.notification._asdict())
+        if source != "model":
+            answered[source] += 1
+            agree[source] += (folder, priority) == current["label"]
+            if source == "semantic":
+                folder_agree += folder == current["label"][0]
+        total += 1
+        clock[0] += 60.0 / rate
+    elapsed = time.perf_counter() - start
+
+    stats = service.stats()
+    reused = total - stats["model_calls"]
+    report = {
+        "total": total,
+        "model_calls": stats["model_calls"],
+        "skipped_rate": reused / total if total else 0.0,
+        # Share of cached answers that match the label of the notification they answered
+        "reuse_agreement": agree["cache"] / answered["cache"] if answered["cache"] else None,
+        "simulated_minutes": total / rate,
+        "overhead_us_per_notification": elapsed / total * 1e6 if total else 0.0,
+        **{k: v for k, v in stats.items() if k not in ("model_calls", "model_seconds", "version")},
+    }
+    if semantic is not None:
+        report["semantic_answers"] = answered["semantic"]
+        report["semantic_agreement"] = agree["semantic"] / answered["semantic"] if answered["semantic"] else None
+        report["semantic_folder_agreement"] = folder_agree / answered["semantic"] if answered["semantic"] else None
+    if prior is not None:
+        report["prior_answers"] = answered["prior"]
+        report["prior_agreement"] = agree["prior"] / answered["prior"] if answered["prior"] else None
+    return report
+
+
+def print_report(report):
+    cache = report["cache"]
+    print(f"Notifications:      {report['total']:,} ({report['simulated_minutes']:.0f} simulated minutes)")
+    print(f"Model calls:        {report['model_calls']:,}")
+    print(f"Skipped:            {report['skipped_rate']*100:.1f}%")
+    if report.get("prior") is not None:
+        print(f"Prior answers:      {report['prior_answers']:,} ({report['prior']['packages']} packages)")
+        if report["prior_agreement"] is not None:
+            print(f"Prior label right:  {report['prior_agreement']*100:.1f}%")
+    if report["reuse_agreement"] is not None:
+        print(f"Reused label right: {report['reuse_agreement']*100:.1f}%")
+    print(f"Cache hit rate:     {cache['hit_rate']*100:.1f}% "
+          f"({cache['hits']:,} hits, {cache['expired']:,} expired, {cache['evictions']:,} evicted)")
+    semantic = report.get("semantic")
+    if semantic is not None:
+        print(f"Semantic hits:      {report['semantic_answers']:,} "
+              f"(threshold {semantic['threshold']}, {semantic['encoder']}, {semantic['index']} index)")
+        if report["semantic_agreement"] is not None:
+            print(f"Semantic label right: {report['semantic_agreement']*100:.1f}% "
+                  f"(folder {report['semantic_folder_agreement']*100:.1f}%)")
+        print(f"Semantic lookup:    {semantic['mean_lookup_us']:.1f} us per lookup")
+    print(f"Cache overhead:     {report['overhead_us_per_notification']:.1f} us per notification")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classification service cache tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("replay", help="Replay a dataset through the cache and report the hit rate")
+    p.add_argument("files", nargs="+", help="Notification JSONL/Parquet files, replayed in order")
+    p.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="Max cached entries")
+    p.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Entry lifetime in seconds")
+    p.add_argument("--rate", type=float, default=60.0, help="Simulated notifications per minute")
+    p.add_argument("--semantic-threshold", type=float, default=None,
+                   help="Add the semantic near-duplicate tier at this cosine similarity")
+    p.add_argument("--semantic-index", choices=["auto", "hnsw", "exact"], default="auto",
+                   help="Semantic index: hnswlib if installed (auto), or exact numpy search")
+    p.add_argument("--encoder", default="hashing",
+                   help="Semantic encoder: 'hashing' or a sentence-transformers model name")
+    p.add_argument("--prior", help="Package prior JSON (package_prior.py build) answered before the caches")
+    p.add_argument("--prior-max-entropy", type=float, default=None,
+                   help="Folder/priority entropy threshold in bits for the prior (default: package_prior's)")
+    p.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    semantic = None
+    if args.semantic_threshold is not None:
+        from semantic_cache import SemanticCache, make_encoder
+        semantic = SemanticCache(make_encoder(args.encoder), args.semantic_threshold, args.capacity,
+                                 args.semantic_index, ttl=args.ttl)
+    prior = None
+    if args.prior:
+        from package_prior import PackagePrior
+        kwargs = {} if args.prior_max_entropy is None else {"max_entropy": args.prior_max_entropy}
+        prior = PackagePrior.load(args.prior, **kwargs)
+    report = replay(args.files, args.capacity, args.ttl, args.rate, semantic, prior=prior)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Per-package prior: answer from the app package alone when the training
+data says the app is (almost) always filed the same way.
+
+build_prior() counts folders and priorities per canonical package
+(fix_package_names.PACKAGE_NAME_MAP folds "slack" into "com.slack") over
+the training slice and records each package's majority labels and
+label entropy in bits. PackagePrior.lookup() answers with the majority
+(folder, priority) for packages with enough rows whose folder and
+priority entropies are under the thresholds; everything else goes to
+the model. ClassificationService(prior=...) puts it in front of the
+caches.
+
+With the defaults that is the fashion apps (uniqlo, zara, gap, shein,
+com.hm.goe: Promotions, priority 1) and android (Alerts, priority 1).
+Apps like com.chase.sig.android or com.ups.mobile.android are always
+Alerts but spread over priorities (1.58 and 0.69 bits), so they only
+pass with --max-priority-entropy raised.
+
+Build the table, then measure it on the held-out rows (12000+):
+    python package_prior.py build data/training_data_full_3level.jsonl -o models/package_prior.json
+    python package_prior.py evaluate data/training_data_full_3level.jsonl
+    python package_prior.py evaluate data/training_data_full_3level.jsonl \\
+        --model-results benchmarks/006-finetune-qwen3-notif/results.json
+"""
+
+import argparse
+import json
+import math
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from notif_io import iter_records
+from notif_service import canonical_package
+
+TRAIN_ROWS = 12000  # rows 0..11999 are the training slice
+DEFAULT_MIN_COUNT = 20
+DEFAULT_MAX_ENTROPY = 0.1  # bits
+ENTROPY_SWEEP = [0.0, 0.05, 0.1, 0.2, 0.3, 0.5]
+
+
+def entropy(counts):
+    """Shannon entropy in bits of a Counter."""
+    total = sum(counts.values())
+    return max(0.0, -sum(c / total * math.log2(c / total) for c in counts.values() if c))
+
+
+def notif_package(notif):
+    return canonical_package(notif.get("app") or notif.get("app_display_name"))
+
+
+def build_prior(path, start=0, stop=TRAIN_ROWS):
+    """{package: stats} over rows start..stop-1 of a labelled dataset."""
+    folders = defaultdict(Counter)
+    priorities = defaultdict(Counter)
+    for i, record in enumerate(iter_records([path], fields=("notification", "classification"))):
+        if i < start:
+            continue
+        if stop is not None and i >= stop:
+            break
+        package = notif_package(record.notification._asdict())
+        folders[package][record.classification.folder] += 1
+        priorities[package][record.classification.priority] += 1
+
+    table = {}
+    for package, folder_counts in folders.items():
+        count = sum(folder_counts.values())
+        folder, folder_top = folder_counts.most_common(1)[0]
+        priority, priority_top = priorities[package].most_common(1)[0]
+        table[package] = {
+            "count": count,
+            "folder": folder,
+            "folder_share": folder_top / count,
+            "folder_entropy": entropy(folder_counts),
+            "priority": priority,
+            "priority_share": priority_top / count,
+            "priority_entropy": entropy(priorities[package]),
+            "folders": dict(folder_counts.most_common()),
+        }
+    return table
+
+
+class PackagePrior:
+    """
+    lookup(notif) -> (folder, priority) for packages that pass the
+    thresholds, else None. max_priority_entropy defaults to
+    max_entropy; pass float("inf") to answer folder-deterministic apps
+    with their majority priority.
+    """
+
+    def __init__(self, table, min_count=DEFAULT_MIN_COUNT, max_entropy=DEFAULT_MAX_ENTROPY,
+                 max_priority_entropy=None):
+        if max_priority_entropy is None:
+            max_priority_entropy = max_entropy
+        self.table = table
+        self.min_count = min_count
+        self.max_entropy = max_entropy
+        self.max_priority_entropy = max_priority_entropy
+        self.rules = {
+            package: (stats["folder"], stats["priority"])
+            for package, stats in table.items()
+            if stats["count"] >= min_count
+            and stats["folder_entropy"] <= max_entropy
+            and stats["priority_entropy"] <= max_priority_entropy
+        }
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        return cls(json.loads(Path(path).read_text(encoding="utf-8"))["packages"], **kwargs)
+
+    def lookup(self, notif):
+        label = self.rules.get(notif_package(notif))
+        if label is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return label
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "packages": len(self.rules),
+            "min_count": self.min_count,
+            "max_entropy": self.max_entropy,
+            "max_priority_entropy": self.max_priority_entropy,
+            "lookups": lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def save_prior(table, path, source, start, stop):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    packages = dict(sorted(table.items(), key=lambda kv: -kv[1]["count"]))
+    payload = {"source": str(source), "rows": [start, stop], "packages": packages}
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def load_model_predictions(path):
+    """{row index: (folder, priority)} from a benchmarks/run.py results.json; unparsed answers are (None, None)."""
+    results = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {r["index"]: (r["predicted_folder"], r["predicted_priority"]) for r in results["examples"]}
+
+
+def evaluate(prior, path, start=TRAIN_ROWS, stop=None, predictions=None):
+    """
+    Run the prior over held-out rows. Without predictions the model is
+    taken to be right on every row it keeps, so "accuracy" is only the
+    prior's own; with a run.py predictions map, only the rows it covers
+    are scored and model-only accuracy is compared with prior+model.
+    """
+    total = skipped = 0
+    prior_folder = prior_both = 0
+    model_folder = model_both = 0
+    hybrid_folder = hybrid_both = 0
+    for i, record in enumerate(iter_records([path], fields=("notification", "classification"))):
+        if i < start:
+            continue
+        if stop is not None and i >= stop:
+            break
+        if predictions is not None and i not in predictions:
+            continue
+        expected = (record.classification.folder, record.classification.priority)
+        model = predictions[i] if predictions is not None else expected
+        answer = prior.rules.get(notif_package(record.notification._asdict()))
+
+        total += 1
+        model_folder += model[0] == expected[0]
+        model_both += model == expected
+        if answer is not None:
+            skipped += 1
+            prior_folder += answer[0] == expected[0]
+            prior_both += answer == expected
+        final = answer if answer is not None else model
+        hybrid_folder += final[0] == expected[0]
+        hybrid_both += final == expected
+
+    def rate(n, d):
+        return n / d if d else None
+
+    return {
+        "max_entropy": prior.max_entropy,
+        "max_priority_entropy": prior.max_priority_entropy,
+        "packages": len(prior.rules),
+        "rows": total,
+        "skipped_rate": rate(skipped, total),
+        "prior_folder_accuracy": rate(prior_folder, skipped),
+        "prior_combined_accuracy": rate(prior_both, skipped),
+        "model_folder_accuracy": rate(model_folder, total) if predictions is not None else None,
+        "model_combined_accuracy": rate(model_both, total) if predictions is not None else None,
+        "hybrid_folder_accuracy": rate(hybrid_folder, total) if predictions is not None else None,
+        "hybrid_combined_accuracy": rate(hybrid_both, total) if predictions is not None else None,
+    }
+
+
+def pct(value):
+    return f"{value*100:.1f}%" if value is not None else "-"
+
+
+def print_evaluation(rows):
+    print(f"{'Max H':>6} {'Prio H':>6} {'Pkgs':>5} {'Rows':>6} {'Skipped':>8} {'Prior F':>8} {'Prior FP':>9} "
+          f"{'Model FP':>9} {'Hybrid FP':>10} {'Delta':>7}")
+    for r in rows:
+        delta = None
+        if r["model_combined_accuracy"] is not None:
+            delta = r["hybrid_combined_accuracy"] - r["model_combined_accuracy"]
+        print(f"{r['max_entropy']:>6.2f} {r['max_priority_entropy']:>6.2f} {r['packages']:>5} {r['rows']:>6} "
+              f"{pct(r['skipped_rate']):>8} {pct(r['prior_folder_accuracy']):>8} "
+              f"{pct(r['prior_combined_accuracy']):>9} {pct(r['model_combined_accuracy']):>9} "
+              f"{pct(r['hybrid_combined_accuracy']):>10} {(f'{delta*100:+.1f}' if delta is not None else '-'):>7}")
+    print("\nF = folder accuracy, FP = folder and priority both right; Prior columns are over skipped rows only.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-package label prior")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="Build the prior table from the training slice")
+    p.add_argument("file", help="Labelled notification JSONL/Parquet")
+    p.add_argument("-o", "--output", required=True, help="Output JSON")
+    p.add_argument("--start", type=int, default=0)
+    p.add_argument("--stop", type=int, default=TRAIN_ROWS, help="First row not used (held-out start)")
+
+    p = sub.add_parser("evaluate", help="Skip rate and accuracy change on the held-out rows")
+    p.add_argument("file", help="Labelled notification JSONL/Parquet")
+    p.add_argument("--prior", help="Prior JSON from 'build' (default: built from rows before --start)")
+    p.add_argument("--start", type=int, default=TRAIN_ROWS, help="First held-out row")
+    p.add_argument("--stop", type=int)
+    p.add_argument("--model-results", help="benchmarks/run.py results.json with the model's predictions")
+    p.add_argument("--min-count", type=int, default=DEFAULT_MIN_COUNT)
+    p.add_argument("--max-entropy", type=float, nargs="+", default=ENTROPY_SWEEP,
+                   help="Folder entropy thresholds (bits) to evaluate")
+    p.add_argument("--max-priority-entropy", type=float,
+                   help="Priority entropy threshold (default: same as --max-entropy)")
+    p.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        table = build_prior(args.file, args.start, args.stop)
+        save_prior(table, args.output, args.file, args.start, args.stop)
+        print(f"{len(table)} packages from rows {args.start}..{args.stop} -> {args.output}")
+        return
+
+    if args.prior:
+        table = json.loads(Path(args.prior).read_text(encoding="utf-8"))["packages"]
+    else:
+        table = build_prior(args.file, 0, args.start)
+    predictions = load_model_predictions(args.model_results) if args.model_results else None
+    rows = [
+        evaluate(PackagePrior(table, args.min_count, max_entropy, args.max_priority_entropy),
+                 args.file, args.start, args.stop, predictions)
+        for max_entropy in args.max_entropy
+    ]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_evaluation(rows)
+
+
+if __name__ == "__main__":
+    main()
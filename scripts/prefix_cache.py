@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Reuse the system prompt KV cache across notifications.
+
+Mirrors the Android fast path from benchmark 008: the system prompt is
+prefilled once, and every notification only prefills its own user turn
+on top of a copy of that cache.
+"""
+
+import copy
+import torch
+
+
+def system_prefix_text(tokenizer, system_prompt, **template_kwargs):
+    """Render only the system turn with the same chat template as the full prompt."""
+    return tokenizer.apply_chat_template(
+        [{"role": "system", "content": system_prompt}],
+        tokenize=False,
+        add_generation_prompt=False,
+        **template_kwargs
+    )
+
+
+class SystemPromptCache:
+    """Prefill a shared prompt prefix once and reuse its past_key_values."""
+
+    def __init__(self, model, tokenizer, prefix_text):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prefix_text = prefix_text
+        self.prefix_ids = tokenizer(prefix_text, return_tensors="pt")["input_ids"].to(model.device)
+        self.prefix_len = self.prefix_ids.shape[1]
+
+        with torch.no_grad():
+            outputs = model(input_ids=self.prefix_ids, use_cache=True)
+        self.cache = outputs.past_key_values
+
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        # Prompt tokens covered by the cache on the latest checkout()
+        self.last_cached_tokens = 0
+
+    def split(self, chat_text):
+        """
+        Tokenize a full prompt and check it starts with the cached prefix.
+
+        Returns (input_ids, reusable). Prompts whose tokenization does not
+        line up with the prefix fall back to a full prefill.
+        """
+        input_ids = self.tokenizer(chat_text, return_tensors="pt")["input_ids"].to(self.model.device)
+        reusable = (
+            chat_text.startswith(self.prefix_text)
+            and input_ids.shape[1] > self.prefix_len
+            and torch.equal(input_ids[0, :self.prefix_len], self.prefix_ids[0])
+        )
+        return input_ids, reusable
+
+    def checkout(self, chat_text):
+        """
+        Tokenize a prompt and hand out a private copy of the prefix cache.
+
+        Returns (input_ids, past_key_values); past_key_values is None when
+        the prompt can't reuse the prefix.
+        """
+        input_ids, reusable = self.split(chat_text)
+        if not reusable:
+            self.misses += 1
+            self.last_cached_tokens = 0
+            return input_ids, None
+
+        self.hits += 1
+        self.tokens_saved += self.prefix_len
+        self.last_cached_tokens = self.prefix_len
+        return input_ids, copy.deepcopy(self.cache)
+
+    def generate(self, chat_text, **generate_kwargs):
+        """
+        Generate for one prompt, reusing the prefix cache when possible.
+
+        Returns (output_ids, prompt_len).
+        """
+        input_ids, past_key_values = self.checkout(chat_text)
+        attention_mask = torch.ones_like(input_ids)
+
+        if past_key_values is not None:
+            # generate() only prefills the positions not covered by the cache
+            generate_kwargs["past_key_values"] = past_key_values
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                **generate_kwargs
+            )
+
+        return outputs, input_ids.shape[1]
+
+    def stats(self):
+        """Summary counters for the results JSON."""
+        return {
+            "prefix_tokens": self.prefix_len,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "prefill_tokens_saved": self.tokens_saved,
+        }
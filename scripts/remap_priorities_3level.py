@@ -6,12 +6,17 @@ Mapping strategy:
 - Old Priority 1, 2 → New Priority 1 (Low/Mute)
 - Old Priority 3 → New Priority 2 (Medium/Normal)
 - Old Priority 4, 5 → New Priority 3 (High/Urgent)
+
+The input may also be a .parquet copy made by notif_columnar.py:
+    python remap_priorities_3level.py --input data/training_data.parquet
 """
 
-import json
+import argparse
 from pathlib import Path
 from collections import Counter
 
+from notif_io import iter_json, write_jsonl
+
 INPUT_FILE = Path(__file__).parent.parent / "training_data.jsonl"
 OUTPUT_FILE = Path(__file__).parent.parent / "training_data_3level.jsonl"
 
@@ -27,20 +32,22 @@ def remap_priority(old_priority):
         raise ValueError(f"Invalid priority: {old_priority}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Remap 5-level priorities to 3 levels")
+    parser.add_argument("--input", type=Path, default=INPUT_FILE, help="JSONL or Parquet dataset")
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE, help="JSONL output")
+    args = parser.parse_args()
+
     print("="*70)
     print("REMAP PRIORITIES: 5 LEVELS TO 3 LEVELS")
     print("="*70)
     print()
 
-    # Read and remap
-    examples = []
+    # Stream: read, remap and write one example at a time
     old_priority_counts = Counter()
     new_priority_counts = Counter()
 
-    print(f"Reading from: {INPUT_FILE}")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            example = json.loads(line)
+    def remapped(examples):
+        for _, _, example in examples:
             old_priority = example["classification"]["priority"]
             old_priority_counts[old_priority] += 1
 
@@ -49,23 +56,27 @@ def main():
             example["classification"]["priority"] = new_priority
             new_priority_counts[new_priority] += 1
 
-            examples.append(example)
+            yield example
 
-    print(f"Total examples: {len(examples)}")
+    print(f"Reading from: {args.input}")
+    print(f"Saving to: {args.output}")
+    total = write_jsonl(args.output, remapped(iter_json(args.input)))
+
+    print(f"Total examples: {total}")
     print()
 
     # Show mapping
     print("OLD PRIORITY DISTRIBUTION (5 levels):")
     for priority in sorted(old_priority_counts.keys()):
         count = old_priority_counts[priority]
-        pct = count / len(examples) * 100
+        pct = count / total * 100
         print(f"  Priority {priority}: {count:5} ({pct:5.1f}%)")
 
     print()
     print("NEW PRIORITY DISTRIBUTION (3 levels):")
     for priority in sorted(new_priority_counts.keys()):
         count = new_priority_counts[priority]
-        pct = count / len(examples) * 100
+        pct = count / total * 100
         print(f"  Priority {priority}: {count:5} ({pct:5.1f}%)")
 
     print()
@@ -74,19 +85,12 @@ def main():
     print(f"  Old 3   -> New 2: {old_priority_counts[3]} examples")
     print(f"  Old 4+5 -> New 3: {old_priority_counts[4] + old_priority_counts[5]} examples")
 
-    # Save
-    print()
-    print(f"Saving to: {OUTPUT_FILE}")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        for example in examples:
-            f.write(json.dumps(example, ensure_ascii=False) + '\n')
-
     print()
     print("="*70)
     print("REMAP COMPLETE")
     print("="*70)
-    print(f"Remapped {len(examples)} examples")
-    print(f"Saved to: {OUTPUT_FILE}")
+    print(f"Remapped {total} examples")
+    print(f"Saved to: {args.output}")
     print()
 
 if __name__ == "__main__":
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Semantic near-duplicate tier for the classification cache.
+
+The exact cache in notif_service.py only catches repeats after digit
+and URL masking. Templated notifications (the same Amazon promo with
+another product, a UPS update with another tracking number) differ in
+words, not just numbers. SemanticCache embeds each classified
+notification, keeps the vectors in an in-memory index and reuses the
+label of the nearest neighbour from the same app when the cosine
+similarity passes a threshold.
+
+There is no default threshold: on the 3-level replay no value in
+benchmarks/semantic_cache_sweep.py comes close to the exact cache's
+label agreement (0.97 reuses the right folder and priority only ~73% of
+the time), so pick one from the sweep for your data and model.
+
+Encoders (CPU only):
+- HashingEncoder (default): signed hashed character 1-3 grams of the
+  normalized "package | title | body" text. No model download, works
+  for mixed Chinese/English. Encoding takes about 60 us; a lookup
+  (encode plus index search) measured 180-230 us on the 3-level
+  replay, paid on every exact-cache miss.
+- SentenceTransformerEncoder: any sentence-transformers model, e.g.
+  paraphrase-multilingual-MiniLM-L12-v2 (needs sentence-transformers).
+
+Indexes:
+- HnswIndex: approximate search with hnswlib, if installed.
+- BruteForceIndex: exact dot products over a numpy ring buffer,
+  restricted to the rows of the notification's app.
+
+Both indexes hold at most `capacity` entries and drop the oldest.
+Entries also expire after the same TTL as the exact cache, on the same
+clock, so the tier never serves a label the exact cache has dropped.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+from notif_service import DEFAULT_TTL, canonical_package, normalize_text
+
+DEFAULT_CAPACITY = 4096
+DEFAULT_NEIGHBOURS = 4
+
+_MULTIPLIER = np.uint64(0x100000001B3)  # FNV-1 64-bit prime
+
+
+class HashingEncoder:
+    """
+    Signed feature hashing of character n-grams, L2-normalized. Only the
+    first max_chars characters are encoded; past that, long bodies add
+    cost but rarely change the nearest neighbour.
+    """
+
+    def __init__(self, dim=256, ngrams=(1, 2, 3), max_chars=256):
+        self.dim = dim
+        self.ngrams = ngrams
+        self.max_chars = max_chars
+        self.name = f"hashing-{dim}"
+
+    def encode(self, text):
+        codes = np.frombuffer(text[:self.max_chars].encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        hashes = []
+        for n in self.ngrams:
+            if len(codes) < n:
+                continue
+            h = np.full(len(codes) - n + 1, n, dtype=np.uint64)
+            for j in range(n):
+                h = h * _MULTIPLIER + codes[j:len(codes) - n + 1 + j]
+            hashes.append(h)
+        if not hashes:
+            return np.zeros(self.dim, dtype=np.float32)
+        h = np.concatenate(hashes)
+        # splitmix64 finalizer, so nearby codepoints land in unrelated buckets
+        h ^= h >> np.uint64(30)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(27)
+        h *= np.uint64(0x94D049BB133111EB)
+        h ^= h >> np.uint64(31)
+        signs = np.where(h >> np.uint64(63), 1.0, -1.0)
+        vector = np.bincount((h % np.uint64(self.dim)).astype(np.int64), weights=signs,
+                             minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEncoder:
+    """A small sentence-transformers model on CPU."""
+
+    def __init__(self, model_name="paraphrase-multilingual-MiniLM-L12-v2"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("sentence-transformers not installed (pip install sentence-transformers)")
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def encode(self, text):
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+def make_encoder(name="hashing"):
+    """'hashing' or a sentence-transformers model name."""
+    if name == "hashing":
+        return HashingEncoder()
+    return SentenceTransformerEncoder(name)
+
+
+class BruteForceIndex:
+    """
+    Exact inner-product search over a fixed-size ring buffer. Entries
+    carry a group (the app) and the time they were stored; a search
+    only scores the rows of its group stored at or after min_time,
+    which keeps it cheap at any capacity.
+    """
+
+    kind = "exact"
+
+    def __init__(self, dim, capacity):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.groups = np.full(capacity, -1, dtype=np.int64)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.group_ids = {}
+        self.payloads = [None] * capacity
+        self.capacity = capacity
+        self.size = 0
+        self.next = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, vector, payload, group=None, stored_at=0.0):
+        self.vectors[self.next] = vector
+        self.groups[self.next] = self.group_ids.setdefault(group, len(self.group_ids))
+        self.times[self.next] = stored_at
+        self.payloads[self.next] = payload
+        self.next = (self.next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def search(self, vector, k, group=None, min_time=None):
+        """[(similarity, payload), ...] best first."""
+        if group is not None and group not in self.group_ids:
+            return []
+        mask = np.ones(self.size, dtype=bool)
+        if group is not None:
+            mask &= self.groups[:self.size] == self.group_ids[group]
+        if min_time is not None:
+            mask &= self.times[:self.size] >= min_time
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        sims = self.vectors[rows] @ vector
+        k = min(k, len(rows))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(float(sims[i]), self.payloads[rows[i]]) for i in top]
+
+
+class HnswIndex:
+    """
+    hnswlib HNSW graph over all apps; the oldest entry is marked deleted
+    and its slot reused when full. group is ignored: the caller filters
+    the k neighbours by app. Entries arrive in time order, so the ones
+    stored before min_time are the oldest and are deleted before a
+    search.
+    """
+
+    kind = "hnsw"
+
+    def __init__(self, dim, capacity, m=16, ef_construction=100, ef=64):
+        import hnswlib
+
+        self.index = hnswlib.Index(space="ip", dim=dim)
+        self.index.init_index(max_elements=capacity, ef_construction=ef_construction, M=m,
+                              allow_replace_deleted=True)
+        self.index.set_ef(ef)
+        self.capacity = capacity
+        self.payloads = {}
+        self.order = deque()  # (label, stored_at), oldest first
+        self.next_label = 0
+
+    def __len__(self):
+        return len(self.order)
+
+    def _drop_oldest(self):
+        label, _ = self.order.popleft()
+        self.index.mark_deleted(label)
+        del self.payloads[label]
+
+    def add(self, vector, payload, group=None, stored_at=0.0):
+        if len(self.order) >= self.capacity:
+            self._drop_oldest()
+        label = self.next_label
+        self.next_label += 1
+        self.index.add_items(vector[None, :], [label], replace_deleted=True)
+        self.payloads[label] = payload
+        self.order.append((label, stored_at))
+
+    def search(self, vector, k, group=None, min_time=None):
+        while min_time is not None and self.order and self.order[0][1] < min_time:
+            self._drop_oldest()
+        if not self.order:
+            return []
+        labels, distances = self.index.knn_query(vector[None, :], k=min(k, len(self.order)))
+        # ip distance is 1 - dot product
+        return [(1.0 - float(d), self.payloads[int(label)]) for label, d in zip(labels[0], distances[0])]
+
+
+def make_index(dim, capacity, kind="auto"):
+    if kind in ("auto", "hnsw"):
+        try:
+            return HnswIndex(dim, capacity)
+        except ImportError:
+            if kind == "hnsw":
+                raise ImportError("hnswlib not installed (pip install hnswlib)")
+    return BruteForceIndex(dim, capacity)
+
+
+def embedding_text(notif):
+    package = canonical_package(notif.get("app") or notif.get("app_display_name"))
+    return f"{package} | {normalize_text(notif.get('title'))} | {normalize_text(notif.get('body'))}"
+
+
+class SemanticCache:
+    """
+    lookup(notif) -> (value, similarity) of the most similar cached
+    notification from the same app stored within the last ttl seconds,
+    or None below the threshold. add(notif, value) stores a classified
+    notification. encoder=None means HashingEncoder(); threshold is
+    required (see the module docstring).
+
+    ttl and clock mean the same as for notif_service.ResultCache; pass
+    the exact cache's so both tiers expire together.
+    """
+
+    def __init__(self, encoder, threshold, capacity=DEFAULT_CAPACITY,
+                 index="auto", neighbours=DEFAULT_NEIGHBOURS, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.encoder = encoder or HashingEncoder()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.clock = clock
+        self.neighbours = neighbours
+        self.index = make_index(self.encoder.dim, capacity, index)
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        # The vector of the last lookup, reused by the add() that follows a miss
+        self._last = (None, None)
+
+    def _vector(self, text):
+        if self._last[0] == text:
+            return self._last[1]
+        vector = self.encoder.encode(text)
+        self._last = (text, vector)
+        return vector
+
+    def lookup(self, notif):
+        start = time.perf_counter()
+        text = embedding_text(notif)
+        package = text.split(" | ", 1)[0]
+        min_time = self.clock() - self.ttl if self.ttl is not None else None
+        best = None
+        for similarity, (cached_package, value) in self.index.search(self._vector(text), self.neighbours,
+                                                                     package, min_time):
+            if similarity < self.threshold:
+                break
+            if cached_package == package:
+                best = (value, similarity)
+                break
+        self.lookup_seconds += time.perf_counter() - start
+        if best is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return best
+
+    def add(self, notif, value):
+        text = embedding_text(notif)
+        package = text.split(" | ", 1)[0]
+        self.index.add(self._vector(text), (package, value), package, self.clock())
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "encoder": self.encoder.name,
+            "index": self.index.kind,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "entries": len(self.index),
+            "lookups": lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "mean_lookup_us": self.lookup_seconds / lookups * 1e6 if lookups else 0.0,
+        }
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Greedy speculative decoding for the HF harness.
+
+A proposer guesses the next few tokens; the target model scores the
+guess in the same forward pass that produces its next token, keeps the
+longest prefix that matches its own greedy choice, and adds the token
+it picks at the first mismatch. The answer is the one greedy generate()
+would give (up to bf16 rounding between multi-token and single-token
+forward passes); only the number of target forward passes changes.
+
+Proposers:
+- PromptLookupProposer: no draft model; proposes the tokens that
+  followed the latest earlier occurrence of the last few tokens in the
+  prompt or output. FunctionGemma's call echoes app_name, title and
+  body from the user turn, so long runs are copied up to k tokens per
+  forward.
+- DraftModelProposer: a smaller model with the same tokenizer drafts k
+  tokens greedily (e.g. a distilled Qwen-tokenizer draft).
+- AnswerBridgeProposer: a model with a different vocabulary and output
+  format (the fine-tuned FunctionGemma) classifies the notification in
+  its own prompt format; the answer is re-rendered in the target's
+  format, tokenized with the target tokenizer and proposed wherever the
+  target's output lines up with it. A correct draft is verified in the
+  prefill pass, so the whole answer costs one target forward when k
+  covers the bridged answer (benchmarks/backends.py passes
+  max_new_tokens for this proposer); with a smaller k it costs one
+  forward per k tokens.
+
+speculative_generate() returns the answer ids and the counters that
+decide whether a draft path pays off: target forward passes, proposed
+and accepted draft tokens.
+"""
+
+import torch
+
+
+def lookup_continuation(reference, context, k, max_ngram=3):
+    """
+    Up to k tokens that followed the latest occurrence in reference of
+    the context's trailing n-gram, trying the longest n first. An
+    occurrence with nothing after it (the context's own tail, when
+    reference is the context) is skipped.
+    """
+    for n in range(min(max_ngram, len(context)), 0, -1):
+        tail = context[-n:]
+        for start in range(len(reference) - n - 1, -1, -1):
+            if reference[start:start + n] == tail:
+                return reference[start + n:start + n + k]
+    return []
+
+
+class PromptLookupProposer:
+    """Prompt-lookup decoding: n-gram matches against the prompt and the output so far."""
+
+    def __init__(self, max_ngram=3):
+        self.max_ngram = max_ngram
+
+    def prepare(self, notif=None):
+        pass
+
+    def propose(self, context, generated, k):
+        return lookup_continuation(context, context, k, self.max_ngram)
+
+
+class DraftModelProposer:
+    """Greedy draft from a smaller model that shares the target's tokenizer."""
+
+    def __init__(self, model):
+        self.model = model
+        self.prepare()
+
+    def prepare(self, notif=None):
+        self.cache = None
+        self.cached_ids = []
+
+    def propose(self, context, generated, k):
+        # Reuse the draft's KV cache for the prefix it shares with the
+        # target's context; always feed at least the last token
+        common = 0
+        limit = min(len(self.cached_ids), len(context) - 1)
+        while common < limit and self.cached_ids[common] == context[common]:
+            common += 1
+        if self.cache is not None:
+            self.cache.crop(common)
+
+        feed = context[common:]
+        drafted = []
+        with torch.no_grad():
+            for _ in range(k):
+                ids = torch.tensor([feed], device=self.model.device)
+                outputs = self.model(input_ids=ids, past_key_values=self.cache, use_cache=True)
+                self.cache = outputs.past_key_values
+                token_id = int(torch.argmax(outputs.logits[0, -1]))
+                drafted.append(token_id)
+                feed = [token_id]
+        self.cached_ids = context + drafted[:-1]
+        return drafted
+
+
+class AnswerBridgeProposer:
+    """
+    Whole-answer draft from a model with another vocabulary.
+
+    answer_fn(notif) runs the draft model and returns the answer as
+    target-format text (None if the draft did not parse); it is called
+    lazily on the first propose() so its cost lands inside the timed
+    generation.
+    """
+
+    def __init__(self, answer_fn, target_tokenizer):
+        self.answer_fn = answer_fn
+        self.tokenizer = target_tokenizer
+        self.prepare()
+
+    def prepare(self, notif=None):
+        self.notif = notif
+        self.answer = None
+
+    def propose(self, context, generated, k):
+        if self.answer is None:
+            text = self.answer_fn(self.notif)
+            self.answer = self.tokenizer(text, add_special_tokens=False)["input_ids"] if text else []
+        if not generated:
+            return self.answer[:k]
+        return lookup_continuation(self.answer, generated, k)
+
+
+def speculative_generate(model, input_ids, proposer, max_new_tokens, stop_ids, k=8,
+                         past_key_values=None, streamer=None):
+    """
+    Greedy decode a single prompt, verifying proposer drafts.
+
+    past_key_values may cover a prefix of input_ids (e.g. a cached
+    system prompt) and must support crop() (DynamicCache). streamer gets
+    put()/end() calls like generate(), one put() per target forward.
+
+    Returns (answer_token_ids, stats) with stats forward_passes,
+    proposed and accepted.
+    """
+    cached = past_key_values.get_seq_length() if past_key_values is not None else 0
+    context = input_ids[0].tolist()
+    pending = context[cached:]
+    generated = []
+    stats = {"forward_passes": 0, "proposed": 0, "accepted": 0}
+
+    if streamer is not None:
+        streamer.put(input_ids.cpu())
+
+    done = False
+    while not done and len(generated) < max_new_tokens:
+        budget = max_new_tokens - len(generated)
+        draft = proposer.propose(context, generated, min(k, budget - 1)) if budget > 1 else []
+
+        feed = torch.tensor([pending + draft], dtype=input_ids.dtype, device=input_ids.device)
+        with torch.no_grad():
+            outputs = model(input_ids=feed, past_key_values=past_key_values, use_cache=True)
+        past_key_values = outputs.past_key_values
+        predicted = torch.argmax(outputs.logits[0, -(len(draft) + 1):], dim=-1).tolist()
+
+        accepted = 0
+        while accepted < len(draft) and draft[accepted] == predicted[accepted]:
+            accepted += 1
+        new = draft[:accepted] + [predicted[accepted]]
+        stats["forward_passes"] += 1
+        stats["proposed"] += len(draft)
+        stats["accepted"] += accepted
+
+        for i, token_id in enumerate(new):
+            if token_id in stop_ids:
+                new, done = new[:i + 1], True
+                break
+        generated.extend(new)
+        context.extend(new)
+        if streamer is not None:
+            streamer.put(torch.tensor(new))
+
+        # KV is valid for every token except the last one, which was
+        # predicted rather than fed; rejected draft positions are dropped
+        past_key_values.crop(len(context) - 1)
+        pending = [new[-1]]
+
+    if streamer is not None:
+        streamer.end()
+
+    return generated, stats
+
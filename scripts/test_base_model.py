@@ -1,35 +1,19 @@
 #!/usr/bin/env python3
-"""Test Qwen3-0.6B base model on notification classification dataset."""
+"""Test Qwen3-0.6B base model on notification classification dataset.
 
+--workers N spreads the dataset over N llama-cpp processes (see
+llama_workers.py); --workers 1,8,32 compares throughput per core count.
+"""
+
+import argparse
 import json
 import sys
 from pathlib import Path
 
-try:
-    from llama_cpp import Llama
-except ImportError:
-    print("Error: llama-cpp-python not installed")
-    print("Install with: pip install llama-cpp-python")
-    sys.exit(1)
+from llama_workers import load_llama, parse_worker_counts, print_throughput_table, run_workers
+from notif_index import read_rows
 
-# Load model
 MODEL_PATH = Path("../models/Qwen3-0.6B-Q5_K_M.gguf")
-if not MODEL_PATH.exists():
-    print(f"Error: Model not found at {MODEL_PATH}")
-    sys.exit(1)
-
-print(f"Loading model from {MODEL_PATH}...")
-print("This may take 10-30 seconds...")
-
-llm = Llama(
-    model_path=str(MODEL_PATH),
-    n_ctx=2048,
-    n_threads=8,
-    n_gpu_layers=0,  # CPU only
-    verbose=False
-)
-
-print("Model loaded!\n")
 
 # Test on sample of dataset
 DATASET_PATH = Path("../training_data.jsonl")
@@ -71,131 +55,175 @@ def parse_classification(json_str):
     except:
         return None, None
 
-# Load sample from dataset
-print(f"Loading {SAMPLE_SIZE} examples from dataset...")
-examples = []
-with open(DATASET_PATH, 'r', encoding='utf-8') as f:
-    for i, line in enumerate(f):
-        if i >= SAMPLE_SIZE:
-            break
-        examples.append(json.loads(line))
-
-print(f"Loaded {len(examples)} examples\n")
-print("="*70)
-print("TESTING BASE MODEL (NO FINE-TUNING)")
-print("="*70)
-
-# Test each example
-correct_folder = 0
-correct_priority = 0
-parse_failures = 0
-total = len(examples)
-
-errors = []
-
-for i, example in enumerate(examples, 1):
-    notif = example["notification"]
-    expected = example["classification"]
-
-    # Build prompt
-    prompt = build_prompt(
-        notif["app_display_name"],
-        notif["title"],
-        notif["body"]
-    )
-
-    # Run inference
+def classify(llm, prompt):
+    """Run inference; module level so worker processes can run it."""
     response = llm(
         prompt,
         max_tokens=100,
         temperature=0.0,  # Greedy for deterministic output
         stop=["<|im_end|>"]
     )
+    return response["choices"][0]["text"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Test Qwen3-0.6B base model (llama-cpp)")
+    parser.add_argument("--workers", type=parse_worker_counts,
+                        help="Worker processes, or a comma-separated list to compare core counts")
+    parser.add_argument("--threads", type=int,
+                        help="Threads per Llama (default: 8 in-process, cores/workers with --workers)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if not MODEL_PATH.exists():
+        print(f"Error: Model not found at {MODEL_PATH}")
+        sys.exit(1)
+
+    # Load sample from dataset
+    print(f"Loading {SAMPLE_SIZE} examples from dataset...")
+    examples = read_rows(DATASET_PATH, 0, SAMPLE_SIZE)
+
+    print(f"Loaded {len(examples)} examples\n")
+    print("="*70)
+    print("TESTING BASE MODEL (NO FINE-TUNING)")
+    print("="*70)
+
+    prompts = [
+        build_prompt(
+            example["notification"]["app_display_name"],
+            example["notification"]["title"],
+            example["notification"]["body"]
+        )
+        for example in examples
+    ]
 
-    output = response["choices"][0]["text"]
-
-    # Parse result
-    json_str = extract_json(output)
-    if not json_str:
-        parse_failures += 1
-        errors.append({
-            "example": i,
-            "expected": expected,
-            "output": output,
-            "error": "Failed to extract JSON"
-        })
-        continue
-
-    predicted_folder, predicted_priority = parse_classification(json_str)
-
-    if not predicted_folder:
-        parse_failures += 1
-        errors.append({
-            "example": i,
-            "expected": expected,
-            "output": json_str,
-            "error": "Failed to parse JSON"
-        })
-        continue
-
-    # Check accuracy
-    if predicted_folder == expected["folder"]:
-        correct_folder += 1
+    # Run inference
+    runs = []
+    if args.workers is None:
+        print(f"Loading model from {MODEL_PATH}...")
+        print("This may take 10-30 seconds...")
+        llm = load_llama(MODEL_PATH, args.threads or 8)
+        print("Model loaded!\n")
+
+        outputs = []
+        for i, prompt in enumerate(prompts, 1):
+            outputs.append(classify(llm, prompt))
+            # Progress
+            if i % 10 == 0:
+                print(f"Progress: {i}/{len(prompts)} ({i/len(prompts)*100:.0f}%)")
     else:
-        errors.append({
-            "example": i,
-            "app": notif["app_display_name"],
-            "title": notif["title"][:50],
-            "expected": expected["folder"],
-            "predicted": predicted_folder
-        })
-
-    if predicted_priority == expected["priority"]:
-        correct_priority += 1
-
-    # Progress
-    if i % 10 == 0:
-        print(f"Progress: {i}/{total} ({i/total*100:.0f}%)")
-
-# Results
-print("\n" + "="*70)
-print("RESULTS")
-print("="*70)
-print(f"\nTotal examples tested: {total}")
-print(f"\nFolder Accuracy:   {correct_folder}/{total} ({correct_folder/total*100:.1f}%)")
-print(f"Priority Accuracy: {correct_priority}/{total} ({correct_priority/total*100:.1f}%)")
-print(f"Parse Failures:    {parse_failures}/{total} ({parse_failures/total*100:.1f}%)")
-
-# Show errors
-if errors:
-    print(f"\n\nFirst 10 Errors:")
-    print("-"*70)
-    for err in errors[:10]:
-        if "error" in err:
-            print(f"\nExample {err['example']}: {err['error']}")
-            print(f"  Expected: {err['expected']}")
-            print(f"  Output: {err['output'][:100]}...")
+        outputs = None
+        worker_mismatches = 0
+        for workers in args.workers:
+            print(f"\nRunning with {workers} worker(s)...")
+            run_outputs, stats = run_workers(MODEL_PATH, prompts, classify, workers, args.threads)
+            runs.append(stats)
+            if outputs is None:
+                outputs = run_outputs
+            else:
+                # Merged in dataset order, so runs compare example by example
+                worker_mismatches += sum(1 for a, b in zip(outputs, run_outputs) if a != b)
+
+    # Score each example
+    correct_folder = 0
+    correct_priority = 0
+    parse_failures = 0
+    total = len(examples)
+
+    errors = []
+
+    for i, (example, output) in enumerate(zip(examples, outputs), 1):
+        notif = example["notification"]
+        expected = example["classification"]
+
+        # Parse result
+        json_str = extract_json(output)
+        if not json_str:
+            parse_failures += 1
+            errors.append({
+                "example": i,
+                "expected": expected,
+                "output": output,
+                "error": "Failed to extract JSON"
+            })
+            continue
+
+        predicted_folder, predicted_priority = parse_classification(json_str)
+
+        if not predicted_folder:
+            parse_failures += 1
+            errors.append({
+                "example": i,
+                "expected": expected,
+                "output": json_str,
+                "error": "Failed to parse JSON"
+            })
+            continue
+
+        # Check accuracy
+        if predicted_folder == expected["folder"]:
+            correct_folder += 1
         else:
-            print(f"\nExample {err['example']}: {err['app']} - {err['title']}")
-            print(f"  Expected: {err['expected']}")
-            print(f"  Predicted: {err['predicted']}")
-
-print("\n" + "="*70)
-print("CONCLUSION")
-print("="*70)
-
-if correct_folder / total >= 0.80:
-    print("\n✓ Base model achieves >80% accuracy!")
-    print("  Phase 1 baseline is viable without fine-tuning.")
-else:
-    print("\n⚠ Base model accuracy is below 80%")
-    print("  Consider: fine-tuning, better prompting, or GBNF constraints")
-
-if parse_failures / total > 0.10:
-    print("\n⚠ High parse failure rate (>10%)")
-    print("  GBNF grammar will be critical for Phase 2")
-else:
-    print("\n✓ Low parse failure rate")
-    print("  Model generates valid JSON consistently")
-
-print("\n" + "="*70)
+            errors.append({
+                "example": i,
+                "app": notif["app_display_name"],
+                "title": notif["title"][:50],
+                "expected": expected["folder"],
+                "predicted": predicted_folder
+            })
+
+        if predicted_priority == expected["priority"]:
+            correct_priority += 1
+
+    # Results
+    print("\n" + "="*70)
+    print("RESULTS")
+    print("="*70)
+    print(f"\nTotal examples tested: {total}")
+    print(f"\nFolder Accuracy:   {correct_folder}/{total} ({correct_folder/total*100:.1f}%)")
+    print(f"Priority Accuracy: {correct_priority}/{total} ({correct_priority/total*100:.1f}%)")
+    print(f"Parse Failures:    {parse_failures}/{total} ({parse_failures/total*100:.1f}%)")
+
+    if runs:
+        print("\nThroughput:")
+        print_throughput_table(runs)
+        if len(runs) > 1:
+            print(f"Output mismatches across worker counts: {worker_mismatches}")
+
+    # Show errors
+    if errors:
+        print(f"\n\nFirst 10 Errors:")
+        print("-"*70)
+        for err in errors[:10]:
+            if "error" in err:
+                print(f"\nExample {err['example']}: {err['error']}")
+                print(f"  Expected: {err['expected']}")
+                print(f"  Output: {err['output'][:100]}...")
+            else:
+                print(f"\nExample {err['example']}: {err['app']} - {err['title']}")
+                print(f"  Expected: {err['expected']}")
+                print(f"  Predicted: {err['predicted']}")
+
+    print("\n" + "="*70)
+    print("CONCLUSION")
+    print("="*70)
+
+    if correct_folder / total >= 0.80:
+        print("\n✓ Base model achieves >80% accuracy!")
+        print("  Phase 1 baseline is viable without fine-tuning.")
+    else:
+        print("\n⚠ Base model accuracy is below 80%")
+        print("  Consider: fine-tuning, better prompting, or GBNF constraints")
+
+    if parse_failures / total > 0.10:
+        print("\n⚠ High parse failure rate (>10%)")
+        print("  GBNF grammar will be critical for Phase 2")
+    else:
+        print("\n✓ Low parse failure rate")
+        print("  Model generates valid JSON consistently")
+
+    print("\n" + "="*70)
+
+if __name__ == "__main__":
+    main()
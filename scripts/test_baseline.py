@@ -1,40 +1,29 @@
 #!/usr/bin/env python3
-"""Test base Qwen3-0.6B on notification classification - save results to JSON."""
+"""Test base Qwen3-0.6B on notification classification - save results to JSON.
 
+Runs in-process by default. --workers N starts N llama-cpp processes
+with cores split between them; a list (--workers 1,8,32) runs each
+count in turn and reports throughput per core count.
+"""
+
+import argparse
 import json
 from pathlib import Path
-from llama_cpp import Llama
+from inference_timing import print_timing_summary, summarize_timings, timed_llama_call
+from llama_workers import load_llama, parse_worker_counts, print_throughput_table, run_workers
+from notif_index import read_rows
 
-# Load model
 MODEL_PATH = Path("E:/projects/notif/models/Qwen3-0.6B-Q5_K_M.gguf")
-
-print("Loading Qwen3-0.6B Q5_K_M model...")
-llm = Llama(
-    model_path=str(MODEL_PATH),
-    n_ctx=2048,
-    n_threads=8,
-    n_gpu_layers=0,
-    verbose=False
-)
-print("Model loaded!\n")
+DATASET_PATH = Path("E:/projects/notif/training_data.jsonl")
+OUTPUT_PATH = Path("E:/projects/notif/baseline_test_results.json")
 
 # Test on 50 examples
 SAMPLE_SIZE = 50
-results = []
-
-print(f"Testing on {SAMPLE_SIZE} notification examples...")
-
-with open("E:/projects/notif/training_data.jsonl", 'r', encoding='utf-8') as f:
-    for i, line in enumerate(f):
-        if i >= SAMPLE_SIZE:
-            break
 
-        example = json.loads(line)
-        notif = example["notification"]
-        expected = example["classification"]
 
-        # Build prompt with proper Qwen3 chat template
-        prompt = f"""<|im_start|>system
+def build_prompt(notif):
+    """Build prompt with proper Qwen3 chat template."""
+    return f"""<|im_start|>system
 You are a helpful assistant that classifies notifications into folders.
 
 Available folders:
@@ -54,9 +43,61 @@ Body: {notif['body']}<|im_end|>
 <|im_start|>assistant
 """
 
-        # Run inference
-        response = llm(prompt, max_tokens=40, temperature=0.0, stop=["}"])
-        output = response["choices"][0]["text"] + "}"  # Add closing brace
+
+def classify(llm, prompt):
+    """Run inference; returns (output, timing). Module level so worker processes can run it."""
+    text, _, timing = timed_llama_call(llm, prompt, max_tokens=40, temperature=0.0, stop=["}"])
+    return text + "}", timing  # Add closing brace
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Baseline Qwen3-0.6B Q5_K_M (llama-cpp)")
+    parser.add_argument("--workers", type=parse_worker_counts,
+                        help="Worker processes, or a comma-separated list to compare core counts")
+    parser.add_argument("--threads", type=int,
+                        help="Threads per Llama (default: 8 in-process, cores/workers with --workers)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    examples = read_rows(DATASET_PATH, 0, SAMPLE_SIZE)
+    prompts = [build_prompt(example["notification"]) for example in examples]
+
+    print(f"Testing on {SAMPLE_SIZE} notification examples...")
+
+    runs = []
+    worker_mismatches = None
+    if args.workers is None:
+        print("Loading Qwen3-0.6B Q5_K_M model...")
+        llm = load_llama(MODEL_PATH, args.threads or 8)
+        print("Model loaded!\n")
+
+        outputs = []
+        for i, prompt in enumerate(prompts, 1):
+            outputs.append(classify(llm, prompt))
+            if i % 10 == 0:
+                print(f"  Progress: {i}/{SAMPLE_SIZE}")
+    else:
+        outputs = None
+        worker_mismatches = 0
+        for workers in args.workers:
+            print(f"\nRunning with {workers} worker(s)...")
+            run_outputs, stats = run_workers(MODEL_PATH, prompts, classify, workers, args.threads)
+            runs.append(stats)
+            if outputs is None:
+                outputs = run_outputs
+            else:
+                # Greedy decoding: every worker count should produce the same text
+                worker_mismatches += sum(1 for a, b in zip(outputs, run_outputs) if a[0] != b[0])
+
+    results = []
+    timings = []
+    for i, (example, (output, timing)) in enumerate(zip(examples, outputs)):
+        notif = example["notification"]
+        expected = example["classification"]
+        timings.append(timing)
 
         # Parse
         try:
@@ -84,41 +125,54 @@ Body: {notif['body']}<|im_end|>
             "folder_correct": folder_correct,
             "priority_correct": priority_correct,
             "parse_ok": parse_ok,
+            "ttft_ms": timing["ttft_s"] * 1000 if timing["ttft_s"] is not None else None,
+            "prefill_tok_s": timing["prefill_tok_s"],
+            "decode_tok_s": timing["decode_tok_s"],
             "raw_output": output.strip()[:100]
         })
 
-        if (i + 1) % 10 == 0:
-            print(f"  Progress: {i+1}/{SAMPLE_SIZE}")
-
-# Calculate stats
-total = len(results)
-folder_correct = sum(1 for r in results if r["folder_correct"])
-priority_correct = sum(1 for r in results if r["priority_correct"])
-parse_ok = sum(1 for r in results if r["parse_ok"])
-
-summary = {
-    "model": "Qwen3-0.6B-Q5_K_M (base, no fine-tuning)",
-    "total_examples": total,
-    "folder_accuracy": f"{folder_correct/total*100:.1f}%",
-    "priority_accuracy": f"{priority_correct/total*100:.1f}%",
-    "parse_success_rate": f"{parse_ok/total*100:.1f}%",
-    "folder_correct_count": folder_correct,
-    "priority_correct_count": priority_correct,
-    "parse_failures": total - parse_ok,
-    "results": results
-}
-
-# Save to file
-output_file = Path("E:/projects/notif/baseline_test_results.json")
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(summary, f, indent=2, ensure_ascii=False)
-
-print(f"\n{'='*70}")
-print("RESULTS")
-print(f"{'='*70}")
-print(f"Total examples: {total}")
-print(f"Folder accuracy: {folder_correct}/{total} ({folder_correct/total*100:.1f}%)")
-print(f"Priority accuracy: {priority_correct}/{total} ({priority_correct/total*100:.1f}%)")
-print(f"Parse success: {parse_ok}/{total} ({parse_ok/total*100:.1f}%)")
-print(f"\nResults saved to: {output_file}")
-print(f"{'='*70}")
+    # Calculate stats
+    total = len(results)
+    folder_correct = sum(1 for r in results if r["folder_correct"])
+    priority_correct = sum(1 for r in results if r["priority_correct"])
+    parse_ok = sum(1 for r in results if r["parse_ok"])
+
+    summary = {
+        "model": "Qwen3-0.6B-Q5_K_M (base, no fine-tuning)",
+        "total_examples": total,
+        "folder_accuracy": f"{folder_correct/total*100:.1f}%",
+        "priority_accuracy": f"{priority_correct/total*100:.1f}%",
+        "parse_success_rate": f"{parse_ok/total*100:.1f}%",
+        "folder_correct_count": folder_correct,
+        "priority_correct_count": priority_correct,
+        "parse_failures": total - parse_ok,
+        "timing": summarize_timings(timings),
+        "throughput": runs or None,
+        "worker_mismatches": worker_mismatches,
+        "results": results
+    }
+
+    # Save to file
+    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(f"\n{'='*70}")
+    print("RESULTS")
+    print(f"{'='*70}")
+    print(f"Total examples: {total}")
+    print(f"Folder accuracy: {folder_correct}/{total} ({folder_correct/total*100:.1f}%)")
+    print(f"Priority accuracy: {priority_correct}/{total} ({priority_correct/total*100:.1f}%)")
+    print(f"Parse success: {parse_ok}/{total} ({parse_ok/total*100:.1f}%)")
+    print()
+    print_timing_summary(summary["timing"])
+    if runs:
+        print()
+        print_throughput_table(runs)
+        if len(runs) > 1:
+            print(f"Output mismatches across worker counts: {worker_mismatches}")
+    print(f"\nResults saved to: {OUTPUT_PATH}")
+    print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
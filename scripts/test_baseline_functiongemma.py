@@ -7,10 +7,13 @@ Uses FunctionGemma's function calling format with control tokens.
 import os
 os.environ["TORCHDYNAMO_DISABLE"] = "1"
 
+import argparse
 import json
 import torch
 from pathlib import Path
 from transformers import AutoModelForCausalLM, AutoTokenizer
+from constrained_decoding import PRIORITIES_5LEVEL, TokenTrie, constrained_generate, functiongemma_candidates
+from notif_index import read_rows
 
 # Configuration
 BASE_MODEL = str(Path(__file__).parent.parent / "models" / "functiongemma-270m")
@@ -107,7 +110,15 @@ def parse_response(text):
     except:
         return None, None
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Baseline FunctionGemma-270M notification classification")
+    parser.add_argument("--constrained", action="store_true",
+                        help="Constrain decoding to the folder enum and priority range")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+
     print("="*70)
     print("BASELINE TEST: FunctionGemma-270M Base Model (NO FINE-TUNING)")
     print("="*70)
@@ -136,12 +147,7 @@ def main():
 
     # Load dataset
     print(f"Loading {SAMPLE_SIZE} examples from {DATASET_PATH}...")
-    examples = []
-    with open(DATASET_PATH, 'r', encoding='utf-8') as f:
-        for i, line in enumerate(f):
-            if i >= SAMPLE_SIZE:
-                break
-            examples.append(json.loads(line))
+    examples = read_rows(DATASET_PATH, 0, SAMPLE_SIZE)
 
     print(f"Loaded {len(examples)} examples")
     print()
@@ -150,6 +156,13 @@ def main():
     print("="*70)
     print()
 
+    trie = None
+    forward_passes = 0
+    if args.constrained:
+        trie = TokenTrie.from_strings(tokenizer, functiongemma_candidates(PRIORITIES_5LEVEL))
+        print("Constrained decoding: folder enum + priority 1-5")
+        print()
+
     # Test
     correct_folder = 0
     correct_priority = 0
@@ -171,20 +184,25 @@ def main():
         inputs = tokenizer([prompt], return_tensors="pt", padding=True)
         inputs = {k: v.to(model.device) for k, v in inputs.items()}
 
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_new_tokens=150,
-                do_sample=False,
-                pad_token_id=tokenizer.pad_token_id,
-                eos_token_id=tokenizer.eos_token_id,
+        if trie is not None:
+            answer_ids, passes = constrained_generate(model, inputs['input_ids'], trie)
+            forward_passes += passes
+            response = tokenizer.decode(answer_ids, skip_special_tokens=False)
+        else:
+            with torch.no_grad():
+                outputs = model.generate(
+                    **inputs,
+                    max_new_tokens=150,
+                    do_sample=False,
+                    pad_token_id=tokenizer.pad_token_id,
+                    eos_token_id=tokenizer.eos_token_id,
+                )
+
+            response = tokenizer.decode(
+                outputs[0][inputs['input_ids'].shape[1]:],
+                skip_special_tokens=False  # Keep control tokens for parsing
             )
 
-        response = tokenizer.decode(
-            outputs[0][inputs['input_ids'].shape[1]:],
-            skip_special_tokens=False  # Keep control tokens for parsing
-        )
-
         # Parse
         predicted_folder, predicted_priority = parse_response(response)
 
@@ -228,6 +246,8 @@ def main():
     print(f"Folder accuracy:    {correct_folder}/{total} ({correct_folder/total*100:.1f}%)")
     print(f"Priority accuracy:  {correct_priority}/{total} ({correct_priority/total*100:.1f}%)")
     print(f"Parse failures:     {parse_failures}/{total} ({parse_failures/total*100:.1f}%)")
+    if trie is not None:
+        print(f"Decode passes:      {forward_passes/total:.1f} per example (constrained)")
     print()
 
     # Show sample errors
@@ -280,6 +300,7 @@ def main():
         "folder_accuracy": correct_folder / total,
         "priority_accuracy": correct_priority / total,
         "parse_failure_rate": parse_failures / total,
+        "constrained": args.constrained,
         "errors": errors[:20]
     }
 
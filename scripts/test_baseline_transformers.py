@@ -7,19 +7,23 @@ Uses transformers library with GPU acceleration (same as functiongemma-finetune)
 import os
 os.environ["TORCHDYNAMO_DISABLE"] = "1"
 
+import argparse
 import json
+import time
 import torch
 from pathlib import Path
 from transformers import AutoModelForCausalLM, AutoTokenizer
+from prefix_cache import SystemPromptCache, system_prefix_text
+from constrained_decoding import PRIORITIES_5LEVEL, TokenTrie, constrained_generate, json_candidates
+from inference_timing import TokenTimer, print_timing_summary, summarize_timings
+from notif_index import read_rows
 
 # Configuration
 BASE_MODEL = str(Path(__file__).parent.parent / "models" / "qwen3-0.6b")  # Use Qwen3 0.6B (same as functiongemma project)
 DATASET_PATH = Path(__file__).parent.parent / "training_data.jsonl"
 SAMPLE_SIZE = 100
 
-def build_messages(app_name, title, body):
-    """Build chat messages for classification."""
-    system_prompt = """You classify notifications into folders.
+SYSTEM_PROMPT = """You classify notifications into folders.
 
 Folders:
 [Work]: Professional messages from work apps like Slack, Jira, Teams, work email, Feishu, DingTalk
@@ -31,12 +35,14 @@ Output JSON only: {"folder": "...", "priority": 1-5}
 Priority: 1=ignore, 2=low, 3=normal, 4=important, 5=urgent
 /no_think"""
 
+def build_messages(app_name, title, body):
+    """Build chat messages for classification."""
     user_message = f"""App: {app_name}
 Title: {title}
 Body: {body}"""
 
     return [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": user_message}
     ]
 
@@ -54,7 +60,39 @@ def parse_response(text):
         pass
     return None, None
 
+def generate_full(model, tokenizer, chat_text, **generate_kwargs):
+    """Generate with a full prefill of system prompt + user turn."""
+    inputs = tokenizer([chat_text], return_tensors="pt", padding=True)
+    inputs = {k: v.to(model.device) for k, v in inputs.items()}
+
+    with torch.no_grad():
+        outputs = model.generate(**inputs, **generate_kwargs)
+
+    return outputs, inputs['input_ids'].shape[1]
+
+def generate_constrained(model, tokenizer, chat_text, trie, prefix_cache=None, streamer=None):
+    """Constrained decode, starting from the cached system prompt when available."""
+    if prefix_cache:
+        input_ids, past_key_values = prefix_cache.checkout(chat_text)
+    else:
+        input_ids = tokenizer(chat_text, return_tensors="pt")["input_ids"].to(model.device)
+        past_key_values = None
+
+    return constrained_generate(model, input_ids, trie, past_key_values, streamer=streamer)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Baseline Qwen3-0.6B notification classification")
+    parser.add_argument("--no-prefix-cache", action="store_true",
+                        help="Prefill the full prompt for every example (old behaviour)")
+    parser.add_argument("--compare", action="store_true",
+                        help="Also time a full prefill for each example to report the latency change")
+    parser.add_argument("--constrained", action="store_true",
+                        help="Constrain decoding to the folder enum and priority range")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+
     print("="*70)
     print("BASELINE TEST: Qwen3-0.6B Base Model (NO FINE-TUNING)")
     print("="*70)
@@ -83,12 +121,7 @@ def main():
 
     # Load dataset
     print(f"Loading {SAMPLE_SIZE} examples from {DATASET_PATH}...")
-    examples = []
-    with open(DATASET_PATH, 'r', encoding='utf-8') as f:
-        for i, line in enumerate(f):
-            if i >= SAMPLE_SIZE:
-                break
-            examples.append(json.loads(line))
+    examples = read_rows(DATASET_PATH, 0, SAMPLE_SIZE)
 
     print(f"Loaded {len(examples)} examples")
     print()
@@ -97,7 +130,34 @@ def main():
     print("="*70)
     print()
 
+    generate_kwargs = dict(
+        max_new_tokens=100,
+        do_sample=False,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+
+    prefix_cache = None
+    if not args.no_prefix_cache:
+        prefix_cache = SystemPromptCache(
+            model,
+            tokenizer,
+            system_prefix_text(tokenizer, SYSTEM_PROMPT, enable_thinking=False)
+        )
+        print(f"Cached system prompt KV: {prefix_cache.prefix_len} tokens")
+        print()
+
+    trie = None
+    forward_passes = 0
+    if args.constrained:
+        trie = TokenTrie.from_strings(tokenizer, json_candidates(PRIORITIES_5LEVEL))
+        print("Constrained decoding: folder enum + priority 1-5")
+        print()
+
     # Test
+    latencies = []
+    timings = []
+    full_latencies = []
     correct_folder = 0
     correct_priority = 0
     parse_failures = 0
@@ -122,20 +182,28 @@ def main():
             enable_thinking=False  # Disable thinking mode for clean output
         )
 
-        inputs = tokenizer([chat_text], return_tensors="pt", padding=True)
-        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+        start_time = time.perf_counter()
+        timer = TokenTimer()
+        if trie is not None:
+            answer_ids, passes = generate_constrained(model, tokenizer, chat_text, trie, prefix_cache, streamer=timer)
+            forward_passes += passes
+        elif prefix_cache:
+            outputs, prompt_len = prefix_cache.generate(chat_text, streamer=timer, **generate_kwargs)
+            answer_ids = outputs[0][prompt_len:]
+        else:
+            outputs, prompt_len = generate_full(model, tokenizer, chat_text, streamer=timer, **generate_kwargs)
+            answer_ids = outputs[0][prompt_len:]
+        latencies.append(time.perf_counter() - start_time)
+        cached_tokens = prefix_cache.last_cached_tokens if prefix_cache else 0
+        timings.append(timer.record(prefill_tokens=timer.prompt_tokens - cached_tokens))
 
-        with torch.no_grad():
-            outputs = model.generate(
-                **inputs,
-                max_new_tokens=100,
-                do_sample=False,
-                pad_token_id=tokenizer.pad_token_id,
-                eos_token_id=tokenizer.eos_token_id,
-            )
+        if args.compare and prefix_cache:
+            start_time = time.perf_counter()
+            generate_full(model, tokenizer, chat_text, **generate_kwargs)
+            full_latencies.append(time.perf_counter() - start_time)
 
         response = tokenizer.decode(
-            outputs[0][inputs['input_ids'].shape[1]:],
+            answer_ids,
             skip_special_tokens=True
         )
 
@@ -184,6 +252,25 @@ def main():
     print(f"Parse failures:     {parse_failures}/{total} ({parse_failures/total*100:.1f}%)")
     print()
 
+    mean_latency = sum(latencies) / len(latencies) if latencies else 0.0
+    full_mean_latency = sum(full_latencies) / len(full_latencies) if full_latencies else None
+    print(f"Mean latency:       {mean_latency*1000:.1f} ms/example")
+    if trie is not None:
+        print(f"Decode passes:      {forward_passes/total:.1f} per example (constrained)")
+    if prefix_cache:
+        cache_stats = prefix_cache.stats()
+        print(f"Prefix cache:       {cache_stats['cache_hits']} hits, {cache_stats['cache_misses']} misses")
+        print(f"Prefill saved:      {cache_stats['prefill_tokens_saved']} tokens "
+              f"({cache_stats['prefix_tokens']} per example)")
+    if full_mean_latency:
+        change = (mean_latency - full_mean_latency) / full_mean_latency * 100
+        print(f"Full prefill:       {full_mean_latency*1000:.1f} ms/example ({change:+.1f}% with prefix cache)")
+    print()
+
+    timing_summary = summarize_timings(timings)
+    print_timing_summary(timing_summary)
+    print()
+
     # Show sample errors
     if errors:
         print("Sample Errors (first 10):")
@@ -234,6 +321,11 @@ def main():
         "folder_accuracy": correct_folder / total,
         "priority_accuracy": correct_priority / total,
         "parse_failure_rate": parse_failures / total,
+        "mean_latency_ms": mean_latency * 1000,
+        "full_prefill_mean_latency_ms": full_mean_latency * 1000 if full_mean_latency else None,
+        "prefix_cache": prefix_cache.stats() if prefix_cache else None,
+        "constrained": args.constrained,
+        "timing": timing_summary,
         "errors": errors[:20]  # Save first 20 errors
     }
 
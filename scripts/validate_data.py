@@ -1,10 +1,23 @@
 #!/usr/bin/env python3
-"""Validate synthetic notification data against schema."""
+"""Validate synthetic notification data against schema.
 
+--workers N splits each file into newline-aligned byte ranges and
+validates them in a process pool; errors and counts come back exactly
+as the serial run reports them. --max-errors N stops at the row that
+produced the Nth error, in either mode.
+"""
+
+import argparse
 import json
+import multiprocessing
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from notif_io import iter_json, iter_range_lines, newline_shards
+
+SHARDS_PER_WORKER = 4
+
 VALID_FOLDERS = {"Work", "Personal", "Promotions", "Alerts"}
 
 SCHEMA = {
@@ -22,90 +35,265 @@ SCHEMA = {
 }
 
 
-def validate_entry(entry: dict, line_num: int) -> list[str]:
-    """Validate a single entry. Returns list of errors."""
+def entry_problems(entry: dict) -> list[str]:
+    """Schema problems of a single entry, without the line prefix."""
     errors = []
 
     # Check top-level fields
     for field in ["id", "notification", "classification"]:
         if field not in entry:
-            errors.append(f"Line {line_num}: Missing required field '{field}'")
+            errors.append(f"Missing required field '{field}'")
 
     if errors:
         return errors
 
     # Validate id
     if not isinstance(entry["id"], str) or not entry["id"].strip():
-        errors.append(f"Line {line_num}: 'id' must be a non-empty string")
+        errors.append("'id' must be a non-empty string")
 
     # Validate notification
     notif = entry["notification"]
     for field in ["app", "app_display_name", "title", "body"]:
         if field not in notif:
-            errors.append(f"Line {line_num}: Missing 'notification.{field}'")
+            errors.append(f"Missing 'notification.{field}'")
         elif not isinstance(notif[field], str):
-            errors.append(f"Line {line_num}: 'notification.{field}' must be a string")
+            errors.append(f"'notification.{field}' must be a string")
 
     # Validate classification
     cls = entry["classification"]
     if "folder" not in cls:
-        errors.append(f"Line {line_num}: Missing 'classification.folder'")
+        errors.append("Missing 'classification.folder'")
     elif cls["folder"] not in VALID_FOLDERS:
-        errors.append(f"Line {line_num}: Invalid folder '{cls['folder']}'. Must be one of {VALID_FOLDERS}")
+        errors.append(f"Invalid folder '{cls['folder']}'. Must be one of {sorted(VALID_FOLDERS)}")
 
     if "priority" not in cls:
-        errors.append(f"Line {line_num}: Missing 'classification.priority'")
+        errors.append("Missing 'classification.priority'")
     elif not isinstance(cls["priority"], int) or not 1 <= cls["priority"] <= 5:
-        errors.append(f"Line {line_num}: 'priority' must be int 1-5, got {cls.get('priority')}")
+        errors.append(f"'priority' must be int 1-5, got {cls.get('priority')}")
 
     return errors
 
 
-def validate_file(filepath: Path) -> tuple[int, int, list[str]]:
+def validate_entry(entry: dict, line_num: int) -> list[str]:
+    """Validate a single entry. Returns list of errors."""
+    return [f"Line {line_num}: {problem}" for problem in entry_problems(entry)]
+
+
+def validate_file(filepath: Path, max_errors: int = None) -> tuple[int, int, list[str]]:
     """Validate a JSONL file. Returns (valid_count, total_count, errors)."""
     errors = []
     valid = 0
     total = 0
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
+    # Raw dicts: the schema check needs to see missing and mistyped keys.
+    # iter_json records invalid JSON lines as it reaches them, so draining
+    # them before each entry keeps errors in line order.
+    invalid_json = []
+
+    def drain_invalid_json():
+        nonlocal total
+        total += len(invalid_json)
+        errors.extend(f"Line {error.line_num}: {error.message}" for error in invalid_json)
+        invalid_json.clear()
+
+    for _, line_num, entry in iter_json(filepath, errors=invalid_json):
+        drain_invalid_json()
+        if max_errors and len(errors) >= max_errors:
+            break
+        total += 1
+
+        entry_errors = validate_entry(entry, line_num)
+        if entry_errors:
+            errors.extend(entry_errors)
+            if max_errors and len(errors) >= max_errors:
+                break
+        else:
+            valid += 1
+    drain_invalid_json()
+
+    if max_errors:
+        errors = errors[:max_errors]
+    return valid, total, errors
+
+
+# Set by the parent once the merge has all the errors it needs
+_stop = None
+
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def validate_shard(filepath: Path, start: int, end: int, max_errors: int = None):
+    """
+    Validate one byte range of a file.
+
+    Line numbers are relative to the shard (1-based). Returns
+    (problem rows, lines read, valid, total, stopped early), where each
+    problem row is (line, total before it, valid before it, is invalid
+    JSON, messages), so the merge can cut valid/total at the exact row
+    where validate_file() would stop.
+    """
+    rows = []
+    errors = 0
+    valid = 0
+    total = 0
+    lines = 0
+    limit_reached = False
+    stopped = False
+
+    for lines, line in enumerate(iter_range_lines(filepath, start, end), 1):
+        if _stop is not None and lines % 1024 == 0 and _stop.is_set():
+            stopped = True
+            break
+        line = line.strip()
+        if not line:
+            continue
 
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            rows.append((lines, total, valid, True, [f"Invalid JSON - {e}"]))
+            errors += 1
             total += 1
+            limit_reached = limit_reached or bool(max_errors and errors >= max_errors)
+            continue
+
+        # Past the limit, validate_file() still counts a run of invalid
+        # JSON lines but stops before the next entry
+        if limit_reached:
+            stopped = True
+            break
+
+        problems = entry_problems(entry)
+        if problems:
+            rows.append((lines, total, valid, False, problems))
+            errors += len(problems)
+        else:
+            valid += 1
+        total += 1
+
+        # Later shards only matter if this one ends below the limit
+        if max_errors and errors >= max_errors:
+            stopped = True
+            break
+
+    return rows, lines, valid, total, stopped
+
+
+def invalid_json_run(rows, first, total_before):
+    """Number of consecutive invalid JSON rows from rows[first], the first of them at total_before."""
+    run = 0
+    for _, row_total, _, is_json, _ in rows[first:]:
+        if not is_json or row_total != total_before + run:
+            break
+        run += 1
+    return run
 
-            try:
-                entry = json.loads(line)
-            except json.JSONDecodeError as e:
-                errors.append(f"Line {line_num}: Invalid JSON - {e}")
+
+def validate_file_parallel(filepath: Path, workers: int, max_errors: int = None) -> tuple[int, int, list[str]]:
+    """
+    validate_file() on a process pool, one newline-aligned byte range per
+    task. Errors, valid and total match the serial run, including where
+    --max-errors stops it.
+    """
+    shards = newline_shards(filepath, workers * SHARDS_PER_WORKER)
+    errors = []
+    valid = 0
+    total = 0
+    line_offset = 0
+    # After the limit is hit on an invalid JSON line, the run of invalid
+    # JSON lines that follows is still counted, possibly into the next shard
+    in_run = False
+
+    def add_errors(shard_rows):
+        for line, _, _, _, messages in shard_rows:
+            errors.extend(f"Line {line_offset + line}: {message}" for message in messages)
+
+    stop = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stop,))
+    try:
+        # map() yields in shard order, so errors merge back in line order
+        results = executor.map(
+            validate_shard,
+            [filepath] * len(shards),
+            [start for start, _ in shards],
+            [end for _, end in shards],
+            [max_errors] * len(shards),
+        )
+        for rows, lines, shard_valid, shard_total, shard_stopped in results:
+            if in_run:
+                run = invalid_json_run(rows, 0, 0)
+                add_errors(rows[:run])
+                total += run
+                if run < shard_total or shard_stopped:
+                    break
+                line_offset += lines
                 continue
 
-            entry_errors = validate_entry(entry, line_num)
-            if entry_errors:
-                errors.extend(entry_errors)
-            else:
-                valid += 1
+            hit = None
+            for i, (line, row_total, row_valid, is_json, messages) in enumerate(rows):
+                errors.extend(f"Line {line_offset + line}: {message}" for message in messages)
+                if max_errors and len(errors) >= max_errors:
+                    hit = i
+                    break
+            if hit is None:
+                valid += shard_valid
+                total += shard_total
+                line_offset += lines
+                continue
+
+            _, row_total, row_valid, is_json, _ = rows[hit]
+            valid += row_valid
+            total += row_total + 1
+            if not is_json:
+                break
+            run = invalid_json_run(rows, hit + 1, row_total + 1)
+            add_errors(rows[hit + 1:hit + 1 + run])
+            total += run
+            if row_total + 1 + run < shard_total or shard_stopped:
+                break
+            in_run = True
+            line_offset += lines
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
 
+    if max_errors:
+        errors = errors[:max_errors]
     return valid, total, errors
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Validate notification JSONL files against the schema")
+    parser.add_argument("files", nargs="*", help="JSONL files to validate")
+    parser.add_argument("--workers", type=int, default=1, help="Validate byte-range shards in N processes")
+    parser.add_argument("--max-errors", type=int, help="Stop after N errors")
+    return parser.parse_args()
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python validate_data.py <file.jsonl> [file2.jsonl ...]")
+    args = parse_args()
+    if not args.files:
+        print("Usage: python validate_data.py <file.jsonl> [file2.jsonl ...] [--workers N] [--max-errors N]")
         sys.exit(1)
 
     total_valid = 0
     total_entries = 0
     all_errors = []
 
-    for filepath in sys.argv[1:]:
+    for filepath in args.files:
         path = Path(filepath)
         if not path.exists():
             print(f"File not found: {filepath}")
             continue
 
-        valid, total, errors = validate_file(path)
+        remaining = args.max_errors - len(all_errors) if args.max_errors else None
+        if args.workers > 1:
+            valid, total, errors = validate_file_parallel(path, args.workers, remaining)
+        else:
+            valid, total, errors = validate_file(path, remaining)
         total_valid += valid
         total_entries += total
         all_errors.extend(errors)
@@ -113,6 +301,10 @@ def main():
         status = "OK" if not errors else "ERRORS"
         print(f"{filepath}: {valid}/{total} valid [{status}]")
 
+        if args.max_errors and len(all_errors) >= args.max_errors:
+            print(f"Stopped after {args.max_errors} error(s)")
+            break
+
     if all_errors:
         print(f"\n{len(all_errors)} error(s) found:")
         for err in all_errors[:20]:  # Show first 20